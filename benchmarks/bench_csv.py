@@ -0,0 +1,88 @@
+"""Compare the one-shot DataFrame.to_csv export with the atomic, chunked CSV writer.
+
+Usage:
+    python -m benchmarks.bench_csv [--rows 100000 1000000] [--repeat 3]
+
+Each case runs in a fresh subprocess so that its peak RSS (ru_maxrss) is not
+inflated by earlier cases. "frame RSS" is the peak after building the input
+frame; the difference to "peak RSS" is what the export itself added.
+Throughput is the best of ``--repeat`` runs.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.catalogue import CATEGORIES, GENDERS, SIZES
+from utils.load import save_to_csv
+
+CASES = {
+    'to_csv': lambda df, path: df.to_csv(path, index=False, encoding='utf-8'),
+    'atomic': lambda df, path: save_to_csv(df, path),
+    'atomic-gzip': lambda df, path: save_to_csv(df, path, compression='gzip'),
+    'atomic-zstd': lambda df, path: save_to_csv(df, path, compression='zstd'),
+}
+
+def cleaned_frame(rows, seed=0):
+    """A frame shaped like clean_data output."""
+    rng = np.random.default_rng(seed)
+    numbers = np.arange(rows)
+    return pd.DataFrame({
+        'Title': np.char.add(np.array(CATEGORIES)[numbers % len(CATEGORIES)], numbers.astype(str)).astype(object),
+        'Price': rng.uniform(10, 500, rows).round(2) * 16000,
+        'Rating': rng.uniform(1, 5, rows).round(1),
+        'Colors': rng.integers(1, 9, rows),
+        'Size': np.array(SIZES, dtype=object)[numbers % len(SIZES)],
+        'Gender': np.array(GENDERS, dtype=object)[numbers % len(GENDERS)],
+        'Timestamp': '2025-05-07T09:29:40.569209',
+    })
+
+def _max_rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_case(case, rows, repeat):
+    df = cleaned_frame(rows)
+    frame_rss = _max_rss_mib()
+    timings = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'products.csv'
+        for _ in range(repeat):
+            start = time.perf_counter()
+            CASES[case](df, path)
+            timings.append(time.perf_counter() - start)
+        size = sum(p.stat().st_size for p in Path(directory).iterdir())
+    best = min(timings)
+    return {'case': case, 'rows': rows, 'seconds': round(best, 3), 'rows_per_second': round(rows / best),
+            'frame_rss_mib': round(frame_rss, 1), 'peak_rss_mib': round(_max_rss_mib(), 1),
+            'file_mib': round(size / 2**20, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--case', choices=sorted(CASES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.rows[0], args.repeat)))
+        return
+
+    print(f"{'case':<12} {'rows':>9} {'seconds':>8} {'rows/s':>10} {'frame RSS':>10} {'peak RSS':>9} {'file':>8}")
+    for rows in args.rows:
+        for case in CASES:
+            output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_csv', '--case', case,
+                                     '--rows', str(rows), '--repeat', str(args.repeat)],
+                                    check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{case:<12} {rows:>9} {result['seconds']:>8.3f} {result['rows_per_second']:>10} "
+                  f"{result['frame_rss_mib']:>8.1f}Mi {result['peak_rss_mib']:>7.1f}Mi {result['file_mib']:>6.1f}Mi")
+
+if __name__ == '__main__':
+    main()
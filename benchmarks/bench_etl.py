@@ -0,0 +1,183 @@
+"""End-to-end ETL benchmark against the local fixture server.
+
+Usage:
+    python -m benchmarks.bench_etl [--pages 50] [--products 20] [--latency 0.02] [--error-rate 0.05]
+                                   [--workers 4] [--compare REF] [--no-save]
+
+Scrapes the synthetic catalogue over real HTTP (see
+``benchmarks.fixture_server``), cleans it and runs every loader: CSV,
+Parquet (if pyarrow is installed), a local SQLite database through the
+bulk and ``to_sql`` paths, and Google Sheets against the fake Sheets
+endpoint (a full write, then an unchanged re-run).
+
+Results are saved to ``--results-dir/<commit>.json`` (``-dirty`` is added
+for uncommitted trees). ``--compare REF`` prints the change against a
+saved result; REF is a commit, a file name or a path.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+
+from benchmarks.fixture_server import FixtureServer
+from utils.extract import scrape_products
+from utils.http_client import HttpClient
+from utils.load import save_to_csv, save_to_google_sheets, save_to_parquet, save_to_postgresql
+from utils.metrics import RunMetrics
+from utils.transform import clean_data, clean_data_fast
+
+RESULTS_DIR = '.benchmarks'
+
+def git_revision():
+    """Short commit hash of the working tree, with ``-dirty`` if it has uncommitted changes."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                               text=True, check=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def run(args):
+    metrics = RunMetrics()
+    results = {}
+
+    def record(name, rows):
+        stage = metrics.stages[-1]
+        results[name] = {
+            'seconds': stage['wall_seconds'],
+            'cpu_seconds': stage['cpu_seconds'],
+            'rows': rows,
+            'rows_per_second': round(rows / stage['wall_seconds'], 1) if stage['wall_seconds'] else None,
+        }
+
+    server = FixtureServer(args.pages, args.products, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, sheets_latency=args.sheets_latency, seed=args.seed)
+    with server, tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        client = HttpClient(max_retries=10, backoff_factor=0.01, backoff_max=0.1, pool_maxsize=args.workers)
+
+        with metrics.stage('scrape') as stage:
+            products = scrape_products(server.url, max_pages=args.pages, workers=args.workers,
+                                       requests_per_second=0, client=client, metrics=metrics)
+        record('scrape', len(products))
+        results['scrape'].update({
+            'pages_per_second': round(args.pages / stage['wall_seconds'], 1),
+            'injected_errors': server.injected_errors,
+            'retries': client.stats.retries,
+            'page_fetch': metrics.latencies().get('page_fetch'),
+        })
+        if len(products) != args.pages * args.products:
+            raise RuntimeError(f"Scraped {len(products)} products, expected {args.pages * args.products}")
+
+        raw = pd.DataFrame(products)
+        with metrics.stage('clean_data'):
+            cleaned = clean_data(raw)
+        record('clean_data', len(raw))
+        with metrics.stage('clean_data_fast'):
+            clean_data_fast(raw)
+        record('clean_data_fast', len(raw))
+
+        loaders = [
+            ('load_csv', lambda: save_to_csv(cleaned, directory / 'products.csv')),
+            ('load_sqlite_upsert', lambda: save_to_postgresql(cleaned, f"sqlite:///{directory / 'bulk.db'}",
+                                                              mode='upsert')),
+            ('load_sqlite_to_sql', lambda: save_to_postgresql(cleaned, f"sqlite:///{directory / 'replace.db'}")),
+        ]
+        try:
+            import pyarrow  # noqa: F401
+            loaders.insert(1, ('load_parquet', lambda: save_to_parquet(cleaned, directory / 'parquet')))
+        except ImportError:
+            logging.getLogger(__name__).warning("pyarrow not installed; skipping the Parquet loader")
+
+        credentials = directory / 'credentials.json'
+        credentials.write_text('{}')
+        service = server.sheets_service()
+        for name in ('load_sheets', 'load_sheets_unchanged'):
+            loaders.append((name, lambda: save_to_google_sheets(cleaned, 'benchmark', str(credentials))))
+
+        with patch('utils.load._sheets_service', return_value=service):
+            for name, loader in loaders:
+                with metrics.stage(name):
+                    ok = loader()
+                if not ok:
+                    raise RuntimeError(f"{name} failed")
+                record(name, len(cleaned))
+
+    return {
+        'revision': git_revision(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'params': {name: value for name, value in vars(args).items()
+                   if name not in ('compare', 'no_save', 'results_dir')},
+        'results': results,
+        'peak_rss_bytes': metrics.report()['peak_rss_bytes'],
+    }
+
+def load_result(ref, results_dir):
+    path = Path(ref)
+    if not path.exists():
+        path = Path(results_dir) / (ref if ref.endswith('.json') else f'{ref}.json')
+    return json.loads(path.read_text())
+
+def print_results(report, baseline=None):
+    header = f"{'step':<22}{'seconds':>10}{'rows/s':>12}"
+    if baseline:
+        header += f"{'baseline s':>12}{'change':>9}"
+    print(header)
+    for name, result in report['results'].items():
+        line = f"{name:<22}{result['seconds']:>10.3f}{result['rows_per_second'] or 0:>12.0f}"
+        previous = (baseline or {}).get('results', {}).get(name)
+        if previous:
+            change = (result['seconds'] - previous['seconds']) / previous['seconds'] * 100
+            line += f"{previous['seconds']:>12.3f}{change:>+8.1f}%"
+        print(line)
+    scrape = report['results']['scrape']
+    if scrape.get('page_fetch'):
+        fetch = scrape['page_fetch']
+        print(f"page fetch p50/p90/p99: {fetch['p50']:.3f}/{fetch['p90']:.3f}/{fetch['p99']:.3f}s, "
+              f"{scrape['injected_errors']} injected errors, {scrape['retries']} retries")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--products', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.02, help="seconds added to every page request")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra random page latency, up to this many seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of page requests answered with 503")
+    parser.add_argument('--sheets-latency', type=float, default=0.05, help="seconds added to every Sheets call")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    parser.add_argument('--compare', metavar='REF', help="saved result to compare with")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    report = run(args)
+    baseline = load_result(args.compare, args.results_dir) if args.compare else None
+    if baseline:
+        print(f"{report['revision']} vs {baseline['revision']}")
+        if baseline['params'] != report['params']:
+            print(f"warning: baseline was run with different parameters: {baseline['params']}", file=sys.stderr)
+    print_results(report, baseline)
+
+    if not args.no_save:
+        path = Path(args.results_dir) / f"{report['revision']}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2) + '\n')
+        print(f"saved {path}")
+
+if __name__ == '__main__':
+    main()
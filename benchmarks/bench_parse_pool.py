@@ -0,0 +1,44 @@
+"""Measure how process-pool parsing in scrape_products scales across cores.
+
+Usage:
+    python -m benchmarks.bench_parse_pool [--pages 200] [--products 40] [--backend html.parser] [--workers 0 1 2 4 8]
+
+Pages come from an in-memory synthetic catalogue, so only parsing and
+the crawl bookkeeping are measured. ``0`` workers parses in-process.
+"""
+import argparse
+import logging
+import os
+import time
+
+from benchmarks.catalogue import InMemoryClient, catalogue
+from utils.extract import scrape_products
+
+BASE_URL = "https://fashion-studio.dicoding.dev"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--products', type=int, default=40)
+    parser.add_argument('--backend', default='html.parser')
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4, 8])
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    client = InMemoryClient.for_catalogue(BASE_URL, catalogue(args.pages, args.products))
+    fetch_threads = max(args.workers) * 2 or 2
+
+    print(f"{args.pages} pages x {args.products} products, backend={args.backend}, {os.cpu_count()} CPUs")
+    print(f"{'parse workers':>14}{'seconds':>10}{'pages/s':>10}{'speedup':>10}")
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        products = scrape_products(BASE_URL, max_pages=args.pages, workers=fetch_threads, requests_per_second=0,
+                                   client=client, parser_backend=args.backend, parse_workers=workers)
+        seconds = time.perf_counter() - start
+        assert len(products) == args.pages * args.products
+        baseline = baseline or seconds
+        print(f"{workers:>14}{seconds:>10.2f}{args.pages / seconds:>10.1f}{baseline / seconds:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Compare the HTML parser backends of utils.parsers on catalogue pages.
+
+Usage:
+    python -m benchmarks.bench_parsers [--pages 20] [--products 20] [--pages-dir DIR] [--repeat 3]
+
+``--pages-dir`` points at saved ``*.html`` catalogue pages; otherwise a
+synthetic catalogue is generated. Every backend must produce exactly the
+same products as the original five-scan html.parser implementation.
+"""
+import argparse
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from benchmarks.catalogue import catalogue
+from utils.parsers import available_backends, parse_catalogue_page
+
+BASE_URL = "https://fashion-studio.dicoding.dev"
+
+def legacy_parse_page(html_content):
+    """The pre-backend parser: html.parser soup and five find() scans per card."""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    products = []
+    for div in soup.find_all('div', class_='product-details'):
+        title_element = div.find('h3', class_='product-title')
+        if not title_element:
+            continue
+        price = None
+        price_container = div.find('div', class_='price-container')
+        if price_container:
+            price_span = price_container.find('span', class_='price')
+            if price_span:
+                price = price_span.text.strip().replace('$', '')
+        rating_text = div.find('p', string=lambda text: text and 'Rating:' in text)
+        colors_text = div.find('p', string=lambda text: text and 'Colors' in text)
+        size_text = div.find('p', string=lambda text: text and 'Size:' in text)
+        gender_text = div.find('p', string=lambda text: text and 'Gender:' in text)
+        products.append({
+            'Title': title_element.text.strip(),
+            'Price': price,
+            'Rating': rating_text.text.strip().split('⭐')[-1].strip().split('/')[0].strip() if rating_text else None,
+            'Colors': colors_text.text.strip().split()[0] if colors_text else None,
+            'Size': size_text.text.replace('Size:', '').strip() if size_text else None,
+            'Gender': gender_text.text.replace('Gender:', '').strip() if gender_text else None,
+        })
+    return products
+
+def load_pages(args):
+    if args.pages_dir:
+        return [path.read_text(encoding='utf-8') for path in sorted(Path(args.pages_dir).glob('*.html'))]
+    return catalogue(args.pages, args.products)
+
+def best_of(repeat, func, pages):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            func(html)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--products', type=int, default=20)
+    parser.add_argument('--pages-dir')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_pages(args)
+    expected = [legacy_parse_page(html) for html in pages]
+    cards = sum(len(products) for products in expected)
+
+    variants = [('legacy html.parser', legacy_parse_page)]
+    for backend in available_backends():
+        variants.append((backend, lambda html, b=backend: parse_catalogue_page(html, BASE_URL, b)[0]))
+        if backend in ('html.parser', 'bs4-lxml'):
+            variants.append((f"{backend} (full tree)",
+                             lambda html, b=backend: parse_catalogue_page(html, BASE_URL, b, strainer=False)[0]))
+
+    print(f"{len(pages)} pages, {cards} product cards, best of {args.repeat}")
+    print(f"{'backend':<26}{'seconds':>10}{'cards/s':>12}{'speedup':>10}  identical")
+    baseline = None
+    for name, func in variants:
+        identical = [func(html) for html in pages] == expected
+        seconds = best_of(args.repeat, func, pages)
+        baseline = baseline or seconds
+        print(f"{name:<26}{seconds:>10.3f}{cards / seconds:>12.0f}{baseline / seconds:>9.1f}x  {identical}")
+
+if __name__ == '__main__':
+    main()
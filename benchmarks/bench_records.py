@@ -0,0 +1,94 @@
+"""Compare per-product dicts with column buffers for collecting scraped products into a DataFrame.
+
+Usage:
+    python -m benchmarks.bench_records [--rows 1000000] [--pages 200] [--products 40]
+
+Part one builds ``--rows`` products from synthetic field values, either as
+timestamp-tagged dicts turned into ``pd.DataFrame(products)`` (the old path)
+or as ``PRODUCT_FIELDS`` tuples collected in ``ProductColumns``. It reports
+the time to build and convert and the tracemalloc peak of both steps.
+
+Part two crawls an in-memory catalogue of ``--pages`` x ``--products``
+end to end with ``scrape_products`` + ``pd.DataFrame`` and with
+``scrape_product_frame``.
+"""
+import argparse
+import logging
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.catalogue import GENDERS, SIZES, InMemoryClient, catalogue
+from utils.extract import scrape_product_frame, scrape_products
+from utils.parsers import PRODUCT_FIELDS, ProductColumns
+
+BASE_URL = "https://fashion-studio.dicoding.dev"
+
+def synthetic_rows(count):
+    return [(f"T-shirt {n}", f"{10 + n % 490}.{n % 100:02d}", f"{1 + n % 40 / 10:.1f}", str(1 + n % 8),
+             SIZES[n % len(SIZES)], GENDERS[n % len(GENDERS)]) for n in range(count)]
+
+def via_dicts(rows, timestamp):
+    products = []
+    for row in rows:
+        product = dict(zip(PRODUCT_FIELDS, row))
+        product['Timestamp'] = timestamp
+        products.append(product)
+    return products, lambda: pd.DataFrame(products)
+
+def via_columns(rows, timestamp):
+    columns = ProductColumns(timestamp)
+    for start in range(0, len(rows), 40):  # one page at a time, like the crawl
+        columns.extend(rows[start:start + 40])
+    return columns, columns.to_frame
+
+def measure(build, rows, timestamp):
+    start = time.perf_counter()
+    collected, convert = build(rows, timestamp)
+    built = time.perf_counter()
+    frame = convert()
+    converted = time.perf_counter()
+    del collected, convert, frame
+
+    tracemalloc.start()
+    collected, convert = build(rows, timestamp)
+    collected_bytes = tracemalloc.get_traced_memory()[0]
+    frame = convert()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return built - start, converted - built, collected_bytes, peak, frame
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--products', type=int, default=40)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    timestamp = datetime.now().isoformat()
+    rows = synthetic_rows(args.rows)
+
+    print(f"{args.rows} products")
+    print(f"{'path':<10}{'collect s':>10}{'to frame s':>12}{'collected MiB':>15}{'peak MiB':>10}")
+    frames = {}
+    for name, build in (('dicts', via_dicts), ('columns', via_columns)):
+        collect, convert, collected, peak, frames[name] = measure(build, rows, timestamp)
+        print(f"{name:<10}{collect:>10.3f}{convert:>12.3f}{collected / 2**20:>15.1f}{peak / 2**20:>10.1f}")
+    pd.testing.assert_frame_equal(frames['dicts'], frames['columns'])
+
+    client = InMemoryClient.for_catalogue(BASE_URL, catalogue(args.pages, args.products))
+    print(f"\ncrawl of {args.pages} pages x {args.products} products")
+    start = time.perf_counter()
+    old = pd.DataFrame(scrape_products(BASE_URL, max_pages=args.pages, requests_per_second=0, client=client))
+    old_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    new = scrape_product_frame(BASE_URL, max_pages=args.pages, requests_per_second=0, client=client)
+    new_seconds = time.perf_counter() - start
+    assert old.drop(columns='Timestamp').equals(new.drop(columns='Timestamp'))
+    print(f"scrape_products + DataFrame: {old_seconds:.2f}s, scrape_product_frame: {new_seconds:.2f}s")
+
+if __name__ == '__main__':
+    main()
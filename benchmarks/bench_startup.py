@@ -0,0 +1,147 @@
+"""Measure the pipeline's cold start: import time of main.py and time to its first page request.
+
+Usage:
+    python -m benchmarks.bench_startup [--repeat 5] [--top 15] [--compare REF] [--no-save]
+
+Part one runs ``python -X importtime -c "import main"`` in fresh
+interpreters. It reports the best total import time next to a bare
+``python -c pass`` start, the slowest top-level imports, and which heavy
+libraries (pandas, SQLAlchemy, the Google client, ...) were loaded.
+
+Part two starts ``main.main()`` in a fresh interpreter against the local
+fixture server (see ``benchmarks.fixture_server``). It measures the time from
+process start to the first catalogue request the server receives, then stops
+the process.
+
+Results are saved to ``--results-dir/startup-<commit>.json``;
+``--compare REF`` prints the change against a saved result.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.bench_etl import RESULTS_DIR, git_revision, load_result
+from benchmarks.fixture_server import FixtureServer
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ('pandas', 'numpy', 'sqlalchemy', 'googleapiclient', 'google.oauth2', 'bs4', 'pyarrow')
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+RUN_MAIN = "import sys, main; main.BASE_URL = sys.argv[1]; sys.exit(main.main(report_dir=sys.argv[2]))"
+
+def run_python(*args, **kwargs):
+    return subprocess.run([sys.executable, *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+                          **kwargs)
+
+def interpreter_start():
+    start = time.perf_counter()
+    run_python('-c', 'pass')
+    return time.perf_counter() - start
+
+def import_profile():
+    """(seconds to import main, [(module, cumulative seconds)] of its direct imports, all imported modules)."""
+    stderr = run_python('-X', 'importtime', '-c', 'import main').stderr
+    total, top_level, children, modules = None, [], [], []
+    # A module is reported after its imports, which are indented one level deeper
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match.group(2)) / 1e6, len(match.group(3)), match.group(4)
+        modules.append(name)
+        if depth == 3:
+            children.append((name, cumulative))
+        elif depth == 1:
+            if name == 'main':
+                total, top_level = cumulative, children
+            children = []
+    return total, top_level, modules
+
+def time_to_first_request(timeout):
+    with FixtureServer(pages=5, products_per_page=20) as server, tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, '-c', RUN_MAIN, server.url, directory], cwd=directory, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            if not server.first_request.wait(timeout):
+                raise RuntimeError(f"main made no request within {timeout}s")
+            return server.first_request_at - start
+        finally:
+            process.terminate()
+            process.wait()
+
+def run(args):
+    interpreter = min(interpreter_start() for _ in range(args.repeat))
+    profiles = [import_profile() for _ in range(args.repeat)]
+    total, top_level, modules = min(profiles, key=lambda profile: profile[0])
+    heavy = [name for name in HEAVY_MODULES if any(m == name or m.startswith(name + '.') for m in modules)]
+    first_requests = [time_to_first_request(args.timeout) for _ in range(args.repeat)]
+
+    return {
+        'revision': git_revision(),
+        'timestamp': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'params': {'repeat': args.repeat},
+        'interpreter_seconds': round(interpreter, 4),
+        'import_seconds': round(total, 4),
+        'slowest_imports': [(name, round(seconds, 4))
+                            for name, seconds in sorted(top_level, key=lambda item: -item[1])[:args.top]],
+        'heavy_modules_at_import': heavy,
+        'first_request_seconds': round(min(first_requests), 4),
+        'first_request_median_seconds': round(statistics.median(first_requests), 4),
+    }
+
+def print_results(report, baseline=None):
+    def line(label, key):
+        text = f"{label:<32}{report[key]:>8.3f}s"
+        if baseline and baseline.get(key):
+            change = (report[key] - baseline[key]) / baseline[key] * 100
+            text += f"  (baseline {baseline[key]:.3f}s, {change:+.1f}%)"
+        print(text)
+
+    line("python -c pass", 'interpreter_seconds')
+    line("import main", 'import_seconds')
+    line("time to first request (best)", 'first_request_seconds')
+    line("time to first request (median)", 'first_request_median_seconds')
+    print(f"heavy modules loaded by import main: {', '.join(report['heavy_modules_at_import']) or 'none'}")
+    print("slowest imports of main (cumulative):")
+    for name, seconds in report['slowest_imports']:
+        print(f"  {name:<30}{seconds:>8.3f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help="number of slowest imports to list")
+    parser.add_argument('--timeout', type=float, default=60.0, help="seconds to wait for the first request")
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    parser.add_argument('--compare', metavar='REF', help="saved result to compare with")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    report = run(args)
+    baseline = None
+    if args.compare:
+        ref = args.compare if Path(args.compare).exists() else f'startup-{args.compare}'
+        baseline = load_result(ref, args.results_dir)
+        print(f"{report['revision']} vs {baseline['revision']}")
+    print_results(report, baseline)
+
+    if not args.no_save:
+        path = Path(args.results_dir) / f"startup-{report['revision']}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2) + '\n')
+        print(f"saved {path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Compare clean_data with the vectorized clean_data_fast on a large scraped frame.
+
+Usage:
+    python -m benchmarks.bench_transform [--rows 1000000] [--seed 0]
+
+Rows look like scrape_products output (all values are strings) with a
+share of duplicates and placeholder values. Time is the best of
+``--repeat`` untraced runs; peak memory is the tracemalloc peak of a
+separate run; the result size is the deep memory usage of the output.
+"""
+import argparse
+import logging
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.catalogue import CATEGORIES, GENDERS, SIZES
+from utils.transform import clean_data, clean_data_fast
+
+def scraped_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    numbers = rng.integers(1, rows // 2 + 2, rows)  # roughly half the rows repeat another one
+    titles = np.char.add(np.char.add(np.array(CATEGORIES)[numbers % len(CATEGORIES)], ' '), numbers.astype(str))
+    prices = np.char.mod('%.2f', 10 + (numbers % 49000) / 100)
+    ratings = np.char.mod('%.1f', 1 + (numbers % 40) / 10)
+    df = pd.DataFrame({
+        'Title': titles.astype(object),
+        'Price': prices.astype(object),
+        'Rating': ratings.astype(object),
+        'Colors': (1 + numbers % 8).astype(str).astype(object),
+        'Size': np.array(SIZES, dtype=object)[numbers % len(SIZES)],
+        'Gender': np.array(GENDERS, dtype=object)[numbers % len(GENDERS)],
+        'Timestamp': '2025-05-07T09:29:40.569209',
+    })
+    dirty = numbers % 50
+    df.loc[dirty == 0, 'Title'] = 'Unknown Product'
+    df.loc[dirty == 1, 'Price'] = 'Price Unavailable'
+    df.loc[dirty == 2, 'Rating'] = 'Invalid Rating'
+    df.loc[dirty == 3, 'Rating'] = 'Not Rated'
+    df.loc[dirty == 4, 'Size'] = None
+    return df
+
+def measure(func, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, min(timings), peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    df = scraped_frame(args.rows, args.seed)
+    print(f"input: {len(df)} rows, {df.memory_usage(deep=True).sum() / 2**20:.1f} MiB")
+
+    results = {}
+    print(f"{'implementation':<18}{'seconds':>10}{'peak MiB':>10}{'result MiB':>12}{'rows out':>10}")
+    for name, func in (('clean_data', clean_data), ('clean_data_fast', clean_data_fast)):
+        result, seconds, peak = measure(func, df, args.repeat)
+        results[name] = result
+        print(f"{name:<18}{seconds:>10.2f}{peak / 2**20:>10.1f}"
+              f"{result.memory_usage(deep=True).sum() / 2**20:>12.1f}{len(result):>10}")
+
+    expected = results['clean_data']
+    fast = results['clean_data_fast'].astype(expected.dtypes.to_dict())
+    pd.testing.assert_frame_equal(fast, expected)
+    print("outputs match")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Synthetic fashion-studio catalogue pages for benchmarks.
+
+The markup mirrors https://fashion-studio.dicoding.dev: a grid of
+``collection-card`` blocks, each with a ``product-details`` div, and a
+pagination list whose next link points at ``/page{n}``. A deterministic
+share of the cards carries the placeholder values ``clean_data`` filters out.
+"""
+import random
+
+CATEGORIES = ['T-shirt', 'Hoodie', 'Pants', 'Outerwear', 'Jacket', 'Shirt', 'Dress', 'Skirt']
+SIZES = ['S', 'M', 'L', 'XL', 'XXL']
+GENDERS = ['Men', 'Women', 'Unisex']
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Fashion Studio</title>
+</head>
+<body>
+    <nav class="navbar"><a class="navbar-brand" href="/">Fashion Studio</a></nav>
+    <div class="container">
+        <h1 class="section-title">Our Collection</h1>
+        <div class="collection-grid" id="collectionList">
+{cards}
+        </div>
+        <ul class="pagination">
+{pagination}
+        </ul>
+    </div>
+</body>
+</html>
+"""
+
+CARD_TEMPLATE = """            <div class="collection-card">
+                <div style="position: relative;">
+                    <img src="https://picsum.photos/280/350?random={number}" class="collection-image" alt="{title}">
+                </div>
+                <div class="product-details">
+                    <h3 class="product-title">{title}</h3>
+                    {price}
+                    <p style="font-size: 14px; color: #777;">Rating: ⭐ {rating} / 5</p>
+                    <p style="font-size: 14px; color: #777;">{colors} Colors</p>
+                    <p style="font-size: 14px; color: #777;">Size: {size}</p>
+                    <p style="font-size: 14px; color: #777;">Gender: {gender}</p>
+                </div>
+            </div>"""
+
+def product_card(number, rng):
+    """Markup for one product card; roughly one in ten carries placeholder values."""
+    dirty = rng.random()
+    title = f"{rng.choice(CATEGORIES)} {number}" if dirty > 0.03 else "Unknown Product"
+    if dirty < 0.06:
+        price = '<p class="price">Price Unavailable</p>'
+    else:
+        price = f'<div class="price-container"><span class="price">${rng.uniform(10, 500):.2f}</span></div>'
+    if dirty < 0.08:
+        rating = rng.choice(['Invalid Rating', 'Not Rated'])
+    else:
+        rating = f"{rng.uniform(1, 5):.1f}"
+    return CARD_TEMPLATE.format(
+        number=number, title=title, price=price, rating=rating,
+        colors=rng.randint(1, 8), size=rng.choice(SIZES), gender=rng.choice(GENDERS),
+    )
+
+def catalogue_page(page, pages, products_per_page=20, seed=0):
+    """Full HTML of catalogue page ``page`` (1-based) out of ``pages``."""
+    rng = random.Random(seed * 1_000_003 + page)
+    first = (page - 1) * products_per_page + 1
+    cards = "\n".join(product_card(n, rng) for n in range(first, first + products_per_page))
+
+    items = []
+    if page > 1:
+        previous = "/" if page == 2 else f"/page{page - 1}"
+        items.append(f'            <li class="page-item previous"><a class="page-link" href="{previous}">Previous</a></li>')
+    for n in range(max(1, page - 2), min(pages, page + 2) + 1):
+        href = "/" if n == 1 else f"/page{n}"
+        active = " active" if n == page else ""
+        items.append(f'            <li class="page-item{active}"><a class="page-link" href="{href}">{n}</a></li>')
+    if page < pages:
+        items.append(f'            <li class="page-item next"><a class="page-link" href="/page{page + 1}">Next</a></li>')
+
+    return PAGE_TEMPLATE.format(cards=cards, pagination="\n".join(items))
+
+def catalogue(pages, products_per_page=20, seed=0):
+    """All pages of a synthetic catalogue, page 1 first."""
+    return [catalogue_page(page, pages, products_per_page, seed) for page in range(1, pages + 1)]
+
+class _Response:
+    def __init__(self, url, text):
+        self.url = url
+        self.text = text
+        self.content = (text or '').encode('utf-8')
+        self.status_code = 200 if text is not None else 404
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+class InMemoryClient:
+    """Stand-in for utils.http_client.HttpClient that serves pages from a dict without any network."""
+
+    def __init__(self, pages_by_url):
+        self.pages_by_url = pages_by_url
+
+    @classmethod
+    def for_catalogue(cls, base_url, pages):
+        base_url = base_url.rstrip('/')
+        urls = [base_url] + [f"{base_url}/page{n}" for n in range(2, len(pages) + 1)]
+        return cls(dict(zip(urls, pages)))
+
+    def get(self, url, headers=None, observer=None):
+        response = _Response(url, self.pages_by_url.get(url.rstrip('/')))
+        if observer is not None:
+            observer(url, response.status_code, 0.0)
+        return response
+
+    def stats_dict(self):
+        return {}
@@ -0,0 +1,194 @@
+"""Local HTTP server that serves the synthetic catalogue and a fake Google Sheets API.
+
+The catalogue is served under ``/`` and ``/page{n}`` like
+https://fashion-studio.dicoding.dev. Every catalogue request can be delayed
+(``latency`` plus up to ``jitter`` seconds) and a seeded share of them
+(``error_rate``) is answered with ``503`` and ``Retry-After: 0``.
+
+The Sheets part implements the three ``spreadsheets.values`` calls
+``save_to_google_sheets`` makes (get, batchUpdate, clear) on an in-memory
+grid per spreadsheet; use :meth:`FixtureServer.sheets_service` to get a
+googleapiclient service bound to it.
+"""
+import json
+import random
+import re
+import sys
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from benchmarks.catalogue import catalogue_page
+
+PAGE_PATH = re.compile(r'^/(?:page(\d+))?/?$')
+SHEETS_VALUES_PATH = re.compile(r'^/v4/spreadsheets/([^/]+)/values(?::batchUpdate|/([^/:]+)(?::(clear))?)$')
+
+def _row_number(a1):
+    return int(re.sub(r'^[A-Z]+', '', a1.split(':')[0]) or 1)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real site
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type='text/html; charset=utf-8', headers=None):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data), 'application/json; charset=utf-8')
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        page_match = PAGE_PATH.match(path)
+        if page_match:
+            self.server.fixture.serve_page(self, int(page_match.group(1) or 1))
+            return
+        sheets_match = SHEETS_VALUES_PATH.match(path)
+        if sheets_match and sheets_match.group(2):
+            self._send_json(200, self.server.fixture.sheet_values(sheets_match.group(1)))
+            return
+        self._send(404, 'Not Found')
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        match = SHEETS_VALUES_PATH.match(path)
+        if not match:
+            self._send(404, 'Not Found')
+            return
+        spreadsheet_id, range_name, clear = match.groups()
+        if range_name is None:
+            self._send_json(200, self.server.fixture.sheet_batch_update(spreadsheet_id, body))
+        elif clear:
+            self._send_json(200, self.server.fixture.sheet_clear(spreadsheet_id, unquote(range_name)))
+        else:
+            self._send(404, 'Not Found')
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # A client hanging up mid-response (e.g. a benchmark stopping its run) is not a server error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FixtureServer:
+    """Serve a ``pages`` x ``products_per_page`` catalogue on a local port from a background thread."""
+
+    def __init__(self, pages=50, products_per_page=20, latency=0.0, jitter=0.0, error_rate=0.0,
+                 sheets_latency=0.0, seed=0, host='127.0.0.1', port=0):
+        self.pages = pages
+        self.products_per_page = products_per_page
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.sheets_latency = sheets_latency
+        self.seed = seed
+        self.requests = 0
+        self.injected_errors = 0
+        # Set, with the perf_counter time in first_request_at, when the first catalogue page is requested
+        self.first_request = threading.Event()
+        self.first_request_at = None
+        self.sheets = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._page = lru_cache(maxsize=None)(self._render_page)
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.fixture = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _render_page(self, page):
+        return catalogue_page(page, self.pages, self.products_per_page, self.seed)
+
+    def serve_page(self, handler, page):
+        with self._lock:
+            self.requests += 1
+            if self.first_request_at is None:
+                self.first_request_at = time.perf_counter()
+                self.first_request.set()
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if fail:
+                self.injected_errors += 1
+        if delay:
+            time.sleep(delay)
+        if fail:
+            handler._send(503, 'Service Unavailable', headers={'Retry-After': '0'})
+        elif 1 <= page <= self.pages:
+            handler._send(200, self._page(page))
+        else:
+            handler._send(404, 'Not Found')
+
+    def _sheets_delay(self):
+        if self.sheets_latency:
+            time.sleep(self.sheets_latency)
+
+    def sheet_values(self, spreadsheet_id):
+        self._sheets_delay()
+        with self._lock:
+            return {'values': [list(row) for row in self.sheets.get(spreadsheet_id, [])]}
+
+    def sheet_batch_update(self, spreadsheet_id, body):
+        self._sheets_delay()
+        cells = 0
+        with self._lock:
+            grid = self.sheets.setdefault(spreadsheet_id, [])
+            for value_range in body.get('data', []):
+                start = _row_number(value_range['range']) - 1
+                for offset, row in enumerate(value_range['values']):
+                    while len(grid) <= start + offset:
+                        grid.append([])
+                    grid[start + offset] = list(row)
+                    cells += len(row)
+        return {'totalUpdatedCells': cells}
+
+    def sheet_clear(self, spreadsheet_id, range_name):
+        self._sheets_delay()
+        with self._lock:
+            del self.sheets.setdefault(spreadsheet_id, [])[_row_number(range_name) - 1:]
+        return {'clearedRange': range_name}
+
+    def sheets_service(self):
+        """A googleapiclient Sheets service that talks to this server instead of Google."""
+        import httplib2
+        from googleapiclient.discovery import build
+
+        return build('sheets', 'v4', http=httplib2.Http(), static_discovery=True,
+                     client_options={'api_endpoint': self.url + '/'})
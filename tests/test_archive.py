@@ -0,0 +1,72 @@
+import gzip
+
+import pytest
+
+from benchmarks.catalogue import InMemoryClient, catalogue
+from utils.archive import ArchiveClient, PageArchive
+from utils.extract import scrape_product_frame
+
+BASE_URL = 'http://test.com'
+
+
+def test_archive_appends_runs_and_reads_pages_back(tmp_path):
+    archive = PageArchive(tmp_path)
+    for run, version in (('2024-01-01T00:00:00', 'old'), ('2024-01-02T00:00:00', 'new')):
+        writer = archive.writer(run)
+        writer.append(f'{BASE_URL}', f'<p>{version} page 1</p>')
+        writer.append(f'{BASE_URL}/page2', f'<p>{version} page 2</p>')
+        writer.close()
+
+    assert archive.runs() == ['2024-01-01T00:00:00', '2024-01-02T00:00:00']
+    assert archive.get(f'{BASE_URL}/page2') == '<p>new page 2</p>'
+    assert archive.get(BASE_URL, run='2024-01-01T00:00:00') == '<p>old page 1</p>'
+    assert archive.get(f'{BASE_URL}/page3') is None
+
+def test_crawls_of_one_run_share_a_writer(tmp_path):
+    archive = PageArchive(tmp_path)
+    first, second = archive.writer('run'), archive.writer('run')
+    first.append('http://a.test', '<p>a</p>')
+    first.close()
+    second.append('http://b.test', '<p>b</p>')
+    second.close()
+
+    assert first is second
+    assert archive.get('http://a.test') == '<p>a</p>'
+    assert archive.get('http://b.test') == '<p>b</p>'
+
+def test_archive_ignores_truncated_index_line(tmp_path):
+    archive = PageArchive(tmp_path)
+    writer = archive.writer('run')
+    writer.append(BASE_URL, '<p>page</p>')
+    writer.close()
+    with open(tmp_path / 'index.jsonl', 'a') as f:
+        f.write('{"run": "run", "url": "http://test.com/pa')
+
+    assert list(archive.entries('run')) == [BASE_URL]
+
+def test_gzip_segment_is_a_readable_gzip_stream(tmp_path):
+    archive = PageArchive(tmp_path, compression='gzip')
+    writer = archive.writer('run')
+    writer.append(BASE_URL, 'first ')
+    writer.append(f'{BASE_URL}/page2', 'second')
+    writer.close()
+
+    assert gzip.decompress((tmp_path / writer.segment).read_bytes()) == b'first second'
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_replay_reproduces_archived_crawl(tmp_path, workers):
+    client = InMemoryClient.for_catalogue(BASE_URL, catalogue(pages=6, products_per_page=4))
+    archive = PageArchive(tmp_path)
+    crawled = scrape_product_frame(BASE_URL, max_pages=6, workers=workers, requests_per_second=0, client=client,
+                                   archive=archive)
+
+    replay = ArchiveClient(archive)
+    replayed = scrape_product_frame(BASE_URL, max_pages=6, requests_per_second=0, client=replay,
+                                    timestamp=replay.run)
+
+    assert replayed.equals(crawled)
+    assert replay.pages_served == 6
+
+def test_archive_client_requires_an_archived_run(tmp_path):
+    with pytest.raises(ValueError):
+        ArchiveClient(PageArchive(tmp_path))
@@ -0,0 +1,106 @@
+import os
+import time
+from unittest.mock import patch, Mock
+from utils.cache import ResponseCache, content_hash
+from utils.extract import fetch_page_content, scrape_products
+
+PAGE = """
+<html>
+    <body>
+        <div class="product-details"><h3 class="product-title">Cached Product</h3></div>
+    </body>
+</html>
+"""
+
+def _response(status_code, text="", headers=None):
+    response = Mock()
+    response.status_code = status_code
+    response.text = text
+    response.headers = headers or {}
+    return response
+
+# Test conditional requests
+def test_fetch_page_content_sends_validators_and_serves_304(tmp_path):
+    cache = ResponseCache(tmp_path)
+    client = Mock()
+    client.get.side_effect = [
+        _response(200, PAGE, {'ETag': '"abc"', 'Last-Modified': 'Wed, 07 May 2025 09:00:00 GMT'}),
+        _response(304),
+    ]
+
+    assert fetch_page_content("http://test.com", client=client, cache=cache) == PAGE
+    assert fetch_page_content("http://test.com", client=client, cache=cache) == PAGE
+
+    assert client.get.call_args_list[0].kwargs['headers'] is None
+    assert client.get.call_args_list[1].kwargs['headers'] == {
+        'If-None-Match': '"abc"',
+        'If-Modified-Since': 'Wed, 07 May 2025 09:00:00 GMT',
+    }
+
+def test_scrape_products_skips_parsing_unchanged_pages(tmp_path):
+    cache = ResponseCache(tmp_path)
+    client = Mock()
+    client.get.side_effect = [_response(200, PAGE, {'ETag': '"abc"'}), _response(304)]
+
+    first = scrape_products("http://test.com", client=client, cache=cache, requests_per_second=0)
+    with patch('utils.extract.parse_page') as mock_parse:
+        second = scrape_products("http://test.com", client=client, cache=cache, requests_per_second=0)
+
+    mock_parse.assert_not_called()
+    assert [p['Title'] for p in second] == [p['Title'] for p in first] == ["Cached Product"]
+
+def test_changed_body_drops_parsed_products(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.put("http://test.com", PAGE)
+    cache.store_parsed("http://test.com", content_hash(PAGE), [{'Title': 'Old'}], None)
+    assert cache.parsed("http://test.com", content_hash(PAGE)) == ([{'Title': 'Old'}], None)
+
+    cache.put("http://test.com", PAGE + "<!-- changed -->")
+    assert cache.parsed("http://test.com", content_hash(PAGE + "<!-- changed -->")) is None
+
+def test_crawl_reads_each_entry_once_and_scans_directory_once(tmp_path):
+    next_link = "<li class='page-item next'><a class='page-link' href='/page2'>Next</a></li></body>"
+    pages = {"http://test.com": PAGE.replace("</body>", next_link),
+             "http://test.com/page2": PAGE}
+    client = Mock()
+    client.get.side_effect = lambda url, headers=None, observer=None: _response(200, pages[url])
+    cache = ResponseCache(tmp_path)
+
+    with patch.object(cache, 'get', wraps=cache.get) as mock_get, \
+            patch.object(cache, '_evict', wraps=cache._evict) as mock_evict:
+        results = scrape_products("http://test.com", client=client, cache=cache, requests_per_second=0)
+
+    assert len(results) == 2
+    assert mock_get.call_count == 2
+    mock_evict.assert_called_once()
+
+def test_failed_parse_does_not_keep_entry_in_memory(tmp_path):
+    cache = ResponseCache(tmp_path)
+    client = Mock()
+    client.get.return_value = _response(200, PAGE)
+
+    with patch('utils.extract.parse_page', side_effect=ValueError("bad markup")):
+        scrape_products("http://test.com", client=client, cache=cache, requests_per_second=0)
+
+    assert cache._unparsed == {}
+
+# Test eviction
+def test_cache_evicts_oldest_entries_over_size_limit(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=1500)
+    for i in range(5):
+        cache.put(f"http://test.com/page{i}", "x" * 500)
+        os.utime(cache._path(f"http://test.com/page{i}"), (i, time.time() - 100 + i))
+
+    cache.put("http://test.com/page5", "x" * 500)
+
+    assert cache.get("http://test.com/page5") is not None
+    assert cache.get("http://test.com/page0") is None
+    assert sum(p.stat().st_size for p in tmp_path.glob('*.json')) <= 1500
+
+def test_cache_expires_old_entries(tmp_path):
+    cache = ResponseCache(tmp_path, max_age=60)
+    entry = cache.put("http://test.com", PAGE)
+    entry['stored_at'] = time.time() - 120
+    cache._write("http://test.com", entry)
+
+    assert cache.get("http://test.com") is None
@@ -0,0 +1,86 @@
+import pandas as pd
+from sqlalchemy import create_engine
+from utils.cdc import diff_snapshot, save_snapshot
+from utils.load import apply_changes_to_postgresql
+
+def _products(rows, timestamp='2024-01-01'):
+    return pd.DataFrame({
+        'Title': [title for title, _ in rows],
+        'Price': [price for _, price in rows],
+        'Timestamp': [timestamp] * len(rows),
+    })
+
+def test_first_run_treats_everything_as_inserts(tmp_path):
+    changes = diff_snapshot(_products([('A', 1.0), ('B', 2.0)]), tmp_path / "snapshot.csv")
+    assert changes.initial
+    assert changes.inserts['Title'].tolist() == ['A', 'B']
+    assert changes.updates.empty and changes.deletes.empty
+
+def test_diff_reports_inserts_updates_and_deletes(tmp_path):
+    snapshot = tmp_path / "snapshot.csv"
+    save_snapshot(diff_snapshot(_products([('A', 1.0), ('B', 2.0), ('C', 3.0)]), snapshot), snapshot)
+
+    changes = diff_snapshot(_products([('A', 1.0), ('B', 20.0), ('D', 4.0)], timestamp='2024-01-02'), snapshot)
+
+    assert not changes.initial
+    assert changes.inserts['Title'].tolist() == ['D']
+    assert changes.updates['Title'].tolist() == ['B']
+    assert changes.deletes['Title'].tolist() == ['C']
+    assert changes.unchanged == 1
+
+def test_timestamp_alone_is_not_a_change(tmp_path):
+    snapshot = tmp_path / "snapshot.csv"
+    save_snapshot(diff_snapshot(_products([('A', 1.0)]), snapshot), snapshot)
+
+    assert diff_snapshot(_products([('A', 1.0)], timestamp='2024-02-01'), snapshot).is_empty()
+
+def test_apply_changes_to_postgresql_writes_only_deltas(tmp_path):
+    snapshot = tmp_path / "snapshot.csv"
+    db_url = f"sqlite:///{tmp_path / 'products.db'}"
+
+    first = diff_snapshot(_products([('A', 1.0), ('B', 2.0), ('C', 3.0)]), snapshot)
+    assert apply_changes_to_postgresql(first, db_url)
+    save_snapshot(first, snapshot)
+
+    second = diff_snapshot(_products([('A', 1.0), ('B', 20.0), ('D', 4.0)], timestamp='2024-01-02'), snapshot)
+    assert apply_changes_to_postgresql(second, db_url)
+
+    stored = pd.read_sql('SELECT * FROM products ORDER BY "Title"', create_engine(db_url))
+    assert stored['Title'].tolist() == ['A', 'B', 'D']
+    assert stored['Price'].tolist() == [1.0, 20.0, 4.0]
+    # Unchanged rows keep the timestamp of the run that last wrote them
+    assert stored['Timestamp'].tolist() == ['2024-01-01', '2024-01-02', '2024-01-02']
+
+def test_changes_replace_table_that_lost_its_key(tmp_path):
+    from utils.load import PostgresBatchWriter
+
+    snapshot = tmp_path / "snapshot.csv"
+    db_url = f"sqlite:///{tmp_path / 'products.db'}"
+    first = diff_snapshot(_products([('A', 1.0), ('B', 2.0)]), snapshot)
+    assert apply_changes_to_postgresql(first, db_url)
+    save_snapshot(first, snapshot)
+
+    # A streaming run rewrites the table with to_sql, which drops the key
+    writer = PostgresBatchWriter(db_url)
+    assert writer.write(_products([('A', 1.0), ('B', 2.0), ('C', 3.0)]))
+
+    second = diff_snapshot(_products([('A', 1.0), ('B', 20.0)], timestamp='2024-01-02'), snapshot)
+    assert apply_changes_to_postgresql(second, db_url)
+    stored = pd.read_sql('SELECT * FROM products ORDER BY "Title"', create_engine(db_url))
+    assert stored['Title'].tolist() == ['A', 'B']
+    assert stored['Price'].tolist() == [1.0, 20.0]
+
+    third = diff_snapshot(_products([('A', 1.0), ('B', 30.0)], timestamp='2024-01-03'), snapshot)
+    assert apply_changes_to_postgresql(third, db_url)
+
+def test_stream_writer_discards_snapshot(tmp_path):
+    from utils.load import PostgresBatchWriter
+
+    snapshot = tmp_path / "snapshot.csv"
+    save_snapshot(diff_snapshot(_products([('A', 1.0)]), snapshot), snapshot)
+
+    writer = PostgresBatchWriter(f"sqlite:///{tmp_path / 'products.db'}", snapshot_file=snapshot)
+    assert writer.write(_products([('A', 1.0)]))
+
+    assert not snapshot.exists()
+    assert diff_snapshot(_products([('A', 1.0)]), snapshot).initial
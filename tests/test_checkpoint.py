@@ -0,0 +1,52 @@
+import os
+import time
+
+from utils.checkpoint import CrawlCheckpoint
+
+
+def test_resume_returns_completed_pages(tmp_path):
+    checkpoint = CrawlCheckpoint(tmp_path / 'crawl.jsonl')
+    checkpoint.start('http://test.com', '2024-01-01T00:00:00')
+    checkpoint.record_page('http://test.com', [{'Title': 'A'}], 'http://test.com/page2')
+    checkpoint.record_page('http://test.com/page2', [{'Title': 'B'}], 'http://test.com/page3')
+    checkpoint.close()
+
+    state = CrawlCheckpoint(tmp_path / 'crawl.jsonl').resume('http://test.com')
+    assert state.timestamp == '2024-01-01T00:00:00'
+    assert state.next_url == 'http://test.com/page3'
+    assert [p['Title'] for p in state.products] == ['A', 'B']
+
+def test_resume_drops_truncated_last_line(tmp_path):
+    path = tmp_path / 'crawl.jsonl'
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.start('http://test.com', 'ts')
+    checkpoint.record_page('http://test.com', [{'Title': 'A'}], 'http://test.com/page2')
+    checkpoint.close()
+    with open(path, 'a') as f:
+        f.write('{"url": "http://test.com/page2", "prod')
+
+    resumed = CrawlCheckpoint(path)
+    state = resumed.resume('http://test.com')
+    assert len(state.pages) == 1
+    resumed.record_page('http://test.com/page2', [{'Title': 'B'}], None)
+    resumed.close()
+
+    state = CrawlCheckpoint(path).resume('http://test.com')
+    assert [p['Title'] for p in state.products] == ['A', 'B']
+    assert state.next_url is None
+
+def test_resume_ignores_other_sites_and_stale_checkpoints(tmp_path):
+    path = tmp_path / 'crawl.jsonl'
+    checkpoint = CrawlCheckpoint(path, max_age=60)
+    checkpoint.start('http://test.com', 'ts')
+    checkpoint.close()
+
+    assert CrawlCheckpoint(path).resume('http://other.com') is None
+    os.utime(path, (time.time() - 120, time.time() - 120))
+    assert CrawlCheckpoint(path, max_age=60).resume('http://test.com') is None
+
+def test_complete_removes_checkpoint(tmp_path):
+    checkpoint = CrawlCheckpoint(tmp_path / 'crawl.jsonl')
+    checkpoint.start('http://test.com', 'ts')
+    checkpoint.complete()
+    assert not (tmp_path / 'crawl.jsonl').exists()
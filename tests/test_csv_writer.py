@@ -0,0 +1,60 @@
+import gzip
+import os
+
+import pandas as pd
+import pytest
+
+from utils.csv_writer import AtomicCsvWriter, csv_path
+
+
+def test_csv_path_normalises_suffix_and_compression(tmp_path):
+    assert csv_path(tmp_path / 'products') == (tmp_path / 'products.csv', None)
+    assert csv_path(tmp_path / 'products.csv.gz') == (tmp_path / 'products.csv.gz', 'gzip')
+    assert csv_path(tmp_path / 'products.csv', 'zstd') == (tmp_path / 'products.csv.zst', 'zstd')
+    with pytest.raises(ValueError):
+        csv_path(tmp_path / 'products.csv', 'bz2')
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    target = tmp_path / 'products.csv'
+    target.write_text('A\n1\n')
+
+    with pytest.raises(RuntimeError):
+        with AtomicCsvWriter(target) as writer:
+            writer.write(pd.DataFrame({'A': [2, 3]}))
+            raise RuntimeError("crash mid-write")
+
+    assert target.read_text() == 'A\n1\n'
+    assert list(tmp_path.iterdir()) == [target]
+
+def test_append_adds_rows_without_repeating_header(tmp_path):
+    target = tmp_path / 'history.csv.gz'
+    for value in (1, 2):
+        with AtomicCsvWriter(target, append=True) as writer:
+            writer.write(pd.DataFrame({'A': [value], 'B': ['x']}))
+
+    with gzip.open(target, 'rt') as f:
+        assert f.read() == 'A,B\n1,x\n2,x\n'
+
+def test_zstd_output_round_trips(tmp_path):
+    pytest.importorskip('zstandard')
+    df = pd.DataFrame({'A': range(1000), 'B': ['x'] * 1000})
+    with AtomicCsvWriter(tmp_path / 'products.csv', compression='zstd') as writer:
+        writer.write(df.iloc[:400])
+        writer.write(df.iloc[400:])
+
+    result = pd.read_csv(tmp_path / 'products.csv.zst', compression='zstd')
+    pd.testing.assert_frame_equal(result, df)
+
+def test_written_file_gets_default_or_previous_permissions(tmp_path):
+    umask = os.umask(0)
+    os.umask(umask)
+    target = tmp_path / 'products.csv'
+
+    with AtomicCsvWriter(target) as writer:
+        writer.write(pd.DataFrame({'A': [1]}))
+    assert target.stat().st_mode & 0o777 == 0o666 & ~umask
+
+    target.chmod(0o640)
+    with AtomicCsvWriter(target) as writer:
+        writer.write(pd.DataFrame({'A': [2]}))
+    assert target.stat().st_mode & 0o777 == 0o640
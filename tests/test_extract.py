@@ -4,24 +4,77 @@ from utils.extract import fetch_page_content, parse_product_details, scrape_prod
 from bs4 import BeautifulSoup
 from datetime import datetime
 import logging
+import requests
 
 # Test fetch_page_content
 def test_fetch_page_content_success():
-    with patch('requests.get') as mock_get:
+    with patch('requests.Session.get') as mock_get:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.text = "<html>Test content</html>"
+        mock_response.content = b"<html>Test content</html>"
         mock_get.return_value = mock_response
         
         result = fetch_page_content("http://test.com")
         assert result == "<html>Test content</html>"
 
 def test_fetch_page_content_failure():
-    with patch('requests.get') as mock_get:
+    with patch('requests.Session.get') as mock_get:
         mock_get.side_effect = Exception("Connection error")
         result = fetch_page_content("http://test.com")
         assert result is None
 
+def _response(status_code, text="", headers=None):
+    response = Mock()
+    response.status_code = status_code
+    response.text = text
+    response.content = text.encode()
+    response.headers = headers or {}
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(f"{status_code} Error")
+    return response
+
+def test_http_client_retries_transient_errors():
+    from utils.http_client import HttpClient
+
+    client = HttpClient(max_retries=3, backoff_factor=0)
+    with patch.object(client.session, 'get', side_effect=[
+        requests.exceptions.ConnectionError("reset"),
+        _response(503),
+        _response(200, "<html>ok</html>"),
+    ]):
+        result = fetch_page_content("http://test.com", client=client)
+
+    assert result == "<html>ok</html>"
+    stats = client.stats_dict()
+    assert stats['retries'] == 2
+    assert stats['requests'] == 3
+    assert stats['bytes_received'] == len("<html>ok</html>")
+
+def test_http_client_honours_retry_after():
+    from utils.http_client import HttpClient
+
+    client = HttpClient(max_retries=1, backoff_max=5)
+    with patch.object(client.session, 'get', side_effect=[
+        _response(429, headers={'Retry-After': '2'}),
+        _response(200, "ok"),
+    ]), patch('utils.http_client.time.sleep') as mock_sleep:
+        response = client.get("http://test.com")
+
+    assert response.status_code == 200
+    mock_sleep.assert_called_once_with(2.0)
+
+def test_http_client_gives_up_after_max_retries():
+    from utils.http_client import HttpClient
+
+    client = HttpClient(max_retries=2, backoff_factor=0)
+    with patch.object(client.session, 'get', return_value=_response(500)) as mock_get:
+        result = fetch_page_content("http://test.com", client=client)
+
+    assert result is None
+    assert mock_get.call_count == 3
+    assert client.stats_dict()['failures'] == 1
+
 # Test parse_product_details
 def test_parse_product_details_valid():
     html = """
@@ -101,4 +154,217 @@ def test_scrape_products_error_handling(caplog):
     with patch('utils.extract.fetch_page_content', return_value=None):
         results = scrape_products("http://test.com")
         assert len(results) == 0
-        assert "Failed to fetch content" in caplog.text
\ No newline at end of file
+        assert "Failed to fetch content" in caplog.text
+
+def _numbered_page(number, last_page):
+    next_link = f"<li class='page-item next'><a class='page-link' href='/page{number + 1}'>Next</a></li>" if number < last_page else ""
+    return f"""
+    <html>
+        <body>
+            <div class="product-details"><h3 class="product-title">Page {number}</h3></div>
+            {next_link}
+        </body>
+    </html>
+    """
+
+def test_scrape_products_concurrent_keeps_page_order():
+    pages = {"http://test.com": _numbered_page(1, 5)}
+    pages.update({f"http://test.com/page{n}": _numbered_page(n, 5) for n in range(2, 6)})
+
+    with patch('utils.extract.fetch_page_content', side_effect=lambda url, **kwargs: pages.get(url)) as mock_fetch:
+        results = scrape_products("http://test.com", max_pages=50, workers=4, requests_per_second=0)
+
+    assert [p['Title'] for p in results] == [f"Page {n}" for n in range(1, 6)]
+    assert len({p['Timestamp'] for p in results}) == 1
+    fetched = [call.args[0] for call in mock_fetch.call_args_list]
+    assert "http://test.com/page5" in fetched
+
+def test_scrape_products_concurrent_respects_max_pages():
+    pages = {"http://test.com": _numbered_page(1, 10)}
+    pages.update({f"http://test.com/page{n}": _numbered_page(n, 10) for n in range(2, 11)})
+
+    with patch('utils.extract.fetch_page_content', side_effect=lambda url, **kwargs: pages.get(url)) as mock_fetch:
+        results = scrape_products("http://test.com", max_pages=3, workers=4, requests_per_second=0)
+
+    assert [p['Title'] for p in results] == ["Page 1", "Page 2", "Page 3"]
+    assert mock_fetch.call_count == 3
+
+def test_host_rate_limiter_spaces_requests_per_host():
+    from utils.ratelimit import HostRateLimiter
+
+    limiter = HostRateLimiter(requests_per_second=20)
+    assert limiter.acquire("http://a.com/1") == 0
+    assert limiter.acquire("http://b.com/1") == 0
+    assert limiter.acquire("http://a.com/2") > 0
+
+def test_iter_product_batches_yields_one_batch_per_page():
+    from utils.extract import iter_product_batches
+
+    pages = {"http://test.com": _numbered_page(1, 3)}
+    pages.update({f"http://test.com/page{n}": _numbered_page(n, 3) for n in range(2, 4)})
+
+    with patch('utils.extract.fetch_page_content', side_effect=lambda url, **kwargs: pages.get(url)) as mock_fetch:
+        batches = iter_product_batches("http://test.com", requests_per_second=0)
+        first = next(batches)
+        assert [p['Title'] for p in first] == ["Page 1"]
+        assert mock_fetch.call_count == 1
+        rest = list(batches)
+
+    assert [[p['Title'] for p in batch] for batch in rest] == [["Page 2"], ["Page 3"]]
+    assert first[0]['Timestamp'] == rest[-1][0]['Timestamp']
+
+def test_scrape_products_parses_on_process_pool():
+    pages = {"http://test.com": _numbered_page(1, 4)}
+    pages.update({f"http://test.com/page{n}": _numbered_page(n, 4) for n in range(2, 5)})
+
+    with patch('utils.extract.fetch_page_content', side_effect=lambda url, **kwargs: pages.get(url)):
+        in_process = scrape_products("http://test.com", workers=3, requests_per_second=0)
+        pooled = scrape_products("http://test.com", workers=3, requests_per_second=0, parse_workers=2)
+
+    assert [p['Title'] for p in pooled] == [f"Page {n}" for n in range(1, 5)]
+    assert [{k: v for k, v in p.items() if k != 'Timestamp'} for p in pooled] == \
+           [{k: v for k, v in p.items() if k != 'Timestamp'} for p in in_process]
+
+def test_scrape_products_records_page_metrics():
+    from utils.metrics import RunMetrics
+
+    pages = {"http://test.com": _numbered_page(1, 3)}
+    pages.update({f"http://test.com/page{n}": _numbered_page(n, 3) for n in range(2, 4)})
+    metrics = RunMetrics()
+
+    with patch('utils.extract.fetch_page_content', side_effect=lambda url, **kwargs: pages.get(url)):
+        scrape_products("http://test.com", requests_per_second=0, metrics=metrics)
+
+    latencies = metrics.latencies()
+    assert latencies['page_fetch']['count'] == 3
+    assert latencies['page_parse']['count'] == 3
+    assert metrics.counters['pages_fetched'] == 3
+    assert metrics.counters['html_bytes'] == sum(len(page.encode()) for page in pages.values())
+
+def test_scrape_products_over_http_retries_injected_errors():
+    from benchmarks.fixture_server import FixtureServer
+    from utils.http_client import HttpClient
+
+    client = HttpClient(max_retries=10, backoff_factor=0.001, backoff_max=0.01)
+    with FixtureServer(pages=5, products_per_page=3, error_rate=0.3, seed=1) as server:
+        results = scrape_products(server.url, max_pages=10, workers=2, requests_per_second=0, client=client)
+
+    assert len(results) == 15
+    assert server.injected_errors > 0
+    assert client.stats.retries == server.injected_errors
+
+def test_concurrent_fetches_past_last_page_are_not_failures(caplog):
+    from benchmarks.fixture_server import FixtureServer
+    from utils.http_client import HttpClient
+
+    client = HttpClient()
+    with FixtureServer(pages=5, products_per_page=3) as server, caplog.at_level(logging.INFO):
+        results = scrape_products(server.url, max_pages=10, workers=4, requests_per_second=0, client=client)
+
+    assert len(results) == 15
+    assert client.stats.failures == 0
+    assert not [record for record in caplog.records if record.levelno >= logging.WARNING]
+
+def test_reused_client_and_limiter_report_each_crawl_separately():
+    from benchmarks.fixture_server import FixtureServer
+    from utils.http_client import HttpClient
+    from utils.metrics import RunMetrics
+    from utils.ratelimit import AdaptiveRateLimiter
+
+    client = HttpClient()
+    limiter = AdaptiveRateLimiter(requests_per_second=10, max_rps=100)
+    runs = []
+    with FixtureServer(pages=3, products_per_page=2) as server:
+        for _ in range(2):
+            metrics = RunMetrics()
+            scrape_products(server.url, max_pages=3, client=client, rate_limiter=limiter, metrics=metrics)
+            runs.append((metrics.counters['http_requests'], metrics.counters['http_bytes_received'],
+                         limiter.summary()[server.url.split('//')[1]]['requests']))
+
+    assert runs[0] == runs[1]
+    assert runs[0][0] == 3
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_scrape_products_resumes_from_checkpoint(tmp_path, workers):
+    from utils.checkpoint import CrawlCheckpoint
+
+    pages = {"http://test.com": _numbered_page(1, 5)}
+    pages.update({f"http://test.com/page{n}": _numbered_page(n, 5) for n in range(2, 6)})
+    flaky = dict(pages, **{"http://test.com/page4": None})
+    path = tmp_path / "crawl.jsonl"
+
+    with patch('utils.extract.fetch_page_content', side_effect=lambda url, **kwargs: flaky.get(url)):
+        first = scrape_products("http://test.com", workers=workers, requests_per_second=0,
+                                checkpoint=CrawlCheckpoint(path))
+    assert [p['Title'] for p in first] == ["Page 1", "Page 2", "Page 3"]
+    assert path.exists()
+
+    with patch('utils.extract.fetch_page_content', side_effect=lambda url, **kwargs: pages.get(url)) as mock_fetch:
+        second = scrape_products("http://test.com", workers=workers, requests_per_second=0,
+                                 checkpoint=CrawlCheckpoint(path))
+
+    assert [p['Title'] for p in second] == [f"Page {n}" for n in range(1, 6)]
+    assert {p['Timestamp'] for p in second} == {first[0]['Timestamp']}
+    fetched = [call.args[0] for call in mock_fetch.call_args_list]
+    assert fetched[0] == "http://test.com/page4"
+    assert "http://test.com" not in fetched
+    assert not path.exists()
+
+def test_adaptive_rate_limiter_backs_off_and_recovers():
+    from utils.ratelimit import AdaptiveRateLimiter
+
+    limiter = AdaptiveRateLimiter(requests_per_second=1.0, min_rps=0.5, max_rps=2.0, increase=0.25, decrease=0.5)
+    url = "http://a.com/page1"
+
+    limiter.observe(url, 200, 0.1)
+    assert limiter.rate("a.com") == 1.25
+    limiter.observe(url, 429, 0.1)
+    assert limiter.rate("a.com") == 0.625
+    limiter.observe(url, None, 10.0)
+    assert limiter.rate("a.com") == 0.5  # floor
+    for _ in range(10):
+        limiter.observe(url, 200, 0.1)
+    assert limiter.rate("a.com") == 2.0  # ceiling
+    limiter.observe(url, 200, 5.0)  # slow but successful
+    assert limiter.rate("a.com") == 1.5
+    assert limiter.rate("b.com") == 1.0
+
+def test_adaptive_rate_limiter_honours_retry_after():
+    from utils.ratelimit import AdaptiveRateLimiter
+
+    limiter = AdaptiveRateLimiter(requests_per_second=10, max_rps=10)
+    limiter.observe("http://a.com/1", 503, 0.1, retry_after=0.2)
+    assert limiter.acquire("http://a.com/2") >= 0.15
+    assert limiter.acquire("http://b.com/1") == 0
+
+def test_scrape_products_feeds_adaptive_rate_limiter():
+    from benchmarks.fixture_server import FixtureServer
+    from utils.http_client import HttpClient
+    from utils.ratelimit import AdaptiveRateLimiter
+
+    limiter = AdaptiveRateLimiter(requests_per_second=50, min_rps=1, max_rps=200, increase=10)
+    client = HttpClient(max_retries=10, backoff_factor=0.001, backoff_max=0.01)
+    with FixtureServer(pages=6, products_per_page=2, error_rate=0.2, seed=3) as server:
+        results = scrape_products(server.url, max_pages=10, workers=2, client=client, rate_limiter=limiter)
+
+    assert len(results) == 12
+    state, = limiter.summary().values()
+    assert state['requests'] == server.requests
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_scrape_product_frame_matches_scrape_products(tmp_path, workers):
+    import pandas as pd
+    from benchmarks.catalogue import InMemoryClient, catalogue
+    from utils.cache import ResponseCache
+    from utils.extract import scrape_product_frame
+
+    client = InMemoryClient.for_catalogue("http://test.com", catalogue(4, 5))
+    cache = ResponseCache(tmp_path / "cache")
+    products = scrape_products("http://test.com", workers=workers, requests_per_second=0, client=client, cache=cache)
+    # The second crawl reuses the parsed products the first one cached as dicts
+    frame = scrape_product_frame("http://test.com", workers=workers, requests_per_second=0, client=client,
+                                 cache=cache)
+
+    expected = pd.DataFrame(products).assign(Timestamp=frame['Timestamp'].iloc[0])
+    pd.testing.assert_frame_equal(frame, expected)
+    assert len(frame) == 20
@@ -4,6 +4,24 @@ from unittest.mock import patch, MagicMock
 from utils.load import save_to_csv, save_to_postgresql, save_to_google_sheets
 import os
 import logging
+import httplib2
+from googleapiclient.errors import HttpError
+from utils.load import _sheets_service
+from utils.engines import dispose_engines
+
+@pytest.fixture(autouse=True)
+def fresh_sheets_service():
+    # The Sheets client is cached per credentials file; start every test without one
+    _sheets_service.cache_clear()
+    yield
+    _sheets_service.cache_clear()
+
+@pytest.fixture(autouse=True)
+def fresh_engines():
+    # Engines are shared per URL; don't let a mocked one leak into other tests
+    dispose_engines()
+    yield
+    dispose_engines()
 
 # Test save_to_csv
 def test_save_to_csv_success(tmp_path):
@@ -50,22 +68,32 @@ def test_save_to_postgresql_failure(mock_create_engine, caplog):
     assert "Database error" in caplog.text
 
 # Test save_to_google_sheets
-@patch('utils.load.build')
-@patch('utils.load.Credentials.from_service_account_file')
+@patch('googleapiclient.discovery.build')
+@patch('google.oauth2.service_account.Credentials.from_service_account_file')
 def test_save_to_google_sheets_success(mock_creds, mock_build):
     mock_service = MagicMock()
     mock_build.return_value = mock_service
 
     # Simulasi update berhasil
-    mock_service.spreadsheets.return_value.values.return_value.update.return_value.execute.return_value = {'updatedCells': 10}
+    mock_values = mock_service.spreadsheets.return_value.values.return_value
+    mock_values.get.return_value.execute.return_value = {}
+    mock_values.batchUpdate.return_value.execute.return_value = {'totalUpdatedCells': 4}
 
     df = pd.DataFrame({'A': [1], 'B': ['x']})
     result = save_to_google_sheets(df, "spreadsheet_id")
 
     assert result is True
-    mock_service.spreadsheets.return_value.values.return_value.update.assert_called_once()
+    mock_values.batchUpdate.assert_called_once()
+
+@patch('googleapiclient.discovery.build')
+@patch('google.oauth2.service_account.Credentials.from_service_account_file')
+def test_sheets_service_requests_time_out(mock_creds, mock_build):
+    from utils.load import SHEETS_HTTP_TIMEOUT
 
-@patch('utils.load.Credentials.from_service_account_file')
+    _sheets_service('google-sheets-api.json')
+    assert mock_build.call_args.kwargs['http'].http.timeout == SHEETS_HTTP_TIMEOUT
+
+@patch('google.oauth2.service_account.Credentials.from_service_account_file')
 def test_save_to_google_sheets_failure(mock_creds, caplog):
     mock_creds.side_effect = Exception("Auth error")
     df = pd.DataFrame({'A': [1]})
@@ -78,3 +106,299 @@ def test_save_to_google_sheets_missing_creds(tmp_path, caplog):
     result = save_to_google_sheets(df, "spreadsheet_id", "nonexistent.json")
     assert result is False
     assert "Credentials file not found" in caplog.text
+
+# Test batch writers
+def test_csv_batch_writer_appends_batches(tmp_path):
+    from utils.load import CsvBatchWriter
+
+    writer = CsvBatchWriter(tmp_path / "stream.csv")
+    assert writer.write(pd.DataFrame({'A': [1, 2], 'B': ['x', 'y']}))
+    assert writer.write(pd.DataFrame({'A': [3], 'B': ['z']}))
+    assert writer.close() is True
+
+    result = pd.read_csv(tmp_path / "stream.csv")
+    assert result['A'].tolist() == [1, 2, 3]
+
+def test_write_batches_isolates_failing_writer(tmp_path):
+    from utils.load import CsvBatchWriter, PostgresBatchWriter, write_batches
+    from sqlalchemy import create_engine
+
+    db_url = f"sqlite:///{tmp_path / 'products.db'}"
+    failing = MagicMock()
+    failing.name = 'Broken'
+    failing.write.return_value = False
+    failing.close.return_value = True
+
+    batches = [pd.DataFrame({'A': [1], 'B': ['x']}), pd.DataFrame({'A': [2], 'B': ['y']})]
+    results = write_batches(batches, [CsvBatchWriter(tmp_path / "out.csv"), PostgresBatchWriter(db_url), failing])
+
+    assert results == {'CSV': True, 'PostgreSQL': True, 'Broken': False}
+    assert failing.write.call_count == 1
+    stored = pd.read_sql('SELECT * FROM products', create_engine(db_url))
+    assert stored['A'].tolist() == [1, 2]
+
+# Test bulk PostgreSQL modes (SQLite stands in for PostgreSQL)
+def _products(prices):
+    return pd.DataFrame({
+        'Title': [f"Product {i}" for i in range(len(prices))],
+        'Price': prices,
+        'Timestamp': ['2024-01-01'] * len(prices),
+    })
+
+def test_save_to_postgresql_upsert_merges_on_key(tmp_path):
+    from sqlalchemy import create_engine, inspect
+
+    db_url = f"sqlite:///{tmp_path / 'products.db'}"
+    assert save_to_postgresql(_products([1.0, 2.0, 3.0]), db_url, mode='upsert', chunksize=2)
+    assert save_to_postgresql(_products([1.0, 20.0]), db_url, mode='upsert')
+
+    engine = create_engine(db_url)
+    stored = pd.read_sql('SELECT * FROM products ORDER BY "Title"', engine)
+    assert stored['Price'].tolist() == [1.0, 20.0, 3.0]
+    assert inspect(engine).get_pk_constraint('products')['constrained_columns'] == ['Title']
+    assert 'ix_products_timestamp' in [ix['name'] for ix in inspect(engine).get_indexes('products')]
+
+def test_save_to_postgresql_swap_replaces_contents(tmp_path):
+    from sqlalchemy import create_engine, inspect
+
+    db_url = f"sqlite:///{tmp_path / 'products.db'}"
+    assert save_to_postgresql(_products([1.0, 2.0, 3.0]), db_url, mode='swap')
+    assert save_to_postgresql(_products([5.0]), db_url, mode='swap')
+
+    engine = create_engine(db_url)
+    stored = pd.read_sql('SELECT * FROM products', engine)
+    assert stored['Price'].tolist() == [5.0]
+    assert inspect(engine).get_table_names() == ['products']
+
+def test_bulk_load_uses_copy_on_psycopg2():
+    from utils.bulk_load import copy_rows, products_table
+
+    df = _products([1.0, 2.0, 3.0])
+    connection = MagicMock()
+    connection.dialect.driver = 'psycopg2'
+    connection.dialect.identifier_preparer.quote.side_effect = lambda name: f'"{name}"'
+    connection.dialect.identifier_preparer.format_table.return_value = '"staging"'
+    cursor = connection.connection.dbapi_connection.cursor.return_value.__enter__.return_value
+
+    written = copy_rows(connection, products_table(df, 'staging', temporary=True), df, chunksize=2)
+
+    assert written == 3
+    assert cursor.copy_expert.call_count == 2
+    sql, buffer = cursor.copy_expert.call_args_list[0].args
+    assert sql == 'COPY "staging" ("Title", "Price", "Timestamp") FROM STDIN WITH (FORMAT csv)'
+    assert buffer.getvalue().splitlines() == ['Product 0,1.0,2024-01-01', 'Product 1,2.0,2024-01-01']
+
+
+class FakeSheets:
+    """In-memory stand-in for the parts of the Sheets v4 values API used by the loaders."""
+
+    def __init__(self, failures=0):
+        self.grid = []
+        self.calls = []
+        self.failures = failures
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def _request(self, name, func, **kwargs):
+        self.calls.append((name, kwargs))
+        request = MagicMock()
+
+        def execute():
+            if self.failures:
+                self.failures -= 1
+                raise HttpError(httplib2.Response({'status': 429, 'retry-after': '0'}), b'quota exceeded')
+            return func()
+        request.execute.side_effect = execute
+        return request
+
+    def get(self, **kwargs):
+        return self._request('get', lambda: {'values': [list(row) for row in self.grid]}, **kwargs)
+
+    def batchUpdate(self, spreadsheetId, body):
+        def apply():
+            cells = 0
+            for value_range in body['data']:
+                start = int(value_range['range'][1:]) - 1
+                for offset, row in enumerate(value_range['values']):
+                    while len(self.grid) <= start + offset:
+                        self.grid.append([])
+                    self.grid[start + offset] = [cell for cell in row]
+                    cells += len(row)
+            return {'totalUpdatedCells': cells}
+        return self._request('batchUpdate', apply, body=body)
+
+    def clear(self, spreadsheetId, range):
+        def apply():
+            first = int(range.split(':')[0][1:]) - 1
+            del self.grid[first:]
+            return {}
+        return self._request('clear', apply, range=range)
+
+def _sheet_frame(prices):
+    return pd.DataFrame({'Title': [f"P{i}" for i in range(len(prices))], 'Price': prices})
+
+@patch('googleapiclient.discovery.build')
+@patch('google.oauth2.service_account.Credentials.from_service_account_file')
+def test_save_to_google_sheets_writes_only_changed_rows(mock_creds, mock_build):
+    fake = FakeSheets()
+    mock_build.return_value = fake
+
+    assert save_to_google_sheets(_sheet_frame([1.0, 2.0, 3.0, 4.0]), "spreadsheet_id")
+    fake.calls.clear()
+    assert save_to_google_sheets(_sheet_frame([1.0, 2.0, 30.0, 4.0]), "spreadsheet_id")
+
+    updates = [kwargs['body']['data'] for name, kwargs in fake.calls if name == 'batchUpdate']
+    assert updates == [[{'range': 'A4', 'values': [['P2', 30.0]]}]]
+    assert fake.grid[3] == ['P2', 30.0]
+    mock_build.assert_called_once()  # the service is built once and reused
+
+@patch('googleapiclient.discovery.build')
+@patch('google.oauth2.service_account.Credentials.from_service_account_file')
+def test_save_to_google_sheets_clears_surplus_rows(mock_creds, mock_build):
+    fake = FakeSheets()
+    mock_build.return_value = fake
+
+    assert save_to_google_sheets(_sheet_frame([1.0, 2.0, 3.0]), "spreadsheet_id")
+    assert save_to_google_sheets(_sheet_frame([1.0]), "spreadsheet_id")
+
+    assert fake.grid == [['Title', 'Price'], ['P0', 1.0]]
+    assert ('clear', {'range': 'A3:B4'}) in fake.calls
+
+@patch('googleapiclient.discovery.build')
+@patch('google.oauth2.service_account.Credentials.from_service_account_file')
+def test_save_to_google_sheets_retries_quota_errors(mock_creds, mock_build):
+    fake = FakeSheets(failures=2)
+    mock_build.return_value = fake
+
+    assert save_to_google_sheets(_sheet_frame([1.0]), "spreadsheet_id")
+    assert fake.grid == [['Title', 'Price'], ['P0', 1.0]]
+
+@patch('googleapiclient.discovery.build')
+@patch('google.oauth2.service_account.Credentials.from_service_account_file')
+def test_sheets_batch_writer_overwrites_in_place_and_clears_tail(mock_creds, mock_build, tmp_path):
+    from utils.load import GoogleSheetsBatchWriter
+
+    fake = FakeSheets()
+    fake.grid = [['Title', 'Price']] + [[f"Old{i}", i] for i in range(5)]
+    mock_build.return_value = fake
+    credentials = tmp_path / 'credentials.json'
+    credentials.write_text('{}')
+    writer = GoogleSheetsBatchWriter("spreadsheet_id", str(credentials))
+
+    assert writer.write(_sheet_frame([1.0, 2.0]))
+    # Readers still see a full sheet between batches
+    assert fake.grid == [['Title', 'Price'], ['P0', 1.0], ['P1', 2.0], ['Old2', 2], ['Old3', 3], ['Old4', 4]]
+    assert writer.write(_sheet_frame([3.0]))
+    assert writer.close()
+
+    assert fake.grid == [['Title', 'Price'], ['P0', 1.0], ['P1', 2.0], ['P0', 3.0]]
+    assert [name for name, kwargs in fake.calls] == ['batchUpdate', 'batchUpdate', 'clear']
+    assert fake.calls[-1] == ('clear', {'range': 'A5:Z'})
+
+def test_sheets_batch_requests_respect_cell_limit():
+    from utils.sheets import batch_requests, plan_updates
+
+    values = [['h1', 'h2']] + [[f"r{i}", i] for i in range(2500)]
+    ranges, clear_range = plan_updates([], values)
+    assert [len(r['values']) for r in ranges] == [1000, 1000, 501]
+    assert clear_range is None
+    batches = list(batch_requests(ranges, max_cells=2500))
+    assert [len(batch) for batch in batches] == [1, 1, 1]
+
+def test_plan_updates_ignores_volatile_columns():
+    from utils.sheets import plan_updates
+
+    header = ['Title', 'Price', 'Timestamp']
+    existing = [header] + [[f"P{i}", i, '2024-01-01'] for i in range(1000)]
+    values = [header] + [[f"P{i}", i, '2024-01-02'] for i in range(1000)]
+    values[500][1] = -1
+
+    ranges, clear_range = plan_updates(existing, values, ignore_columns=[2])
+    assert [(r['range'], len(r['values'])) for r in ranges] == [('A501', 1)]
+    assert clear_range is None
+    assert len(plan_updates(existing, values)[0][0]['values']) == 1000
+
+def test_save_to_parquet_partitions_by_run(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    from utils.load import save_to_parquet, read_parquet_snapshots
+    first = _products([10.0, 20.0]).assign(Size='M', Gender='Men', Timestamp='2024-01-01T00:00:00')
+    second = _products([11.0]).assign(Size='L', Gender='Women', Timestamp='2024-01-02T00:00:00')
+
+    assert save_to_parquet(first, tmp_path / 'parquet')
+    assert save_to_parquet(second, tmp_path / 'parquet')
+
+    partitions = sorted(p.name for p in (tmp_path / 'parquet').iterdir())
+    assert partitions == ['run=2024-01-01T00_00_00', 'run=2024-01-02T00_00_00']
+    assert not list((tmp_path / 'parquet').rglob('*.tmp'))
+
+    import pyarrow.parquet as pq
+    schema = pq.read_schema(tmp_path / 'parquet' / partitions[0] / 'part-0.parquet')
+    assert pa.types.is_dictionary(schema.field('Size').type)
+    assert pa.types.is_dictionary(schema.field('Gender').type)
+
+    latest = read_parquet_snapshots(tmp_path / 'parquet', columns=['Title', 'Price'], run='2024-01-02T00:00:00')
+    assert list(latest.columns) == ['Title', 'Price']
+    assert latest['Price'].tolist() == [11.0]
+    assert len(read_parquet_snapshots(tmp_path / 'parquet', columns=['Title'])) == 3
+
+def test_save_to_parquet_empty_dataframe(tmp_path):
+    pytest.importorskip('pyarrow')
+    from utils.load import save_to_parquet
+    assert not save_to_parquet(pd.DataFrame(), tmp_path / 'parquet')
+
+def test_save_to_csv_writes_in_chunks_and_appends(tmp_path):
+    df = pd.DataFrame({'A': range(5), 'B': list('abcde')})
+    filepath = tmp_path / "products.csv"
+
+    assert save_to_csv(df, filepath, chunksize=2)
+    assert save_to_csv(df, filepath, append=True, chunksize=2)
+
+    result = pd.read_csv(filepath)
+    assert result['A'].tolist() == list(range(5)) * 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['products.csv']
+
+# Test load_many (SQLite stands in for PostgreSQL)
+def test_load_many_writes_tables_in_one_transaction(tmp_path):
+    from utils.load import load_many
+    from sqlalchemy import create_engine
+
+    db_url = f"sqlite:///{tmp_path / 'products.db'}"
+    tables = [
+        ('products', pd.DataFrame({'A': [1], 'B': ['x']})),
+        ('runs', pd.DataFrame({'Run': ['2024-01-01']})),
+        ('products', pd.DataFrame({'A': [2], 'B': ['y']})),
+    ]
+    assert load_many(db_url, tables, if_exists='replace')
+
+    engine = create_engine(db_url)
+    assert pd.read_sql('SELECT * FROM products', engine)['A'].tolist() == [1, 2]
+    assert pd.read_sql('SELECT * FROM runs', engine)['Run'].tolist() == ['2024-01-01']
+
+def test_load_many_rolls_back_on_failure(tmp_path, caplog):
+    from utils.load import load_many
+    from sqlalchemy import create_engine
+
+    db_url = f"sqlite:///{tmp_path / 'products.db'}"
+    assert load_many(db_url, [('products', pd.DataFrame({'A': [0]}))])
+    tables = [
+        ('products', pd.DataFrame({'A': [1]})),
+        ('products', pd.DataFrame({'Missing': [2]})),  # no such column: the append fails
+    ]
+    assert not load_many(db_url, tables)
+    assert "rolled back" in caplog.text
+    assert pd.read_sql('SELECT * FROM products', create_engine(db_url))['A'].tolist() == [0]
+
+def test_importing_main_leaves_sink_clients_unloaded():
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    code = ("import sys, main; "
+            "print(sorted(m for m in ('pandas', 'sqlalchemy', 'googleapiclient', 'bs4') if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=Path(__file__).resolve().parent.parent,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
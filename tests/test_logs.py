@@ -0,0 +1,81 @@
+import json
+import logging
+
+import pytest
+
+from utils.logs import JsonFormatter, RepeatFilter, configure_logging, stop_logging
+from utils.parsers import parse_catalogue_page
+
+
+@pytest.fixture
+def queued_logging(tmp_path):
+    root = logging.getLogger()
+    level = root.level
+    log_file = tmp_path / 'etl.log'
+
+    def configure(**kwargs):
+        configure_logging(log_file=log_file, **kwargs)
+        return log_file
+
+    yield configure
+    stop_logging()
+    root.setLevel(level)
+
+def record(message, **extra):
+    record = logging.LogRecord('utils.test', logging.WARNING, __file__, 1, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+def test_json_formatter_includes_extra_fields_and_traceback():
+    try:
+        raise ValueError("bad card")
+    except ValueError:
+        import sys
+        entry = record("Parse failed", url='http://test.com/page2')
+        entry.exc_info = sys.exc_info()
+
+    data = json.loads(JsonFormatter().format(entry))
+    assert data['level'] == 'WARNING'
+    assert data['logger'] == 'utils.test'
+    assert data['message'] == 'Parse failed'
+    assert data['url'] == 'http://test.com/page2'
+    assert 'ValueError: bad card' in data['exception']
+
+def test_repeat_filter_limits_tagged_records_per_window():
+    repeat = RepeatFilter(limit=2, window=60)
+    passed = [repeat.filter(record(f"card {n}", aggregate='parse')) for n in range(5)]
+
+    assert passed == [True, True, False, False, False]
+    assert repeat.filter(record("untagged"))
+    assert repeat.suppressed['parse'] == 3
+    assert repeat.flush() == {'parse': 3}
+
+def test_repeat_filter_reports_suppressed_count_in_next_window():
+    repeat = RepeatFilter(limit=1, window=0.0)
+    assert repeat.filter(record("first", aggregate='parse'))
+    repeat.window = 60
+    repeat.filter(record("second", aggregate='parse'))
+    repeat.window = 0.0
+    next_window = record("third", aggregate='parse')
+    assert repeat.filter(next_window)
+    assert next_window.suppressed == 1
+
+def test_configure_logging_writes_json_lines_through_queue(queued_logging):
+    log_file = queued_logging(json_format=True)
+    logging.getLogger('utils.test').info("Scraping page 1...", extra={'page': 1})
+    stop_logging()
+
+    lines = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert lines == [{**lines[0], 'level': 'INFO', 'logger': 'utils.test', 'message': "Scraping page 1...",
+                      'page': 1}]
+
+def test_malformed_page_parse_errors_are_aggregated(queued_logging):
+    log_file = queued_logging(json_format=True, repeat_limit=3)
+    html = '<div class="product-details"><p>no title</p></div>' * 50
+    products, _ = parse_catalogue_page(html, 'http://test.com', backend='html.parser')
+    assert products == []
+    stop_logging()
+
+    messages = [json.loads(line)['message'] for line in log_file.read_text().splitlines()]
+    assert sum(message.startswith("Error parsing product details") for message in messages) == 3
+    assert messages[-1] == "Suppressed repeated log messages: product_parse_error: 47"
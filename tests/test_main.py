@@ -0,0 +1,142 @@
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pandas as pd
+import pytest
+
+import main
+from benchmarks.fixture_server import FixtureServer
+from utils.load import read_parquet_snapshots
+from utils.metrics import RunMetrics
+from utils.sources import SOURCE_KEY_COLUMNS, Source
+
+LOADERS = ('save_to_csv', 'save_to_parquet', 'apply_changes_to_postgresql', 'save_to_google_sheets')
+
+
+class FixtureResources(main.PipelineResources):
+    """Pipeline resources that crawl the fixture server as fast as it answers."""
+
+    def crawl_options(self):
+        return {**super().crawl_options(), 'rate_limiter': None, 'requests_per_second': 0}
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Snapshots, checkpoints, the cache and the page archive live under relative paths
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def server(monkeypatch):
+    with FixtureServer(pages=3, products_per_page=10) as server:
+        monkeypatch.setattr(main, 'BASE_URL', server.url)
+        yield server
+
+@pytest.fixture
+def sinks(monkeypatch):
+    loaders = {name: Mock(return_value=True) for name in LOADERS}
+    for name, loader in loaders.items():
+        monkeypatch.setattr(f'utils.load.{name}', loader)
+    return loaders
+
+def run(resources, optional_sinks=main.DEFAULT_OPTIONAL_SINKS, sources=None):
+    with patch('main.write_quarantine'):
+        return main._run(RunMetrics(), optional_sinks, resources, sources)
+
+def load_counts(sinks):
+    return {name: loader.call_count for name, loader in sinks.items()}
+
+def test_run_loads_changes_and_skips_unchanged_catalogue(server, sinks):
+    resources = FixtureResources()
+
+    assert run(resources) == 0
+    assert load_counts(sinks) == dict.fromkeys(LOADERS, 1)
+    changes = sinks['apply_changes_to_postgresql'].call_args.args[0]
+    assert len(changes.inserts) == len(sinks['save_to_csv'].call_args.args[0])
+    assert Path(main.SNAPSHOT_FILE).exists()
+
+    assert run(resources) == 0
+    assert load_counts(sinks) == dict.fromkeys(LOADERS, 1)
+
+def test_snapshot_is_kept_until_every_sink_succeeded(server, sinks):
+    resources = FixtureResources()
+    sinks['save_to_parquet'].return_value = False
+
+    # Parquet is optional: the run succeeds, but its changes must be offered again
+    assert run(resources) == 0
+    assert not Path(main.SNAPSHOT_FILE).exists()
+
+    sinks['save_to_parquet'].return_value = True
+    assert run(resources) == 0
+    assert load_counts(sinks) == dict.fromkeys(LOADERS, 2)
+    assert Path(main.SNAPSHOT_FILE).exists()
+
+@pytest.mark.parametrize('optional_sinks, exit_status', [
+    (main.DEFAULT_OPTIONAL_SINKS, 1),
+    (main.DEFAULT_OPTIONAL_SINKS | {'PostgreSQL'}, 0),
+])
+def test_failed_sink_fails_run_unless_optional(server, sinks, optional_sinks, exit_status):
+    sinks['apply_changes_to_postgresql'].return_value = False
+
+    assert run(FixtureResources(), optional_sinks) == exit_status
+    assert not Path(main.SNAPSHOT_FILE).exists()
+
+def test_replay_loads_archived_run_without_crawling(server, sinks):
+    assert run(FixtureResources()) == 0
+    crawled = sinks['save_to_csv'].call_args.args[0]
+    Path(main.SNAPSHOT_FILE).unlink()
+    requests = server.requests
+
+    assert run(main.ReplayResources()) == 0
+
+    assert server.requests == requests
+    replayed = sinks['save_to_csv'].call_args.args[0]
+    assert replayed.equals(crawled)
+
+def test_run_reports_started_in_same_second_are_kept_apart(tmp_path):
+    for microsecond in (1, 2):
+        metrics = RunMetrics()
+        metrics.started = datetime(2024, 1, 1, 12, 0, 0, microsecond)
+        main.write_run_report(metrics, 0, tmp_path / 'reports')
+
+    reports = sorted(path.name for path in (tmp_path / 'reports').iterdir())
+    assert reports == ['run-2024-01-01T12_00_00.000001.json', 'run-2024-01-01T12_00_00.000002.json']
+
+def test_sources_run_is_keyed_by_source(server, sinks):
+    sources = [Source(name, server.url, requests_per_second=0) for name in ('studio', 'mirror')]
+
+    assert run(FixtureResources(), sources=sources) == 0
+
+    loaded = sinks['save_to_csv'].call_args.args[0]
+    assert loaded['Source'].value_counts().to_dict() == {'studio': len(loaded) // 2, 'mirror': len(loaded) // 2}
+    assert sinks['apply_changes_to_postgresql'].call_args.kwargs['key_columns'] == SOURCE_KEY_COLUMNS
+    assert Path(main.SOURCES_SNAPSHOT_FILE).exists()
+    assert not Path(main.SNAPSHOT_FILE).exists()
+
+def test_source_checkpoint_stays_in_state_directory():
+    options = main.PipelineResources().source_options(Source('../../../studio', 'http://studio.test'))
+
+    checkpoint = Path(options['checkpoint'].path).resolve()
+    assert checkpoint.parent == Path(main.SOURCE_CHECKPOINT_FILE).parent.resolve()
+
+def test_single_and_sources_runs_keep_separate_outputs(server, monkeypatch):
+    # CSV and Parquet are written for real; the database and the sheet are not
+    for name in ('apply_changes_to_postgresql', 'save_to_google_sheets'):
+        monkeypatch.setattr(f'utils.load.{name}', Mock(return_value=True))
+    sources = [Source(name, server.url, requests_per_second=0) for name in ('studio', 'mirror')]
+    resources = FixtureResources()
+
+    assert run(resources) == 0
+    assert run(resources, sources=sources) == 0
+
+    single = pd.read_csv(main.CSV_FILE)
+    combined = pd.read_csv(main.SOURCES_CSV_FILE)
+    assert 'Source' not in single.columns
+    assert combined['Source'].value_counts().to_dict() == {'studio': len(single), 'mirror': len(single)}
+
+    history = read_parquet_snapshots(main.PARQUET_DIR)
+    assert 'Source' not in history.columns
+    assert len(history) == len(single)
+    sources_history = read_parquet_snapshots(main.SOURCES_PARQUET_DIR)
+    assert sources_history['Source'].value_counts().to_dict() == {'studio': len(single), 'mirror': len(single)}
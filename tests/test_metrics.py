@@ -0,0 +1,76 @@
+import json
+import os
+from unittest.mock import Mock, patch
+
+import pytest
+
+from utils.metrics import RunMetrics, peak_rss_bytes, percentile
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 90) == 7
+    assert percentile([], 50) is None
+
+def test_stage_records_time_and_rows():
+    metrics = RunMetrics()
+    with metrics.stage('transform', rows_in=10) as stage:
+        sum(range(10000))
+        stage['rows_out'] = 8
+
+    record, = metrics.stages
+    assert record['stage'] == 'transform'
+    assert (record['rows_in'], record['rows_out']) == (10, 8)
+    assert record['wall_seconds'] >= 0 and record['cpu_seconds'] >= 0
+    assert 'traced_peak_bytes' not in record
+
+def test_stage_is_recorded_when_it_fails():
+    metrics = RunMetrics(trace_memory=True)
+    try:
+        with metrics.stage('load'):
+            data = [0] * 100_000
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert metrics.stages[0]['stage'] == 'load'
+    assert metrics.stages[0]['traced_peak_bytes'] >= 800_000
+
+def test_reports_are_written_as_json_and_prometheus(tmp_path):
+    metrics = RunMetrics()
+    with metrics.stage('extract') as stage:
+        stage['rows_out'] = 3
+    for seconds in (0.1, 0.2, 0.3):
+        metrics.observe('page_fetch', seconds)
+    metrics.count('http_bytes_received', 1024)
+    metrics.add_stage('load:CSV', 0.5, ok=True)
+    metrics.status = 'success'
+
+    report = json.loads(metrics.write_json(tmp_path / 'run.json').read_text())
+    assert report['status'] == 'success'
+    assert report['latencies']['page_fetch'] == {'count': 3, 'total_seconds': 0.6, 'p50': 0.2,
+                                                 'p90': 0.3, 'p99': 0.3, 'max': 0.3}
+    assert [stage['stage'] for stage in report['stages']] == ['extract', 'load:CSV']
+
+    text = metrics.write_prometheus(tmp_path / 'etl.prom').read_text()
+    assert 'etl_run_success 1' in text
+    assert 'etl_stage_rows_out{stage="extract"} 3' in text
+    assert 'etl_latency_seconds{series="page_fetch",quantile="0.5"} 0.2' in text
+    assert 'etl_run_counter{name="http_bytes_received"} 1024' in text
+    assert list(tmp_path.iterdir()) and not list(tmp_path.glob('.*'))
+
+def test_reports_get_default_file_permissions(tmp_path):
+    umask = os.umask(0)
+    os.umask(umask)
+    metrics = RunMetrics()
+
+    assert metrics.write_prometheus(tmp_path / 'etl.prom').stat().st_mode & 0o777 == 0o666 & ~umask
+    assert metrics.write_json(tmp_path / 'run.json').stat().st_mode & 0o777 == 0o666 & ~umask
+
+@pytest.mark.parametrize('platform, expected', [('darwin', 200 * 2**20), ('linux', 200 * 2**30)])
+def test_peak_rss_units_follow_platform(platform, expected):
+    usage = Mock(ru_maxrss=200 * 2**20)
+    with patch('utils.metrics.sys.platform', platform), \
+            patch('utils.metrics.resource.getrusage', return_value=usage):
+        assert peak_rss_bytes() == expected
@@ -0,0 +1,92 @@
+import pytest
+from utils.parsers import available_backends, parse_catalogue_page
+
+PAGE = """
+<html>
+    <body>
+        <div class="collection-card">
+            <div class="product-details">
+                <h3 class="product-title">Test Product</h3>
+                <div class="price-container"><span class="price">$100.00</span></div>
+                <p>Rating: ⭐ 4.5 / 5</p>
+                <p>3 Colors</p>
+                <p>Size: M</p>
+                <p>Gender: Women</p>
+            </div>
+        </div>
+        <div class="collection-card">
+            <div class="product-details">
+                <h3 class="product-title">Unknown Product</h3>
+                <p class="price">Price Unavailable</p>
+                <p>Rating: <b>⭐ Invalid Rating</b> / 5</p>
+                <p><span>5 Colors</span></p>
+                <p></p>
+                <p>Gender: Men</p>
+            </div>
+        </div>
+        <div class="product-details"><p>No title here</p></div>
+        <ul class="pagination">
+            <li class="page-item"><a class="page-link" href="/page2">2</a></li>
+            <li class="page-item next"><a class="page-link" href="/page2">Next</a></li>
+        </ul>
+    </body>
+</html>
+"""
+
+EXPECTED = [
+    {'Title': 'Test Product', 'Price': '100.00', 'Rating': '4.5', 'Colors': '3', 'Size': 'M', 'Gender': 'Women'},
+    {'Title': 'Unknown Product', 'Price': None, 'Rating': None, 'Colors': '5', 'Size': None, 'Gender': 'Men'},
+]
+
+@pytest.mark.parametrize('backend', available_backends())
+@pytest.mark.parametrize('strainer', [True, False])
+def test_backends_produce_identical_products(backend, strainer):
+    products, next_url = parse_catalogue_page(PAGE, "http://test.com", backend=backend, strainer=strainer)
+    assert products == EXPECTED
+    assert next_url == "http://test.com/page2"
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_backends_detect_last_page(backend):
+    html = "<div class='product-details'><h3 class='product-title'>Only</h3></div>"
+    products, next_url = parse_catalogue_page(html, "http://test.com", backend=backend)
+    assert [p['Title'] for p in products] == ['Only']
+    assert next_url is None
+
+def test_auto_backend_prefers_fastest_available():
+    assert available_backends()[-1] == 'html.parser'
+    products, _ = parse_catalogue_page(PAGE, "http://test.com", backend='auto')
+    assert products == EXPECTED
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        parse_catalogue_page(PAGE, "http://test.com", backend='regex')
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_backends_parse_rows(backend):
+    from utils.parsers import PRODUCT_FIELDS
+
+    rows, next_url = parse_catalogue_page(PAGE, "http://test.com", backend=backend, as_rows=True)
+    assert rows == [tuple(product[field] for field in PRODUCT_FIELDS) for product in EXPECTED]
+    assert next_url == "http://test.com/page2"
+
+def test_product_columns_match_frame_of_dicts():
+    import pandas as pd
+    from utils.parsers import ProductColumns, products_to_rows
+
+    columns = ProductColumns(timestamp='2024-01-01T00:00:00')
+    columns.extend(products_to_rows(EXPECTED))
+    columns.extend([])
+    expected = pd.DataFrame([dict(product, Timestamp='2024-01-01T00:00:00') for product in EXPECTED])
+    pd.testing.assert_frame_equal(columns.to_frame(), expected)
+
+def test_product_columns_to_arrow():
+    pa = pytest.importorskip('pyarrow')
+    from utils.parsers import ProductColumns, products_to_rows
+
+    columns = ProductColumns(timestamp='2024-01-01T00:00:00')
+    columns.extend(products_to_rows(EXPECTED))
+    table = columns.to_arrow()
+    assert table.num_rows == 2
+    assert pa.types.is_dictionary(table.schema.field('Size').type)
+    assert table.column('Timestamp').to_pylist() == ['2024-01-01T00:00:00'] * 2
+    assert table.column('Title').to_pylist() == ['Test Product', 'Unknown Product']
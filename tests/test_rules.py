@@ -0,0 +1,100 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.exchange_rates import ExchangeRates
+from utils.rules import DEFAULT_RULES, REJECTED_BY_COLUMN, RuleSet, ValidationReport
+from utils.transform import clean_data, clean_data_fast
+
+
+def sample():
+    return pd.DataFrame({
+        'Title': ['Good', 'Unknown Product', 'Another', None, 'Broken'],
+        'Price': ['10.00', '5.00', '$20.00', 'Price Unavailable', '12 XYZ'],
+        'Rating': ['4.5 / 5', 'Invalid Rating', '3.8 / 5', '4.0 / 5', '4.1 / 5'],
+        'Colors': ['3 Colors', '2 Colors', '1 Color', '1 Color', '2 Colors'],
+        'Size': ['M', 'L', 'XL', 'S', 'M'],
+        'Gender': ['Men', 'Women', 'Unisex', 'Unisex', 'Men'],
+        'Timestamp': ['2024-01-01'] * 5,
+    })
+
+def test_evaluate_counts_every_broken_rule_and_quarantines_by_first():
+    report = ValidationReport(keep_rejected=True)
+    valid = RuleSet().evaluate(sample(), report)
+
+    assert valid.tolist() == [True, False, True, False, True]
+    assert report.counts['placeholder_title'] == 1
+    assert report.counts['invalid_rating'] == 1
+    assert report.counts['price_unavailable'] == 1
+    assert report.counts['missing_value'] == 1
+    rejected = report.rejected
+    assert rejected[REJECTED_BY_COLUMN].tolist() == ['placeholder_title', 'price_unavailable']
+
+def test_price_in_idr_handles_symbols_codes_and_separators():
+    rules = RuleSet(rates=ExchangeRates(defaults={'IDR': 1.0, 'USD': 16000.0, 'EUR': 17000.0}))
+    prices = rules.price_in_idr(pd.Series(['100', '$1,299.00', '12.5 usd', 'Rp 5000', '€2', '3 XYZ']))
+
+    assert prices.iloc[:5].tolist() == [1_600_000.0, 20_784_000.0, 200_000.0, 5000.0, 34_000.0]
+    assert np.isnan(prices.iloc[5])
+
+def test_clean_data_reports_unparseable_prices():
+    report = ValidationReport(keep_rejected=True)
+    cleaned = clean_data(sample(), report=report)
+
+    assert cleaned['Title'].tolist() == ['Good', 'Another']
+    assert cleaned['Price'].tolist() == [160000.0, 320000.0]
+    assert report.counts['unparseable_price'] == 1
+    assert 'Broken' in report.rejected['Title'].tolist()
+
+def test_clean_data_fast_matches_clean_data_with_report():
+    exact, fast = ValidationReport(), ValidationReport()
+    expected = clean_data(sample(), report=exact)
+    result = clean_data_fast(sample(), report=fast)
+
+    pd.testing.assert_frame_equal(result.astype(expected.dtypes), expected)
+    assert exact.counts == fast.counts
+
+def test_custom_rule_with_pattern():
+    rules = RuleSet(rules=DEFAULT_RULES + ({'name': 'test_listing', 'column': 'Title', 'pattern': r'(?i)^test'},))
+    df = sample()
+    df.loc[0, 'Title'] = 'TEST item'
+    report = ValidationReport()
+
+    cleaned = clean_data(df, rules=rules, report=report)
+    assert cleaned['Title'].tolist() == ['Another']
+    assert report.counts['test_listing'] == 1
+    assert report.summary().startswith('placeholder_title: 1')
+
+def test_exchange_rates_read_cached_table(tmp_path):
+    path = tmp_path / 'rates.json'
+    path.write_text(json.dumps({'fetched': time.time(), 'rates': {'usd': 15500}}))
+
+    def fetch():
+        raise AssertionError("a fresh table must not be refetched")
+
+    rates = ExchangeRates(path, fetch=fetch)
+    assert rates.rate('USD') == 15500.0
+    assert rates.rate('IDR') == 1.0
+    assert rates.rate('EUR') is None
+
+def test_exchange_rates_refresh_stale_table(tmp_path):
+    path = tmp_path / 'rates.json'
+    path.write_text(json.dumps({'fetched': 0, 'rates': {'USD': 15500}}))
+
+    rates = ExchangeRates(path, fetch=lambda: {'USD': 16200, 'EUR': 17500})
+    assert rates.rate('usd') == 16200.0
+    assert json.loads(path.read_text())['rates'] == {'USD': 16200.0, 'EUR': 17500.0}
+
+def test_exchange_rates_fall_back_when_fetch_fails(tmp_path):
+    path = tmp_path / 'rates.json'
+    path.write_text(json.dumps({'fetched': 0, 'rates': {'USD': 15500}}))
+
+    def fetch():
+        raise OSError("offline")
+
+    assert ExchangeRates(path, fetch=fetch).rate('USD') == 15500.0
+    os.remove(path)
+    assert ExchangeRates(path, fetch=fetch).rate('USD') == 16000.0
@@ -0,0 +1,61 @@
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+from utils.scheduler import RunLock, Scheduler, cron_schedule, interval_schedule
+
+
+def test_scheduler_runs_on_interval_and_records_history(tmp_path):
+    calls = []
+    history_file = tmp_path / 'history.json'
+    scheduler = Scheduler(lambda: calls.append(time.time()) or 0, interval_schedule(0.05),
+                          history_file=history_file)
+    scheduler.run_forever(max_runs=3)
+
+    assert len(calls) == 3
+    assert calls[2] - calls[0] >= 0.09
+    runs = json.loads(history_file.read_text())['runs']
+    assert [run['exit_status'] for run in runs] == [0, 0, 0]
+    assert scheduler.summary().startswith('3 runs, 0 failed, p50 ')
+
+    # A restarted scheduler continues the history
+    assert len(Scheduler(lambda: 0, interval_schedule(1), history_file=history_file).history) == 3
+
+def test_overrunning_run_skips_missed_start_times(caplog):
+    scheduler = Scheduler(lambda: time.sleep(0.12) or 0, interval_schedule(0.05))
+    started = time.time()
+    scheduler.run_forever(max_runs=2)
+
+    assert "skipped 2 start time(s)" in caplog.text
+    second = scheduler.history[1]
+    assert datetime.fromisoformat(second['scheduled']).timestamp() >= started + 0.14
+
+def test_failing_job_is_recorded_and_scheduler_continues():
+    def job():
+        raise RuntimeError("boom")
+
+    scheduler = Scheduler(job, interval_schedule(0.01))
+    scheduler.run_forever(max_runs=2)
+    assert [run['exit_status'] for run in scheduler.history] == [1, 1]
+
+def test_run_is_skipped_while_another_process_holds_the_lock(tmp_path, caplog):
+    other = RunLock(tmp_path / 'run.lock')
+    assert other.acquire()
+    calls = []
+    scheduler = Scheduler(lambda: calls.append(1) or 0, interval_schedule(1), lock_file=tmp_path / 'run.lock')
+
+    record = scheduler.run_once()
+    assert record['skipped'] and calls == []
+    assert "skipping this run" in caplog.text
+
+    other.release()
+    assert scheduler.run_once()['exit_status'] == 0
+    assert calls == [1]
+
+def test_cron_schedule_returns_next_matching_time():
+    after = datetime(2024, 1, 1, 10, 7).timestamp()
+    assert datetime.fromtimestamp(cron_schedule('*/15 * * * *')(after)) == datetime(2024, 1, 1, 10, 15)
+    with pytest.raises(ValueError):
+        cron_schedule('not a cron line')
@@ -0,0 +1,58 @@
+import subprocess
+import sys
+import time
+from utils.sinks import Sink, run_sinks, exit_code, wait_for_sinks
+
+def _slow(seconds, result=True):
+    time.sleep(seconds)
+    return result
+
+def test_run_sinks_runs_concurrently_and_keeps_order():
+    start = time.perf_counter()
+    results = run_sinks([Sink('a', _slow, 0.3), Sink('b', _slow, 0.3), Sink('c', _slow, 0.3)])
+    elapsed = time.perf_counter() - start
+
+    assert [r.name for r in results] == ['a', 'b', 'c']
+    assert all(r.ok for r in results)
+    assert elapsed < 0.8
+    assert all(r.seconds >= 0.3 for r in results)
+
+def test_run_sinks_reports_failures_exceptions_and_timeouts(caplog):
+    def boom():
+        raise RuntimeError("connection refused")
+
+    results = run_sinks([
+        Sink('false', _slow, 0, result=False),
+        Sink('raises', boom),
+        Sink('slow', _slow, 1.0, timeout=0.1),
+    ])
+
+    assert [r.ok for r in results] == [False, False, False]
+    assert results[1].error == "RuntimeError: connection refused"
+    assert "timed out" in results[2].error
+    assert "Sink raises failed" in caplog.text
+
+def test_exit_code_only_fails_on_required_sinks():
+    results = run_sinks([Sink('required', _slow, 0), Sink('optional', _slow, 0, result=False, required=False)])
+    assert exit_code(results) == 0
+
+    results = run_sinks([Sink('required', _slow, 0, result=False), Sink('optional', _slow, 0, required=False)])
+    assert exit_code(results) == 1
+
+def test_wait_for_sinks_waits_for_timed_out_sink():
+    wait_for_sinks()  # sinks left running by earlier tests
+    start = time.perf_counter()
+    results = run_sinks([Sink('slow', _slow, 0.5, timeout=0.05)])
+    assert not results[0].ok
+
+    assert not wait_for_sinks(timeout=0)
+    assert wait_for_sinks()
+    assert time.perf_counter() - start >= 0.5
+
+def test_timed_out_sink_does_not_delay_process_exit():
+    script = ("import time\n"
+              "from utils.sinks import Sink, run_sinks\n"
+              "run_sinks([Sink('hung', time.sleep, 3, timeout=0.2)])\n")
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', script], check=True, timeout=10)
+    assert time.perf_counter() - start < 2
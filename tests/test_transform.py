@@ -68,4 +68,50 @@ def test_clean_data_rating_extraction():
 def test_clean_data_error_handling(caplog):
     with pytest.raises(Exception):
         clean_data("invalid input")
-    assert "Unexpected error in clean_data" in caplog.text
\ No newline at end of file
+    assert "Unexpected error in clean_data" in caplog.text
+
+def test_clean_batches_matches_clean_data():
+    from utils.transform import clean_batches
+
+    rows = [
+        {'Title': 'A', 'Price': '10.00', 'Rating': '4.5', 'Colors': '3', 'Size': 'M', 'Gender': 'Men', 'Timestamp': 't'},
+        {'Title': 'Unknown Product', 'Price': '1.00', 'Rating': '4.0', 'Colors': '1', 'Size': 'S', 'Gender': 'Men', 'Timestamp': 't'},
+        {'Title': 'B', 'Price': '20.00', 'Rating': '3.5', 'Colors': '2', 'Size': 'L', 'Gender': 'Women', 'Timestamp': 't'},
+        {'Title': 'A', 'Price': '10.00', 'Rating': '4.5', 'Colors': '3', 'Size': 'M', 'Gender': 'Men', 'Timestamp': 't'},
+        {'Title': 'C', 'Price': None, 'Rating': '2.0', 'Colors': '2', 'Size': 'L', 'Gender': 'Women', 'Timestamp': 't'},
+    ]
+    batches = [rows[:2], [], rows[2:]]
+
+    streamed = pd.concat(list(clean_batches(batches)), ignore_index=True)
+    expected = clean_data(pd.DataFrame(rows))
+
+    pd.testing.assert_frame_equal(streamed, expected)
+
+def test_clean_data_fast_matches_clean_data_with_compact_dtypes():
+    from utils.transform import clean_data_fast
+
+    df = pd.DataFrame({
+        'Title': ['Good', 'Unknown Product', 'Another', None, 'Good', 'Odd'],
+        'Price': ['10.00', None, '20.00', 'Price Unavailable', '10.00', 'abc'],
+        'Rating': ['4.5 / 5', 'Invalid Rating', '3.8', None, '4.5 / 5', '4.0'],
+        'Colors': ['3 Colors', '2 Colors', '1', '1 Color', '3 Colors', '2'],
+        'Size': ['M', 'L', 'XL', None, 'M', 'S'],
+        'Gender': ['Men', 'Women', 'Unisex', 'Unisex', 'Men', 'Men'],
+        'Timestamp': ['2024-01-01'] * 6
+    })
+
+    expected = clean_data(df)
+    fast = clean_data_fast(df)
+
+    assert fast['Price'].dtype == np.float32
+    assert fast['Rating'].dtype == np.float32
+    assert fast['Colors'].dtype == np.uint8
+    assert isinstance(fast['Size'].dtype, pd.CategoricalDtype)
+    assert isinstance(fast['Gender'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(fast.astype(expected.dtypes.to_dict()), expected)
+
+def test_clean_data_fast_empty_input():
+    from utils.transform import clean_data_fast
+
+    df = pd.DataFrame(columns=['Title', 'Price', 'Rating', 'Colors', 'Size', 'Gender'])
+    assert len(clean_data_fast(df)) == 0
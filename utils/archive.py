@@ -0,0 +1,187 @@
+import gzip
+import json
+import os
+import threading
+import time
+from pathlib import Path
+import logging
+
+import requests
+
+from utils.files import safe_name
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - gzip is used instead
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIXES = {'zstd': '.zst', 'gzip': '.gz'}
+INDEX_FILE = 'index.jsonl'
+
+
+def _segment_name(run, compression):
+    # One segment per run
+    return f"run={safe_name(run)}.pages{ARCHIVE_SUFFIXES[compression]}"
+
+def _compress(data, compression, level):
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return gzip.compress(data, compresslevel=level)
+
+def _decompress(data, compression):
+    if compression == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class PageArchive:
+    """Append-only archive of fetched catalogue pages, indexed by run timestamp and URL.
+
+    Each run appends its pages to its own segment file as independently
+    compressed frames (so a segment is also a valid ``.zst``/``.gz`` stream),
+    and ``index.jsonl`` gets one line per page with the run, URL and the
+    frame's offset and length. Nothing is ever rewritten; a line cut short
+    by a crash is ignored. A page fetched twice in a run (e.g. by a resumed
+    crawl) is read back in its latest version.
+    """
+
+    def __init__(self, root, compression=None, level=3):
+        self.root = Path(root)
+        if compression is None:
+            compression = 'zstd' if zstandard is not None else 'gzip'
+        if compression not in ARCHIVE_SUFFIXES:
+            raise ValueError(f"Unknown archive compression: {compression}")
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError("zstandard is not installed")
+        self.compression = compression
+        self.level = level
+        self._writers = {}
+        self._lock = threading.Lock()
+
+    def writer(self, run):
+        """The :class:`ArchiveWriter` appending pages to ``run``, shared by crawls of the same run."""
+        with self._lock:
+            if run not in self._writers:
+                self._writers[run] = ArchiveWriter(self, run)
+            return self._writers[run]
+
+    def _index(self):
+        path = self.root / INDEX_FILE
+        if not path.exists():
+            return
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping unreadable archive index line in {path}")
+
+    def runs(self):
+        """Archived run timestamps, oldest first."""
+        return list(dict.fromkeys(entry['run'] for entry in self._index()))
+
+    def latest_run(self):
+        runs = self.runs()
+        return runs[-1] if runs else None
+
+    def entries(self, run=None):
+        """``{url: index entry}`` for the pages of ``run`` (the latest run by default)."""
+        run = run or self.latest_run()
+        return {entry['url']: entry for entry in self._index() if entry['run'] == run}
+
+    def read(self, entry):
+        """The page body an index entry points to."""
+        with open(self.root / entry['segment'], 'rb') as f:
+            f.seek(entry['offset'])
+            data = f.read(entry['length'])
+        return _decompress(data, entry.get('compression', self.compression)).decode('utf-8')
+
+    def get(self, url, run=None):
+        entry = self.entries(run).get(url)
+        return self.read(entry) if entry else None
+
+
+class ArchiveWriter:
+    """Thread-safe appender of one run's pages; see :class:`PageArchive`."""
+
+    def __init__(self, archive, run):
+        self.archive = archive
+        self.run = run
+        self.segment = _segment_name(run, archive.compression)
+        self.pages = 0
+        self._lock = threading.Lock()
+        self._data = None
+        self._index = None
+
+    def append(self, url, content):
+        frame = _compress(content.encode('utf-8'), self.archive.compression, self.archive.level)
+        with self._lock:
+            if self._data is None:
+                self.archive.root.mkdir(parents=True, exist_ok=True)
+                self._data = open(self.archive.root / self.segment, 'ab')
+                self._index = open(self.archive.root / INDEX_FILE, 'ab')
+            offset = self._data.seek(0, os.SEEK_END)
+            self._data.write(frame)
+            # The page must be on disk before the index points at it
+            self._data.flush()
+            entry = {'run': self.run, 'url': url, 'segment': self.segment, 'offset': offset,
+                     'length': len(frame), 'compression': self.archive.compression, 'fetched': time.time()}
+            self._index.write((json.dumps(entry) + '\n').encode('utf-8'))
+            self._index.flush()
+            self.pages += 1
+
+    def close(self):
+        # A writer shared by several crawls reopens its files on the next append
+        with self._lock:
+            for f in (self._data, self._index):
+                if f is not None:
+                    os.fsync(f.fileno())
+                    f.close()
+            self._data = self._index = None
+
+
+class _ArchivedResponse:
+    def __init__(self, url, text):
+        self.url = url
+        self.text = text
+        self.status_code = 200 if text is not None else 404
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Not archived: {self.url}", response=self)
+
+
+class ArchiveClient:
+    """Serve one archived run in place of ``utils.http_client.HttpClient``, without any network.
+
+    Pass it as ``client`` to the scrape functions (with ``requests_per_second=0``)
+    to replay the crawl: parsing follows the archived next-page links, and a
+    URL missing from the run answers 404.
+    """
+
+    def __init__(self, archive, run=None):
+        self.archive = archive
+        self.run = run or archive.latest_run()
+        if self.run is None:
+            raise ValueError(f"No archived runs in {archive.root}")
+        self._entries = archive.entries(self.run)
+        if not self._entries:
+            raise ValueError(f"Run {self.run} is not in the archive {archive.root}")
+        self.pages_served = 0
+
+    def get(self, url, headers=None, observer=None):
+        entry = self._entries.get(url) or self._entries.get(url.rstrip('/'))
+        response = _ArchivedResponse(url, self.archive.read(entry) if entry else None)
+        if entry:
+            self.pages_served += 1
+        if observer is not None:
+            observer(url, response.status_code, 0.0)
+        return response
+
+    def stats_dict(self):
+        return {'archived_pages_served': self.pages_served}
@@ -0,0 +1,172 @@
+import io
+import time
+import uuid
+import logging
+from typing import Sequence
+
+import pandas as pd
+from sqlalchemy import (BigInteger, Boolean, Column, DateTime, Float, MetaData, PrimaryKeyConstraint, Table, Text,
+                        inspect, text)
+
+from utils.cdc import DEFAULT_KEY_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNKSIZE = 10_000
+
+def _column_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype):
+        return Boolean()
+    if pd.api.types.is_integer_dtype(dtype):
+        return BigInteger()
+    if pd.api.types.is_float_dtype(dtype):
+        return Float()
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return DateTime()
+    return Text()
+
+def products_table(df: pd.DataFrame, table_name: str, key_columns: Sequence[str] = DEFAULT_KEY_COLUMNS,
+                   metadata: MetaData | None = None, temporary: bool = False) -> Table:
+    """Typed table definition for ``df`` with a primary key on ``key_columns``.
+
+    Temporary (staging) tables get neither the key nor the indexes.
+    """
+    metadata = metadata if metadata is not None else MetaData()
+    columns = [Column(name, _column_type(dtype), nullable=temporary or name not in key_columns)
+               for name, dtype in df.dtypes.items()]
+    if temporary:
+        return Table(table_name, metadata, *columns, prefixes=['TEMPORARY'])
+    return Table(table_name, metadata, *columns, PrimaryKeyConstraint(*key_columns))
+
+def ensure_indexes(connection, table_name: str, columns: Sequence[str]):
+    """Create the secondary indexes of the products table if they are missing."""
+    preparer = connection.dialect.identifier_preparer
+    if 'Timestamp' in columns:
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {preparer.quote(f'ix_{table_name}_timestamp')} "
+                                f"ON {preparer.quote(table_name)} ({preparer.quote('Timestamp')})"))
+
+def has_key(connection, table_name: str, key_columns: Sequence[str]) -> bool:
+    """Whether ``table_name`` exists with a primary key or unique constraint on exactly ``key_columns``."""
+    inspector = inspect(connection)
+    if not inspector.has_table(table_name):
+        return False
+    keys = set(key_columns)
+    candidates = [inspector.get_pk_constraint(table_name).get('constrained_columns') or []]
+    candidates += [constraint['column_names'] for constraint in inspector.get_unique_constraints(table_name)]
+    candidates += [index['column_names'] for index in inspector.get_indexes(table_name) if index.get('unique')]
+    return any(set(columns) == keys for columns in candidates)
+
+def copy_rows(connection, table: Table, df: pd.DataFrame, chunksize: int = DEFAULT_CHUNKSIZE) -> int:
+    """Stream ``df`` into ``table`` in chunks: COPY FROM STDIN on psycopg2/psycopg, executemany elsewhere."""
+    driver = connection.dialect.driver
+    preparer = connection.dialect.identifier_preparer
+    columns = ', '.join(preparer.quote(name) for name in df.columns)
+    copy_sql = f"COPY {preparer.format_table(table)} ({columns}) FROM STDIN WITH (FORMAT csv)"
+
+    written = 0
+    for start in range(0, len(df), chunksize):
+        chunk = df.iloc[start:start + chunksize]
+        if driver in ('psycopg2', 'psycopg'):
+            buffer = io.StringIO()
+            chunk.to_csv(buffer, header=False, index=False)
+            dbapi_connection = connection.connection.dbapi_connection
+            with dbapi_connection.cursor() as cursor:
+                if driver == 'psycopg2':
+                    buffer.seek(0)
+                    cursor.copy_expert(copy_sql, buffer)
+                else:
+                    with cursor.copy(copy_sql) as copy:
+                        copy.write(buffer.getvalue())
+        else:
+            records = chunk.astype(object).where(chunk.notna(), None).to_dict('records')
+            connection.execute(table.insert(), records)
+        written += len(chunk)
+    return written
+
+def _upsert_sql(connection, target: str, staging: str, columns: Sequence[str], key_columns: Sequence[str]) -> str:
+    preparer = connection.dialect.identifier_preparer
+    quoted = [preparer.quote(name) for name in columns]
+    keys = ', '.join(preparer.quote(name) for name in key_columns)
+    updates = ', '.join(f"{name} = excluded.{name}" for name, raw in zip(quoted, columns) if raw not in key_columns)
+    conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    # "WHERE true" keeps SQLite from reading ON CONFLICT as part of the SELECT
+    return (f"INSERT INTO {preparer.quote(target)} ({', '.join(quoted)}) "
+            f"SELECT {', '.join(quoted)} FROM {preparer.quote(staging)} WHERE true "
+            f"ON CONFLICT ({keys}) {conflict}")
+
+def delete_rows(connection, table_name: str, keys: pd.DataFrame, key_columns: Sequence[str]) -> int:
+    """Delete the rows whose key columns match a row of ``keys``."""
+    if keys.empty:
+        return 0
+    preparer = connection.dialect.identifier_preparer
+    params = [f'k{i}' for i in range(len(key_columns))]
+    where = ' AND '.join(f"{preparer.quote(name)} = :{param}" for name, param in zip(key_columns, params))
+    records = [dict(zip(params, row)) for row in keys[list(key_columns)].itertuples(index=False, name=None)]
+    connection.execute(text(f"DELETE FROM {preparer.quote(table_name)} WHERE {where}"), records)
+    return len(records)
+
+def bulk_load(df: pd.DataFrame, engine, table_name: str = 'products', mode: str = 'upsert',
+              key_columns: Sequence[str] = DEFAULT_KEY_COLUMNS, chunksize: int = DEFAULT_CHUNKSIZE,
+              delete_keys: pd.DataFrame | None = None) -> dict:
+    """Load ``df`` into a persistent, keyed table in one transaction.
+
+    ``mode='upsert'`` copies the rows into a temporary staging table and merges
+    them with ``INSERT ... ON CONFLICT DO UPDATE``; rows missing from ``df`` are
+    kept. ``mode='swap'`` copies them into a fresh table and swaps it in for the
+    old one, so readers always see either the previous or the new snapshot.
+    In upsert mode, rows matching ``delete_keys`` are removed in the same
+    transaction. Returns throughput metrics for the load.
+    """
+    if mode not in ('upsert', 'swap'):
+        raise ValueError(f"Unknown bulk load mode: {mode}")
+    missing = [name for name in key_columns if name not in df.columns]
+    if missing:
+        raise ValueError(f"Key columns missing from DataFrame: {missing}")
+
+    start = time.perf_counter()
+    rows = df.drop_duplicates(subset=list(key_columns), keep='last')
+    if len(rows) < len(df):
+        logger.warning(f"Dropped {len(df) - len(rows)} rows with duplicate keys {tuple(key_columns)}")
+    columns = list(rows.columns)
+    suffix = uuid.uuid4().hex[:8]
+
+    with engine.begin() as connection:
+        if mode == 'upsert':
+            target = products_table(rows, table_name, key_columns)
+            target.create(connection, checkfirst=True)
+            ensure_indexes(connection, table_name, columns)
+
+            staging = products_table(rows, f'{table_name}__staging_{suffix}', key_columns, temporary=True)
+            staging.create(connection)
+            copied = copy_rows(connection, staging, rows, chunksize)
+            connection.execute(text(_upsert_sql(connection, table_name, staging.name, columns, key_columns)))
+            staging.drop(connection)
+            deleted = delete_rows(connection, table_name, delete_keys, key_columns) if delete_keys is not None else 0
+        else:
+            deleted = 0
+            new_table = products_table(rows, f'{table_name}__load_{suffix}', key_columns)
+            new_table.create(connection)
+            copied = copy_rows(connection, new_table, rows, chunksize)
+
+            preparer = connection.dialect.identifier_preparer
+            old_name = f'{table_name}__old_{suffix}'
+            if inspect(connection).has_table(table_name):
+                connection.execute(text(f"ALTER TABLE {preparer.quote(table_name)} RENAME TO {preparer.quote(old_name)}"))
+                connection.execute(text(f"ALTER TABLE {preparer.quote(new_table.name)} RENAME TO {preparer.quote(table_name)}"))
+                connection.execute(text(f"DROP TABLE {preparer.quote(old_name)}"))
+            else:
+                connection.execute(text(f"ALTER TABLE {preparer.quote(new_table.name)} RENAME TO {preparer.quote(table_name)}"))
+            ensure_indexes(connection, table_name, columns)
+
+    seconds = time.perf_counter() - start
+    metrics = {
+        'mode': mode,
+        'rows': copied,
+        'deleted': deleted,
+        'seconds': round(seconds, 4),
+        'rows_per_second': round(copied / seconds, 1) if seconds > 0 else None,
+        'chunks': -(-copied // chunksize) if chunksize else 0,
+    }
+    logger.info(f"Bulk loaded {copied} rows into {table_name} ({mode}, {deleted} deleted) in {seconds:.2f}s "
+                f"({metrics['rows_per_second']} rows/s, {metrics['chunks']} chunks)")
+    return metrics
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Default of ResponseCache.put: the caller has not read the current entry
+_UNREAD = object()
+
+
+def content_hash(text):
+    """Stable fingerprint of a page body."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """On-disk cache of page bodies, their HTTP validators and the products parsed from them.
+
+    Each URL is stored as one JSON file. Entries older than ``max_age`` seconds
+    are ignored and removed, and the least recently used entries are evicted
+    once the directory grows past ``max_bytes``. The directory is only scanned
+    on the first write and when a running size total goes over the limit.
+    """
+
+    def __init__(self, directory='.http_cache', max_bytes=50 * 1024 * 1024, max_age=7 * 24 * 3600):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._sizes = None  # path -> bytes of every entry, once the directory was scanned
+        self._total = 0
+        # Entries written for pages not parsed yet, so parsing does not read them back
+        self._unparsed = {}
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url):
+        return self.directory / (hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, url):
+        """Return the cached entry for `url`, or None if it is missing, corrupt or expired."""
+        path = self._path(url)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable cache entry for {url}: {e}")
+            self._remove(path)
+            return None
+
+        if self.max_age is not None and time.time() - entry.get('stored_at', 0) > self.max_age:
+            self._remove(path)
+            return None
+        return entry
+
+    def conditional_headers(self, entry):
+        """Request headers that let the server answer 304 Not Modified."""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url, body, etag=None, last_modified=None, previous=_UNREAD):
+        """Store a freshly downloaded body. Parsed products survive if the body is unchanged.
+
+        ``previous`` is the entry the caller already read for ``url`` (None if there was none).
+        """
+        if previous is _UNREAD:
+            previous = self.get(url)
+        digest = content_hash(body)
+        entry = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_hash': digest,
+            'stored_at': time.time(),
+            'body': body,
+        }
+        if previous and previous.get('content_hash') == digest:
+            entry['products'] = previous.get('products')
+            entry['next_url'] = previous.get('next_url')
+        self._write(url, entry)
+        return entry
+
+    def refresh(self, url, entry):
+        """Mark an entry as revalidated (e.g. after a 304) so it does not age out."""
+        entry['stored_at'] = time.time()
+        self._write(url, entry)
+
+    def store_parsed(self, url, digest, products, next_url):
+        """Remember what a body with the given hash parsed to."""
+        entry = self._unparsed.pop(url, None) or self.get(url)
+        if not entry or entry.get('content_hash') != digest:
+            return
+        entry['products'] = products
+        entry['next_url'] = next_url
+        self._write(url, entry)
+
+    def parsed(self, url, digest):
+        """Return (products, next_url) parsed earlier from an identical body, or None."""
+        entry = self._unparsed.get(url) or self.get(url)
+        if not entry or entry.get('content_hash') != digest or entry.get('products') is None:
+            return None
+        self._unparsed.pop(url, None)
+        return entry['products'], entry.get('next_url')
+
+    def discard_unparsed(self, url):
+        """Forget the entry held for ``url`` when its page could not be parsed."""
+        self._unparsed.pop(url, None)
+
+    def _write(self, url, entry):
+        path = self._path(url)
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f)
+                    size = f.tell()
+                os.replace(tmp_path, path)
+            except Exception:
+                self._remove(Path(tmp_path))
+                raise
+            if entry.get('products') is None:
+                self._unparsed[url] = entry
+            if self._sizes is None:
+                self._evict()
+            else:
+                self._total += size - self._sizes.get(path, 0)
+                self._sizes[path] = size
+                if self.max_bytes is not None and self._total > self.max_bytes:
+                    self._evict()
+
+    def _evict(self):
+        """Drop expired entries, then the least recently written ones until under max_bytes."""
+        entries = []
+        total = 0
+        now = time.time()
+        self._sizes = {}
+        for path in self.directory.glob('*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if self.max_age is not None and now - stat.st_mtime > self.max_age:
+                self._remove(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            self._sizes[path] = stat.st_size
+            total += stat.st_size
+        self._total = total
+
+        if self.max_bytes is None or total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            if self._total <= self.max_bytes:
+                break
+            self._remove(path)
+
+    def _remove(self, path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        with self._lock:
+            if self._sizes is not None and path in self._sizes:
+                self._total -= self._sizes.pop(path)
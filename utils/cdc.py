@@ -0,0 +1,124 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Sequence
+import logging
+
+import pandas as pd
+
+from utils.files import match_target_mode
+
+logger = logging.getLogger(__name__)
+
+# Columns identifying a product across runs (the primary key of the bulk-loaded table)
+DEFAULT_KEY_COLUMNS = ('Title',)
+
+# Columns that change on every run without the product itself changing
+VOLATILE_COLUMNS = ('Timestamp',)
+
+FINGERPRINT_COLUMN = '_fingerprint'
+
+
+class ChangeSet:
+    """Rows inserted, updated and deleted since the previous snapshot."""
+
+    def __init__(self, inserts: pd.DataFrame, updates: pd.DataFrame, deletes: pd.DataFrame,
+                 unchanged: int, snapshot: pd.DataFrame, initial: bool = False, current: pd.DataFrame | None = None):
+        self.inserts = inserts
+        self.updates = updates
+        self.deletes = deletes
+        self.unchanged = unchanged
+        self.snapshot = snapshot
+        # True when there was no previous snapshot and every row counts as an insert
+        self.initial = initial
+        # Every current row, for loaders that cannot apply the delta and replace everything
+        self.current = inserts if current is None else current
+
+    @property
+    def upserts(self) -> pd.DataFrame:
+        return pd.concat([self.inserts, self.updates], ignore_index=True)
+
+    def is_empty(self) -> bool:
+        return self.inserts.empty and self.updates.empty and self.deletes.empty
+
+    def summary(self) -> str:
+        return (f"{len(self.inserts)} inserts, {len(self.updates)} updates, "
+                f"{len(self.deletes)} deletes, {self.unchanged} unchanged")
+
+
+def fingerprint(df: pd.DataFrame, key_columns: Sequence[str] = DEFAULT_KEY_COLUMNS) -> pd.DataFrame:
+    """Key columns plus a 64-bit hash of every non-key, non-volatile column."""
+    value_columns = [col for col in df.columns if col not in key_columns and col not in VOLATILE_COLUMNS]
+    keys = df[list(key_columns)].astype(str).reset_index(drop=True)
+    if value_columns:
+        hashes = pd.util.hash_pandas_object(df[value_columns].astype(str), index=False)
+    else:
+        hashes = pd.Series(0, index=df.index, dtype='uint64')
+    keys[FINGERPRINT_COLUMN] = hashes.astype(str).values
+    return keys
+
+def load_snapshot(snapshot_path: str | Path) -> pd.DataFrame | None:
+    """Read the fingerprints saved by the previous run, or None if there are none."""
+    path = Path(snapshot_path)
+    if not path.exists():
+        return None
+    try:
+        return pd.read_csv(path, dtype=str, keep_default_na=False)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+
+def save_snapshot(changes: ChangeSet, snapshot_path: str | Path) -> bool:
+    """Persist the fingerprints of the current run; call once the loaders have applied the changes."""
+    path = Path(snapshot_path)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            changes.snapshot.to_csv(f, index=False)
+        match_target_mode(tmp_path, path)
+        os.replace(tmp_path, path)
+        logger.info(f"Saved snapshot of {len(changes.snapshot)} products to {path}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to save snapshot {path}: {e}")
+        return False
+
+def discard_snapshot(snapshot_path: str | Path):
+    """Forget the previous run, e.g. after a loader rewrote the table outside CDC; the next diff is initial."""
+    path = Path(snapshot_path)
+    try:
+        path.unlink()
+        logger.info(f"Discarded snapshot {path}")
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not discard snapshot {path}: {e}")
+
+def diff_snapshot(df: pd.DataFrame, snapshot_path: str | Path,
+                  key_columns: Sequence[str] = DEFAULT_KEY_COLUMNS) -> ChangeSet:
+    """Compare cleaned products against the previous snapshot and return the changes."""
+    key_columns = list(key_columns)
+    current = df.drop_duplicates(subset=key_columns, keep='last').reset_index(drop=True)
+    prints = fingerprint(current, key_columns)
+    previous = load_snapshot(snapshot_path)
+
+    if previous is None:
+        logger.info(f"No previous snapshot; treating all {len(current)} products as inserts")
+        return ChangeSet(current, current.iloc[0:0], prints[key_columns].iloc[0:0], 0, prints, initial=True)
+
+    previous = previous.drop_duplicates(subset=key_columns, keep='last')
+    matched = prints.assign(_row=range(len(prints))).merge(
+        previous, on=key_columns, how='left', suffixes=('', '_previous'))
+    previous_prints = matched[f'{FINGERPRINT_COLUMN}_previous']
+    inserted = previous_prints.isna()
+    changed = ~inserted & (matched[FINGERPRINT_COLUMN] != previous_prints)
+
+    inserts = current.iloc[matched.loc[inserted, '_row']].reset_index(drop=True)
+    updates = current.iloc[matched.loc[changed, '_row']].reset_index(drop=True)
+    gone = previous[key_columns].merge(prints[key_columns], on=key_columns, how='left', indicator=True)
+    deletes = gone.loc[gone['_merge'] == 'left_only', key_columns].reset_index(drop=True)
+
+    changes = ChangeSet(inserts, updates, deletes, int((~inserted & ~changed).sum()), prints, current=current)
+    logger.info(f"Change data capture: {changes.summary()}")
+    return changes
@@ -0,0 +1,108 @@
+import json
+import os
+import time
+from pathlib import Path
+import logging
+
+from utils.files import write_atomic
+
+logger = logging.getLogger(__name__)
+
+# A crawl left unfinished for longer than this is started over
+DEFAULT_MAX_AGE = 24 * 3600
+
+
+class CrawlState:
+    """What an interrupted crawl had completed: its run timestamp and every finished page."""
+
+    def __init__(self, base_url, timestamp, pages):
+        self.base_url = base_url
+        self.timestamp = timestamp
+        # (url, products, next_url) per completed page, in page order
+        self.pages = pages
+
+    @property
+    def next_url(self):
+        return self.pages[-1][2] if self.pages else self.base_url
+
+    @property
+    def products(self):
+        return [product for _, page_products, _ in self.pages for product in page_products]
+
+
+class CrawlCheckpoint:
+    """Append-only record of the pages a crawl has completed, so a failed crawl can resume.
+
+    The file is JSON lines: a header with the base URL and run timestamp,
+    then one line per completed page with its URL, products and next-page
+    URL. Each line is flushed to disk before the page is handed on, and a
+    line cut short by a crash is dropped on resume.
+    """
+
+    def __init__(self, path, max_age=DEFAULT_MAX_AGE):
+        self.path = Path(path)
+        self.max_age = max_age
+        self._file = None
+
+    def resume(self, base_url):
+        """State of the unfinished crawl of ``base_url``, or None if it has to start from scratch."""
+        if not self.path.exists():
+            return None
+        try:
+            if self.max_age is not None and time.time() - self.path.stat().st_mtime > self.max_age:
+                logger.info(f"Ignoring crawl checkpoint older than {self.max_age}s: {self.path}")
+                return None
+
+            pages, valid_bytes, header = [], 0, None
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if not line.endswith(b'\n'):
+                        break
+                    if header is None:
+                        header = record
+                    else:
+                        pages.append((record['url'], record['products'], record['next_url']))
+                    valid_bytes += len(line)
+
+            if header is None or header.get('base_url') != base_url:
+                return None
+            # Drop a partially written last line so new pages are appended after valid ones
+            if valid_bytes < self.path.stat().st_size:
+                with open(self.path, 'r+b') as f:
+                    f.truncate(valid_bytes)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            logger.info(f"Resuming crawl of {base_url} after {len(pages)} completed pages")
+            return CrawlState(base_url, header['timestamp'], pages)
+
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable crawl checkpoint {self.path}: {e}")
+            return None
+
+    def start(self, base_url, timestamp):
+        """Begin a new checkpoint, replacing any previous one."""
+        self.close()
+        write_atomic(self.path, json.dumps({'base_url': base_url, 'timestamp': timestamp}) + '\n')
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def record_page(self, url, products, next_url):
+        """Persist one completed page."""
+        self._file.write(json.dumps({'url': url, 'products': products, 'next_url': next_url}) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def complete(self):
+        """The crawl reached its end: remove the checkpoint so the next run starts afresh."""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
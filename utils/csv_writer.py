@@ -0,0 +1,123 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+from pathlib import Path
+import logging
+
+import pandas as pd
+
+from utils.files import match_target_mode
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstd output is optional
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+def csv_path(filepath: str | Path, compression: str | None = None) -> tuple[Path, str | None]:
+    """Normalise a CSV target to ``name.csv[.gz|.zst]`` and work out its compression.
+
+    An explicit ``compression`` wins; otherwise it is inferred from a ``.gz`` or
+    ``.zst`` suffix.
+    """
+    path = Path(filepath)
+    if compression is None:
+        compression = next((name for name, suffix in COMPRESSION_SUFFIXES.items() if path.suffix == suffix), None)
+    elif compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown CSV compression: {compression}")
+
+    if path.suffix in COMPRESSION_SUFFIXES.values():
+        path = path.with_suffix('')
+    if path.suffix != '.csv':
+        path = path.with_suffix('.csv')
+    if compression:
+        path = path.with_name(path.name + COMPRESSION_SUFFIXES[compression])
+    return path, compression
+
+
+class AtomicCsvWriter:
+    """Write DataFrame batches to a CSV file that only appears once it is complete.
+
+    Rows go to a temporary file next to the target, which replaces the target
+    with ``os.replace`` on :meth:`commit`. A crash or :meth:`abort` leaves the
+    previous file untouched. With ``append=True`` the new rows are added after
+    the existing ones (without repeating the header). gzip and zstd streams may
+    be concatenated, so compressed files are appended to the same way.
+    """
+
+    def __init__(self, filepath: str | Path, append: bool = False, compression: str | None = None):
+        self.path, self.compression = csv_path(filepath, compression)
+        if self.compression == 'zstd' and zstandard is None:
+            raise ValueError("zstd output needs the zstandard package")
+        self.append = append
+        self.rows = 0
+        self._raw = None
+        self._stream = None
+        self._text = None
+        self._tmp_path = None
+        self._header = True
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f'.{self.path.name}.', suffix='.tmp')
+        self._raw = os.fdopen(fd, 'wb')
+
+        if self.append and self.path.exists() and self.path.stat().st_size > 0:
+            with open(self.path, 'rb') as existing:
+                shutil.copyfileobj(existing, self._raw)
+            self._header = False
+
+        if self.compression == 'gzip':
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=6, mtime=0)
+        elif self.compression == 'zstd':
+            self._stream = zstandard.ZstdCompressor(level=3).stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+        self._text = io.TextIOWrapper(self._stream, encoding='utf-8', newline='')
+
+    def write(self, df: pd.DataFrame):
+        """Append a batch of rows to the temporary file."""
+        if self._text is None:
+            self._open()
+        df.to_csv(self._text, header=self._header, index=False, lineterminator='\n')
+        self._header = False
+        self.rows += len(df)
+
+    def commit(self) -> Path:
+        """Flush everything to disk and move the file into place."""
+        if self._text is None:
+            self._open()
+        self._text.flush()
+        self._text.detach()
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+        match_target_mode(self._tmp_path, self.path)
+        os.replace(self._tmp_path, self.path)
+        self._text = self._stream = self._raw = self._tmp_path = None
+        return self.path
+
+    def abort(self):
+        """Drop the temporary file and leave the target as it was."""
+        if self._raw is not None:
+            self._raw.close()
+        if self._tmp_path is not None and os.path.exists(self._tmp_path):
+            os.unlink(self._tmp_path)
+        self._text = self._stream = self._raw = self._tmp_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
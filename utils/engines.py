@@ -0,0 +1,62 @@
+import atexit
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Connections kept open per database, and extra ones allowed under load
+POOL_SIZE = 5
+MAX_OVERFLOW = 5
+# Reconnect pooled connections older than this many seconds (before server-side idle timeouts)
+POOL_RECYCLE = 1800
+# PostgreSQL aborts any statement running longer than this; kept below the
+# PostgreSQL sink timeout in main.py so a timed-out load does not keep running
+STATEMENT_TIMEOUT_MS = 5 * 60 * 1000
+
+_engines = {}
+_lock = threading.Lock()
+
+
+def get_engine(db_url: str, pool_size: int = POOL_SIZE, max_overflow: int = MAX_OVERFLOW,
+               pool_recycle: int = POOL_RECYCLE, statement_timeout_ms: int | None = STATEMENT_TIMEOUT_MS):
+    """The shared engine for ``db_url``, created on first use and reused by every later call.
+
+    Pooled connections are checked with a ping before use, so a connection
+    the server dropped is replaced instead of failing the load. The pool
+    options only apply when the engine is created; all engines are disposed
+    at interpreter exit (or by :func:`dispose_engines`).
+    """
+    with _lock:
+        engine = _engines.get(db_url)
+        if engine is not None:
+            return engine
+
+        # Imported here so runs without a database sink never load SQLAlchemy
+        import sqlalchemy
+        url = sqlalchemy.engine.make_url(db_url)
+        options = {'pool_pre_ping': True, 'pool_recycle': pool_recycle}
+        # SQLite (used in tests and benchmarks) keeps its own pool defaults
+        if url.get_backend_name() != 'sqlite':
+            options.update(pool_size=pool_size, max_overflow=max_overflow)
+        if url.get_backend_name() == 'postgresql' and statement_timeout_ms:
+            options['connect_args'] = {'options': f'-c statement_timeout={int(statement_timeout_ms)}'}
+
+        engine = sqlalchemy.create_engine(url, **options)
+        _engines[db_url] = engine
+        logger.info(f"Created database engine for {url.render_as_string(hide_password=True)}")
+        return engine
+
+
+def dispose_engines():
+    """Close every pooled connection and forget the engines."""
+    with _lock:
+        engines = list(_engines.values())
+        _engines.clear()
+    for engine in engines:
+        try:
+            engine.dispose()
+        except Exception as e:
+            logger.warning(f"Failed to dispose database engine: {e}")
+
+
+atexit.register(dispose_engines)
@@ -0,0 +1,75 @@
+import json
+import threading
+import time
+from pathlib import Path
+import logging
+
+from utils.files import write_atomic
+
+logger = logging.getLogger(__name__)
+
+# Rupiah per unit of each currency, used when no rate table is available
+DEFAULT_RATES_TO_IDR = {'IDR': 1.0, 'USD': 16000.0}
+
+DEFAULT_MAX_AGE = 24 * 3600
+
+
+class ExchangeRates:
+    """Rupiah exchange rates from a cached JSON table, refreshed through ``fetch`` when stale.
+
+    The table at ``path`` looks like ``{"fetched": <unix time>, "rates":
+    {"USD": 16000, ...}}``. When it is older than ``max_age`` and a ``fetch``
+    callable is given, ``fetch()`` must return a new ``{currency: rate}``
+    mapping, which is saved back to ``path``. If fetching fails, the stale table is
+    used. Without a table, ``defaults`` apply. Loaded rates are kept in memory
+    for up to ``max_age``, so a long-running process picks up refreshed tables.
+    """
+
+    def __init__(self, path=None, max_age=DEFAULT_MAX_AGE, fetch=None, defaults=DEFAULT_RATES_TO_IDR):
+        self.path = Path(path) if path else None
+        self.max_age = max_age
+        self.fetch = fetch
+        self.defaults = dict(defaults)
+        self._rates = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _read_table(self):
+        if self.path is None or not self.path.exists():
+            return None, None
+        try:
+            table = json.loads(self.path.read_text(encoding='utf-8'))
+            return {code.upper(): float(rate) for code, rate in table['rates'].items()}, table.get('fetched')
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable exchange-rate table {self.path}: {e}")
+            return None, None
+
+    def _write_table(self, rates):
+        write_atomic(self.path, json.dumps({'fetched': time.time(), 'rates': rates}, indent=2))
+
+    def rates(self):
+        """All known rates as ``{currency: rupiah per unit}``."""
+        with self._lock:
+            if self._rates is not None and time.monotonic() - self._loaded_at < self.max_age:
+                return self._rates
+
+            rates, fetched = self._read_table()
+            stale = rates is None or fetched is None or time.time() - fetched > self.max_age
+            if stale and self.fetch is not None:
+                try:
+                    fresh = {code.upper(): float(rate) for code, rate in self.fetch().items()}
+                    if self.path is not None:
+                        self._write_table(fresh)
+                    rates = fresh
+                    logger.info(f"Fetched {len(fresh)} exchange rates")
+                except Exception as e:
+                    logger.warning(f"Could not refresh exchange rates, using {'cached' if rates else 'default'} "
+                                   f"ones: {e}")
+
+            self._rates = {**self.defaults, **(rates or {})}
+            self._loaded_at = time.monotonic()
+            return self._rates
+
+    def rate(self, currency):
+        """Rupiah per unit of ``currency``, or None if it is unknown."""
+        return self.rates().get(currency.upper())
@@ -1,23 +1,64 @@
 import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
+import re
+from contextlib import closing
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from urllib.parse import urljoin
 import logging
+import multiprocessing
+from utils.cache import content_hash
+from utils.http_client import HEADERS, get_default_client
+from utils.parsers import (PRODUCT_FIELDS, ProductColumns, parse_catalogue_page, parse_page_rows,
+                           parse_product_details, rows_to_products)
+from utils.ratelimit import AdaptiveRateLimiter, HostRateLimiter
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-}
+# Matches numbered pagination links such as '/page2' or '?page=2'
+PAGE_NUMBER_PATTERN = re.compile(r'^(.*?)(\d+)(\D*)$')
 
-def fetch_page_content(url):
-    """Fetch HTML content from a given URL with comprehensive error handling."""
+# Fastest installed HTML parser (see utils.parsers.available_backends)
+DEFAULT_PARSER_BACKEND = 'auto'
+
+# Fetch threads are already running when the parse pool starts; forking them can deadlock
+# the workers, so they are started from a clean server process instead
+PARSE_POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+def fetch_page_content(url, client=None, cache=None, observer=None, missing_ok=False):
+    """Fetch HTML content from a given URL with comprehensive error handling.
+
+    Requests go through a pooled keep-alive ``HttpClient`` (the shared default
+    one unless ``client`` is given), which retries transient failures. With a
+    ``ResponseCache`` the request is made conditional and a 304 answer is
+    served from the cached body. ``observer`` is handed to ``HttpClient.get``
+    to report every attempt (see ``utils.ratelimit.AdaptiveRateLimiter``).
+    With ``missing_ok`` a 404 is expected (e.g. a page fetched ahead past the
+    last one) and only logged at debug level.
+    """
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        entry = cache.get(url) if cache else None
+        headers = cache.conditional_headers(entry) if cache else None
+        client = client or get_default_client()
+        response = client.get(url, headers=headers or None, observer=observer)
+
+        if response.status_code == 304 and entry:
+            logger.info(f"Not modified, using cached copy of {url}")
+            cache.refresh(url, entry)
+            return entry['body']
+
+        if missing_ok and response.status_code == 404:
+            logger.debug(f"No page at {url}")
+            return None
         response.raise_for_status()
+        if cache:
+            try:
+                cache.put(url, response.text,
+                          etag=response.headers.get('ETag'),
+                          last_modified=response.headers.get('Last-Modified'),
+                          previous=entry)
+            except Exception as cache_err:
+                logger.warning(f"Could not cache response for {url}: {cache_err}")
         return response.text
     except requests.exceptions.Timeout:
         logger.error(f"Request timed out for URL: {url}")
@@ -32,119 +73,358 @@ def fetch_page_content(url):
         logger.error(f"Unexpected error fetching {url}: {e}")
         return None
 
-def parse_product_details(product_div):
-    """Extract product details from a product div element with error handling."""
+def parse_page(html_content, base_url, backend=DEFAULT_PARSER_BACKEND, parse_pool=None, as_rows=False):
+    """Parse one catalogue page into its products and the absolute URL of the next page.
+
+    With a ``parse_pool`` (a ``ProcessPoolExecutor``) the parsing runs in a
+    worker process, which sends back compact rows instead of soup objects.
+    With ``as_rows`` the products are ``PRODUCT_FIELDS`` tuples instead of dicts.
+    """
+    if parse_pool is None:
+        return parse_catalogue_page(html_content, base_url, backend=backend, as_rows=as_rows)
+    rows, next_url = parse_pool.submit(parse_page_rows, html_content, base_url, backend).result()
+    return (rows if as_rows else rows_to_products(rows)), next_url
+
+def _normalize_products(products, as_rows):
+    # Cached and checkpointed pages may have been stored by a crawl in the other representation
+    if as_rows:
+        return [tuple(product.get(field) for field in PRODUCT_FIELDS) if isinstance(product, dict)
+                else tuple(product) for product in products]
+    return [product if isinstance(product, dict) else dict(zip(PRODUCT_FIELDS, product)) for product in products]
+
+def load_page(url, html_content, base_url, cache=None, backend=DEFAULT_PARSER_BACKEND, parse_pool=None,
+              as_rows=False):
+    """Parse a fetched page, reusing the products cached for an identical body when possible."""
+    if not cache:
+        return parse_page(html_content, base_url, backend, parse_pool, as_rows)
+
+    digest = content_hash(html_content)
+    cached = cache.parsed(url, digest)
+    if cached is not None:
+        logger.info(f"Page unchanged, reusing {len(cached[0])} parsed products for {url}")
+        return _normalize_products(cached[0], as_rows), cached[1]
+
     try:
-        if not product_div:
-            raise ValueError("Empty product_div provided")
-            
-        title_element = product_div.find('h3', class_='product-title')
-        if not title_element:
-            raise ValueError("Title element not found")
-        title = title_element.text.strip()
-        
-        # Price extraction with multiple fallbacks
-        price = None
-        try:
-            price_container = product_div.find('div', class_='price-container')
-            if price_container:
-                price_span = price_container.find('span', class_='price')
-                if price_span:
-                    price = price_span.text.strip().replace('$', '')
-        except Exception as e:
-            logger.warning(f"Error extracting price: {e}")
-        
-        # Rating extraction
-        rating = None
-        try:
-            rating_text = product_div.find('p', string=lambda text: text and 'Rating:' in text)
-            if rating_text:
-                rating = rating_text.text.strip().split('⭐')[-1].strip().split('/')[0].strip()
-        except Exception as e:
-            logger.warning(f"Error extracting rating: {e}")
-        
-        # Colors extraction
-        colors = None
+        products, next_url = parse_page(html_content, base_url, backend, parse_pool, as_rows)
+    except Exception:
+        cache.discard_unparsed(url)
+        raise
+    try:
+        cache.store_parsed(url, digest, products, next_url)
+    except Exception as cache_err:
+        logger.warning(f"Could not cache parsed products for {url}: {cache_err}")
+    return products, next_url
+
+def page_url_template(next_url):
+    """Derive a '{page}' URL template from a numbered next-page link such as '/page2'."""
+    match = PAGE_NUMBER_PATTERN.match(next_url or '')
+    if not match:
+        return None, None
+    prefix, number, suffix = match.groups()
+    return prefix + '{page}' + suffix, int(number)
+
+def scrape_products(base_url, max_pages=50, workers=1, requests_per_second=1.0, client=None, cache=None,
+                    parser_backend=DEFAULT_PARSER_BACKEND, parse_workers=0, metrics=None, checkpoint=None,
+                    rate_limiter=None, archive=None, timestamp=None):
+    """Scrape products from all pages of the website with error handling.
+
+    With ``workers > 1`` the page URLs are computed from the numbered pagination
+    links and up to ``workers`` pages are fetched at once. Requests to the same
+    host are spaced by ``requests_per_second`` in both modes, and products are
+    always returned in page order. Pages are fetched through ``client`` (the
+    shared pooled ``HttpClient`` by default), whose counters are logged at the end.
+    An optional ``ResponseCache`` turns repeat crawls into conditional requests
+    and skips parsing of pages whose body has not changed. ``parser_backend``
+    selects the HTML parser from ``utils.parsers``. ``parse_workers > 0`` moves
+    parsing onto a process pool of that size so pages fetched concurrently are
+    parsed on several cores. With a ``RunMetrics`` (see ``utils.metrics``) the
+    fetch and parse latency of every page and the HTTP counters are recorded.
+    With a ``CrawlCheckpoint`` (see ``utils.checkpoint``) every completed page
+    is persisted, and a crawl that stopped early resumes after the last page
+    it completed instead of starting again from page 1. ``rate_limiter``
+    replaces the fixed ``requests_per_second`` spacing, e.g. with an
+    ``AdaptiveRateLimiter`` that follows the server's latency and throttling.
+    With a ``PageArchive`` (see ``utils.archive``) every fetched page is
+    archived under the run timestamp, so the run can be replayed offline.
+    ``timestamp`` overrides the run timestamp (default: now), e.g. for a replay.
+    """
+    products = []
+    for batch in iter_product_batches(base_url, max_pages, workers, requests_per_second, client, cache,
+                                      parser_backend, parse_workers, metrics, checkpoint, rate_limiter,
+                                      archive, timestamp):
+        products.extend(batch)
+    return products
+
+def scrape_product_frame(base_url, max_pages=50, workers=1, requests_per_second=1.0, client=None, cache=None,
+                         parser_backend=DEFAULT_PARSER_BACKEND, parse_workers=0, metrics=None, checkpoint=None,
+                         rate_limiter=None, archive=None, timestamp=None, arrow=False):
+    """Scrape like :func:`scrape_products`, but return a DataFrame (or Arrow table with ``arrow=True``).
+
+    Products are parsed straight into tuples and collected in column
+    buffers, so no per-product dict is built and the run ``Timestamp`` is
+    stored once rather than on every product. The columns match
+    ``pd.DataFrame(scrape_products(...))``.
+    """
+    columns = ProductColumns()
+    with closing(_iter_pages(base_url, max_pages, workers, requests_per_second, client, cache, parser_backend,
+                             parse_workers, metrics, checkpoint, rate_limiter, archive, timestamp,
+                             as_rows=True)) as pages:
+        for timestamp, rows in pages:
+            columns.timestamp = timestamp
+            columns.extend(rows)
+    return columns.to_arrow() if arrow else columns.to_frame()
+
+def iter_product_batches(base_url, max_pages=50, workers=1, requests_per_second=1.0, client=None, cache=None,
+                         parser_backend=DEFAULT_PARSER_BACKEND, parse_workers=0, metrics=None, checkpoint=None,
+                         rate_limiter=None, archive=None, timestamp=None):
+    """Yield the products of each scraped page as soon as it is parsed, in page order.
+
+    Takes the same options as :func:`scrape_products`; every product carries
+    the same run ``Timestamp``. When resuming from a checkpoint, the pages it
+    holds are yielded first (with their original timestamp) without refetching.
+    """
+    with closing(_iter_pages(base_url, max_pages, workers, requests_per_second, client, cache, parser_backend,
+                             parse_workers, metrics, checkpoint, rate_limiter, archive, timestamp)) as pages:
+        for _, page_products in pages:
+            yield page_products
+
+def _iter_pages(base_url, max_pages, workers, requests_per_second, client, cache, parser_backend, parse_workers,
+                metrics, checkpoint, rate_limiter, archive=None, timestamp=None, as_rows=False):
+    """Yield ``(timestamp, products)`` per page; dict products are tagged with the timestamp, rows are not."""
+    parse_pool = None
+    if parse_workers and parse_workers > 0:
+        parse_pool = ProcessPoolExecutor(max_workers=parse_workers,
+                                         mp_context=multiprocessing.get_context(PARSE_POOL_START_METHOD))
+    crawl = _Crawl(base_url, max_pages, rate_limiter or HostRateLimiter(requests_per_second),
+                   client or get_default_client(), cache, parser_backend, parse_pool, metrics, as_rows)
+    state = checkpoint.resume(base_url) if checkpoint else None
+    if state:
+        timestamp = state.timestamp
+    else:
+        timestamp = timestamp or datetime.now().isoformat()
+        if checkpoint:
+            checkpoint.start(base_url, timestamp)
+    if archive is not None:
+        crawl.archive = archive.writer(timestamp)
+    # The client and rate limiter may outlive this crawl (e.g. in resident mode), so
+    # only what happens from here on is reported for it
+    if isinstance(crawl.rate_limiter, AdaptiveRateLimiter):
+        crawl.rate_limiter.reset_summary()
+    try:
+        stats_before = crawl.client.stats_dict()
+    except Exception:
+        stats_before = {}
+
+    pages_done = len(state.pages) if state else 0
+    next_url = state.next_url if state else None
+    if pages_done and (not next_url or pages_done >= max_pages):
+        pages = iter(())  # the checkpoint already holds the whole crawl
+        crawl.complete = True
+    elif workers and workers > 1:
+        pages = crawl.concurrent(workers, next_url, pages_done)
+    else:
+        pages = crawl.serial(next_url or base_url, pages_done)
+    try:
+        for _, page_products, _ in (state.pages if state else ()):
+            page_products = _normalize_products(page_products, as_rows)
+            if not as_rows:
+                for product in page_products:
+                    product['Timestamp'] = timestamp
+            yield timestamp, page_products
+        for url, page_products, next_url in pages:
+            if not as_rows:
+                for product in page_products:
+                    product['Timestamp'] = timestamp
+            if checkpoint:
+                checkpoint.record_page(url, page_products, next_url)
+            yield timestamp, page_products
+        if checkpoint:
+            if crawl.complete:
+                checkpoint.complete()
+            else:
+                logger.warning(f"Crawl stopped early; the next run resumes from {checkpoint.path}")
+    finally:
+        if checkpoint:
+            checkpoint.close()
+        if hasattr(pages, 'close'):
+            pages.close()
+        if parse_pool is not None:
+            parse_pool.shutdown(cancel_futures=True)
+        if crawl.archive is not None:
+            try:
+                crawl.archive.close()
+                logger.info(f"Archived {crawl.archive.pages} pages of run {timestamp}")
+            except Exception as e:
+                logger.warning(f"Could not close page archive: {e}")
         try:
-            colors_text = product_div.find('p', string=lambda text: text and 'Colors' in text)
-            colors = colors_text.text.strip().split()[0] if colors_text else None
+            stats = {name: value - stats_before.get(name, 0) if isinstance(value, (int, float)) else value
+                     for name, value in crawl.client.stats_dict().items()}
+            logger.info(f"HTTP stats: {stats}")
+            if metrics is not None:
+                for name, value in stats.items():
+                    if isinstance(value, (int, float)):
+                        metrics.count(f'http_{name}', value)
         except Exception as e:
-            logger.warning(f"Error extracting colors: {e}")
-        
-        # Size extraction
-        size = None
+            logger.warning(f"Could not collect HTTP stats: {e}")
+        if isinstance(crawl.rate_limiter, AdaptiveRateLimiter):
+            crawl.rate_limiter.log_summary()
+
+class _Crawl:
+    """Settings and shared resources of a single crawl."""
+
+    def __init__(self, base_url, max_pages, rate_limiter, client, cache, parser_backend, parse_pool=None,
+                 metrics=None, as_rows=False):
+        self.base_url = base_url
+        self.max_pages = max_pages
+        self.rate_limiter = rate_limiter
+        self.client = client
+        self.cache = cache
+        self.parser_backend = parser_backend
+        self.parse_pool = parse_pool
+        self.metrics = metrics
+        self.as_rows = as_rows
+        # ArchiveWriter that keeps a copy of every fetched page, if archiving
+        self.archive = None
+        # Set once the crawl ran out of pages or reached max_pages rather than failing
+        self.complete = False
+
+    def fetch(self, url, missing_ok=False):
+        self.rate_limiter.acquire(url)
+        observer = getattr(self.rate_limiter, 'observe', None)
+        start = time.perf_counter()
+        html_content = fetch_page_content(url, client=self.client, cache=self.cache, observer=observer,
+                                          missing_ok=missing_ok)
+        if self.metrics is not None:
+            self.metrics.observe('page_fetch', time.perf_counter() - start)
+            if html_content:
+                self.metrics.count('pages_fetched')
+                self.metrics.count('html_bytes', len(html_content.encode('utf-8')))
+        if html_content and self.archive is not None:
+            try:
+                self.archive.append(url, html_content)
+            except Exception as e:
+                logger.warning(f"Could not archive {url}: {e}")
+        return html_content
+
+    def load(self, url, html_content):
+        if self.metrics is None:
+            return load_page(url, html_content, self.base_url, self.cache, self.parser_backend, self.parse_pool,
+                             self.as_rows)
+        start = time.perf_counter()
+        loaded = load_page(url, html_content, self.base_url, self.cache, self.parser_backend, self.parse_pool,
+                           self.as_rows)
+        self.metrics.observe('page_parse', time.perf_counter() - start)
+        return loaded
+
+    def fetch_and_load(self, url, missing_ok=False):
+        """Fetch and parse one page; returns None if the page could not be fetched."""
+        html_content = self.fetch(url, missing_ok)
+        if not html_content:
+            return None
+        return self.load(url, html_content)
+
+    def serial(self, start_url, pages_scraped=0):
+        """Follow the next-page links one page at a time, yielding ``(url, products, next_url)`` per page."""
+        current_url = start_url
+
         try:
-            size_text = product_div.find('p', string=lambda text: text and 'Size:' in text)
-            size = size_text.text.replace('Size:', '').strip() if size_text else None
+            while current_url and pages_scraped < self.max_pages:
+                logger.info(f"Scraping page {pages_scraped + 1}...")
+
+                html_content = self.fetch(current_url)
+                if not html_content:
+                    logger.warning(f"Failed to fetch content from {current_url}")
+                    break
+
+                try:
+                    page_url = current_url
+                    page_products, current_url = self.load(current_url, html_content)
+                    if not page_products:
+                        logger.warning(f"No products found on page {pages_scraped + 1}")
+                    pages_scraped += 1
+
+                except Exception as page_err:
+                    logger.error(f"Error processing page {pages_scraped + 1}: {page_err}")
+                    break
+
+                yield page_url, page_products, current_url
+            else:
+                self.complete = True
+
         except Exception as e:
-            logger.warning(f"Error extracting size: {e}")
-        
-        # Gender extraction
-        gender = None
+            logger.error(f"Fatal error in scrape_products: {e}")
+
+    def concurrent(self, workers, next_url=None, pages_scraped=0):
+        """Fetch and parse numbered pages ahead of time on a thread pool, yielding them in page order.
+
+        Yields ``(url, products, next_url)`` per page. To resume a crawl, pass
+        the next-page URL and the number of pages already scraped.
+        """
         try:
-            gender_text = product_div.find('p', string=lambda text: text and 'Gender:' in text)
-            gender = gender_text.text.replace('Gender:', '').strip() if gender_text else None
-        except Exception as e:
-            logger.warning(f"Error extracting gender: {e}")
-        
-        return {
-            'Title': title,
-            'Price': price,
-            'Rating': rating,
-            'Colors': colors,
-            'Size': size,
-            'Gender': gender
-        }
-        
-    except Exception as e:
-        logger.error(f"Error parsing product details: {e}")
-        return None
+            if not pages_scraped:
+                # The first page tells us how the pagination links are numbered
+                logger.info("Scraping page 1...")
+                html_content = self.fetch(self.base_url)
+                if not html_content:
+                    logger.warning(f"Failed to fetch content from {self.base_url}")
+                    return
 
-def scrape_products(base_url, max_pages=50):
-    """Scrape products from all pages of the website with error handling."""
-    products = []
-    timestamp = datetime.now().isoformat()
-    current_url = base_url
-    pages_scraped = 0
-    
-    try:
-        while current_url and pages_scraped < max_pages:
-            logger.info(f"Scraping page {pages_scraped + 1}...")
-            
-            html_content = fetch_page_content(current_url)
-            if not html_content:
-                logger.warning(f"Failed to fetch content from {current_url}")
-                break
-                
-            try:
-                soup = BeautifulSoup(html_content, 'html.parser')
-                
-                # Extract products from current page
-                product_divs = soup.find_all('div', class_='product-details')
-                if not product_divs:
-                    logger.warning(f"No products found on page {pages_scraped + 1}")
-                
-                for div in product_divs:
-                    product = parse_product_details(div)
-                    if product:
-                        product['Timestamp'] = timestamp
-                        products.append(product)
-                
-                # Find next page link
-                next_link = soup.find('li', class_='page-item next')
-                if next_link and next_link.find('a'):
-                    current_url = urljoin(base_url, next_link.find('a')['href'])
-                else:
-                    current_url = None
-                
-                pages_scraped += 1
-                time.sleep(1)  # Be polite with delay between requests
-                
-            except Exception as page_err:
-                logger.error(f"Error processing page {pages_scraped + 1}: {page_err}")
-                current_url = None
-        
-    except Exception as e:
-        logger.error(f"Fatal error in scrape_products: {e}")
-    
-    return products
\ No newline at end of file
+                try:
+                    page_products, next_url = self.load(self.base_url, html_content)
+                except Exception as page_err:
+                    logger.error(f"Error processing page 1: {page_err}")
+                    return
+                if not page_products:
+                    logger.warning("No products found on page 1")
+                pages_scraped = 1
+                yield self.base_url, page_products, next_url
+
+            template, first_number = page_url_template(next_url)
+            if next_url and not template:
+                logger.warning("Pagination links are not numbered; falling back to serial scraping")
+                yield from self.serial(next_url, pages_scraped=pages_scraped)
+                return
+            if not next_url:
+                self.complete = True
+                return
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pending = {}
+                try:
+                    page_number = first_number
+                    next_to_submit = first_number
+                    last_page = first_number + self.max_pages - pages_scraped - 1
+
+                    while next_url and page_number <= last_page:
+                        # Keep the window of in-flight pages full
+                        while next_to_submit <= last_page and len(pending) < workers:
+                            url = urljoin(self.base_url, template.format(page=next_to_submit))
+                            # Pages past the real last one are expected to be missing
+                            pending[next_to_submit] = (url, executor.submit(self.fetch_and_load, url, True))
+                            next_to_submit += 1
+
+                        url, future = pending.pop(page_number)
+                        logger.info(f"Scraping page {page_number}...")
+                        try:
+                            loaded = future.result()
+                        except Exception as page_err:
+                            logger.error(f"Error processing page {page_number}: {page_err}")
+                            break
+                        if loaded is None:
+                            # The previous page linked here, so the page should have existed
+                            logger.error(f"Failed to fetch content from {url}")
+                            break
+                        page_products, next_url = loaded
+                        if not page_products:
+                            logger.warning(f"No products found on page {page_number}")
+                        page_number += 1
+                        yield url, page_products, next_url
+                    else:
+                        self.complete = True
+                finally:
+                    # Pages fetched speculatively past the end are discarded
+                    for _, future in pending.values():
+                        future.cancel()
+
+        except Exception as e:
+            logger.error(f"Fatal error in scrape_products: {e}")
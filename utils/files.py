@@ -0,0 +1,44 @@
+import os
+import tempfile
+from pathlib import Path
+
+
+def _current_umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+# Read once at import: the umask can only be read by changing it, which is not thread-safe
+_UMASK = _current_umask()
+
+
+def safe_name(value) -> str:
+    """``value`` as a file name part; ISO timestamps contain ':' which not every filesystem accepts."""
+    return ''.join(ch if ch.isalnum() or ch in '-.' else '_' for ch in str(value))
+
+def match_target_mode(tmp_path, target):
+    """Give a temporary file the permissions of ``target``, or of a new file if there is none yet.
+
+    ``tempfile.mkstemp`` creates files only their owner can read, and
+    ``os.replace`` keeps that mode; call this before replacing ``target``.
+    """
+    try:
+        mode = os.stat(target).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    os.chmod(tmp_path, mode)
+
+def write_atomic(path, content: str):
+    """Write text to ``path`` through a temporary file, so readers never see a half-written file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        match_target_mode(tmp_path, path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
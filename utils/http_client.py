@@ -0,0 +1,164 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# Status codes worth another attempt: throttling and transient server errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class HttpStats:
+    """Thread-safe counters describing the traffic sent through an HttpClient."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        # 404s are answers (e.g. to pages fetched ahead past the last one), not failures
+        self.not_found = 0
+        self.bytes_received = 0
+
+    def record(self, requests=0, retries=0, failures=0, not_found=0, bytes_received=0):
+        with self._lock:
+            self.requests += requests
+            self.retries += retries
+            self.failures += failures
+            self.not_found += not_found
+            self.bytes_received += bytes_received
+
+
+class HttpClient:
+    """Pooled keep-alive session with retries, exponential backoff with jitter and Retry-After support."""
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, backoff_max=30.0, timeout=10,
+                 pool_maxsize=10, headers=None):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.stats = HttpStats()
+
+        self.session = requests.Session()
+        self.session.headers.update(headers or HEADERS)
+        # Retries are handled here so every attempt is counted and can honour Retry-After
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url, headers=None, observer=None):
+        """GET `url`, retrying timeouts, connection errors and retryable statuses.
+
+        Returns the final response (which may still carry an error status) or
+        raises the last requests exception once all attempts are used up.
+        ``observer(url, status, seconds, retry_after)`` is called after every
+        attempt (``status`` is None when no response arrived), e.g. to feed an
+        ``AdaptiveRateLimiter``.
+        """
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as err:
+                if observer is not None:
+                    observer(url, None, time.perf_counter() - start)
+                self.stats.record(requests=1)
+                if attempt >= self.max_retries:
+                    self.stats.record(failures=1)
+                    raise
+                delay = self.backoff_delay(attempt)
+                logger.warning(f"{type(err).__name__} for {url}, retrying in {delay:.2f}s")
+            else:
+                body = response.content
+                if observer is not None:
+                    retry_after = self.retry_after(response) if response.status_code in RETRY_STATUSES else None
+                    observer(url, response.status_code, time.perf_counter() - start, retry_after)
+                self.stats.record(requests=1, bytes_received=len(body) if isinstance(body, bytes) else 0)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    if response.status_code == 404:
+                        self.stats.record(not_found=1)
+                    elif response.status_code >= 400:
+                        self.stats.record(failures=1)
+                    return response
+                delay = self.retry_after(response)
+                if delay is None:
+                    delay = self.backoff_delay(attempt)
+                logger.warning(f"HTTP {response.status_code} for {url}, retrying in {delay:.2f}s")
+
+            attempt += 1
+            self.stats.record(retries=1)
+            time.sleep(delay)
+
+    def backoff_delay(self, attempt):
+        """Full-jitter exponential backoff for the given zero-based attempt."""
+        ceiling = min(self.backoff_max, self.backoff_factor * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def retry_after(self, response):
+        """Seconds requested by a Retry-After header (delta-seconds or HTTP date), capped at backoff_max."""
+        value = response.headers.get('Retry-After')
+        if not isinstance(value, str) or not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+            if when.tzinfo is None:
+                when = when.replace(tzinfo=timezone.utc)
+            seconds = (when - datetime.now(timezone.utc)).total_seconds()
+        return min(self.backoff_max, max(0.0, seconds))
+
+    def connection_counts(self):
+        """Return (new, reused) connection counts across the session's urllib3 pools."""
+        new_connections = 0
+        pool_requests = 0
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    new_connections += pool.num_connections
+                    pool_requests += pool.num_requests
+        return new_connections, max(0, pool_requests - new_connections)
+
+    def stats_dict(self):
+        new_connections, reused_connections = self.connection_counts()
+        return {
+            'requests': self.stats.requests,
+            'retries': self.stats.retries,
+            'failures': self.stats.failures,
+            'not_found': self.stats.not_found,
+            'bytes_received': self.stats.bytes_received,
+            'new_connections': new_connections,
+            'reused_connections': reused_connections,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def get_default_client():
+    """Return the process-wide HttpClient, creating it on first use."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
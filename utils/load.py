@@ -1,46 +1,75 @@
 import pandas as pd
-from sqlalchemy import create_engine
 import os
 import logging
-from typing import Optional
-from googleapiclient.errors import HttpError
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+from typing import Iterable, Optional, Sequence
+from functools import lru_cache
 from pathlib import Path
+from utils.cdc import DEFAULT_KEY_COLUMNS, VOLATILE_COLUMNS, ChangeSet, discard_snapshot
+from utils.csv_writer import AtomicCsvWriter
+from utils.engines import get_engine
+from utils.files import safe_name
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def save_to_csv(df: pd.DataFrame, filepath: str | Path) -> bool:
-    """Save DataFrame to CSV file with better error handling and logging."""
+# Rows handed to the CSV writer at a time
+CSV_CHUNKSIZE = 50_000
+
+# Seconds a single Sheets API request may take (the client waits forever by default)
+SHEETS_HTTP_TIMEOUT = 60
+
+def save_to_csv(df: pd.DataFrame, filepath: str | Path, append: bool = False, compression: Optional[str] = None,
+                chunksize: int = CSV_CHUNKSIZE) -> bool:
+    """Save DataFrame to CSV file with better error handling and logging.
+
+    The file is written in ``chunksize`` row batches to a temporary file and
+    renamed into place, so an interrupted run never leaves a truncated CSV.
+    ``append`` adds the rows to an existing file; ``compression`` is
+    ``'gzip'`` or ``'zstd'`` (or inferred from a ``.gz``/``.zst`` suffix).
+    """
+    writer = None
     try:
         if df.empty:
             logger.warning("Empty DataFrame provided for CSV export")
             return False
 
-        path = Path(filepath)
-        if path.suffix != '.csv':
-            path = path.with_suffix('.csv')
-        
-        path.parent.mkdir(parents=True, exist_ok=True)  # Pastikan direktori ada
-        df.to_csv(path, index=False, encoding='utf-8')
+        writer = AtomicCsvWriter(filepath, append=append, compression=compression)
+        for start in range(0, len(df), chunksize):
+            writer.write(df.iloc[start:start + chunksize])
+        path = writer.commit()
         logger.info(f"Successfully saved {len(df)} rows to {path.resolve()}")
         return True
 
     except Exception as e:
+        if writer is not None:
+            writer.abort()
         logger.error(f"Unexpected error saving to CSV: {e}")
         return False
 
-def save_to_postgresql(df: pd.DataFrame, db_url: str, table_name: str = 'products') -> bool:
-    """Save DataFrame to PostgreSQL database with comprehensive error handling."""
+def save_to_postgresql(df: pd.DataFrame, db_url: str, table_name: str = 'products', mode: str = 'replace',
+                       key_columns: Sequence[str] = DEFAULT_KEY_COLUMNS, chunksize: Optional[int] = None,
+                       snapshot_file: str | Path | None = None) -> bool:
+    """Save DataFrame to PostgreSQL database with comprehensive error handling.
+
+    ``mode='replace'`` recreates the table with ``DataFrame.to_sql``, without
+    a key, and discards the CDC ``snapshot_file`` since the table no longer
+    matches it. The bulk modes keep a persistent keyed table and stream rows
+    with COPY (see ``utils.bulk_load``): ``'upsert'`` merges them on
+    ``key_columns`` and ``'swap'`` atomically replaces the table contents.
+    ``chunksize`` defaults to ``utils.bulk_load.DEFAULT_CHUNKSIZE``.
+    """
     try:
         if df.empty:
             logger.warning("Empty DataFrame provided for PostgreSQL export")
             return False
             
         try:
-            engine = create_engine(db_url)
+            engine = get_engine(db_url)
+            if mode != 'replace':
+                from utils.bulk_load import DEFAULT_CHUNKSIZE, bulk_load
+                bulk_load(df, engine, table_name, mode=mode, key_columns=key_columns,
+                          chunksize=chunksize or DEFAULT_CHUNKSIZE)
+                return True
+
             with engine.connect() as connection:
                 df.to_sql(
                     table_name,
@@ -49,6 +78,8 @@ def save_to_postgresql(df: pd.DataFrame, db_url: str, table_name: str = 'product
                     index=False,
                     method='multi'
                 )
+            if snapshot_file:
+                discard_snapshot(snapshot_file)
             logger.info(f"Successfully saved {len(df)} rows to PostgreSQL table {table_name}")
             return True
             
@@ -63,8 +94,101 @@ def save_to_postgresql(df: pd.DataFrame, db_url: str, table_name: str = 'product
         logger.error(f"Unexpected error saving to PostgreSQL: {e}")
         return False
 
+def apply_changes_to_postgresql(changes: ChangeSet, db_url: str, table_name: str = 'products',
+                                key_columns: Sequence[str] = DEFAULT_KEY_COLUMNS) -> bool:
+    """Apply a change-data-capture delta: upsert inserted/updated rows and delete removed keys.
+
+    Without a previous snapshot, or when the table has lost its key on
+    ``key_columns`` (e.g. it was rewritten by ``to_sql``), every current row
+    is swapped in instead.
+    """
+    if changes.initial:
+        return save_to_postgresql(changes.inserts, db_url, table_name, mode='swap', key_columns=key_columns)
+    if changes.is_empty():
+        logger.info(f"No changes to apply to PostgreSQL table {table_name}")
+        return True
+
+    try:
+        from utils.bulk_load import bulk_load, has_key
+        engine = get_engine(db_url)
+        with engine.connect() as connection:
+            keyed = has_key(connection, table_name, key_columns)
+        if not keyed:
+            logger.warning(f"PostgreSQL table {table_name} has no key on {tuple(key_columns)}; "
+                           f"replacing it with all {len(changes.current)} current rows")
+            return save_to_postgresql(changes.current, db_url, table_name, mode='swap', key_columns=key_columns)
+        bulk_load(changes.upserts, engine, table_name, mode='upsert', key_columns=key_columns,
+                  delete_keys=changes.deletes)
+        logger.info(f"Applied {changes.summary()} to PostgreSQL table {table_name}")
+        return True
+    except Exception as e:
+        logger.error(f"Database error: {e}")
+        return False
+
+def load_many(db_url: str, tables: Iterable[tuple[str, pd.DataFrame]], if_exists: str = 'append') -> bool:
+    """Write several ``(table_name, DataFrame)`` pairs over one connection, in one transaction.
+
+    A table may appear more than once: its first batch is written with
+    ``if_exists`` and later ones are appended. If any write fails, nothing
+    is committed.
+    """
+    written = {}
+    try:
+        with get_engine(db_url).begin() as connection:
+            for table_name, df in tables:
+                if df.empty:
+                    continue
+                df.to_sql(
+                    table_name,
+                    con=connection,
+                    if_exists='append' if table_name in written else if_exists,
+                    index=False,
+                    method='multi'
+                )
+                written[table_name] = written.get(table_name, 0) + len(df)
+    except Exception as e:
+        logger.error(f"Database error, rolled back all tables: {e}")
+        return False
+
+    if not written:
+        logger.warning("No rows provided for PostgreSQL export")
+        return False
+    logger.info("Successfully saved " + ", ".join(f"{rows} rows to {name}" for name, rows in written.items()))
+    return True
+
+@lru_cache(maxsize=None)
+def _sheets_service(credentials_file: str):
+    """Build an authenticated Google Sheets API client, reused for the life of the process."""
+    # The Google API client takes a few hundred milliseconds to import and only this sink needs it
+    import httplib2
+    from google.oauth2.service_account import Credentials
+    from google_auth_httplib2 import AuthorizedHttp
+    from googleapiclient.discovery import build
+
+    scopes = ['https://www.googleapis.com/auth/spreadsheets']
+    creds = Credentials.from_service_account_file(
+        credentials_file,
+        scopes=scopes
+    )
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=SHEETS_HTTP_TIMEOUT))
+    return build('sheets', 'v4', http=http)
+
 def save_to_google_sheets(df: pd.DataFrame, spreadsheet_id: str, credentials_file: str = 'google-sheets-api.json') -> bool:
-    """Save DataFrame to Google Sheets."""
+    """Save DataFrame to Google Sheets.
+
+    The current sheet contents are read first and only the rows that differ
+    are written, as bounded ``values.batchUpdate`` requests; surplus rows from
+    a longer previous upload are cleared. A row whose only difference is a
+    volatile column (``utils.cdc.VOLATILE_COLUMNS``, e.g. the run Timestamp)
+    is left as it is. Quota and server errors are retried.
+    """
+    try:
+        from googleapiclient.errors import HttpError
+        from utils.sheets import batch_requests, execute_with_retry, plan_updates
+    except ImportError as import_err:
+        logger.error(f"Google API client error: {import_err}")
+        return False
+
     try:
         # Validate input
         if not os.path.exists(credentials_file):
@@ -72,33 +196,33 @@ def save_to_google_sheets(df: pd.DataFrame, spreadsheet_id: str, credentials_fil
             return False
 
         # Authenticate with Google Sheets API
-        scopes = ['https://www.googleapis.com/auth/spreadsheets']
-        creds = Credentials.from_service_account_file(
-            credentials_file, 
-            scopes=scopes
-        )
-        service = build('sheets', 'v4', credentials=creds)
-        sheet = service.spreadsheets()
+        sheet = _sheets_service(credentials_file).spreadsheets()
 
         # Convert dataframe to list of lists
         values = [df.columns.tolist()]
         values.extend(df.values.tolist())
 
-        # Clear existing data first
-        sheet.values().clear(
+        existing = execute_with_retry(sheet.values().get(
             spreadsheetId=spreadsheet_id,
-            range='A:Z'  # Clear all columns
-        ).execute()
+            range='A:Z',
+            valueRenderOption='UNFORMATTED_VALUE'
+        ))
+        volatile = [index for index, column in enumerate(df.columns) if column in VOLATILE_COLUMNS]
+        ranges, clear_range = plan_updates(list(existing.get('values', [])), values, ignore_columns=volatile)
 
-        # Update spreadsheet
-        result = sheet.values().update(
-            spreadsheetId=spreadsheet_id,
-            range='A1',
-            valueInputOption='USER_ENTERED',
-            body={'values': values}
-        ).execute()
+        updated_cells = 0
+        for data in batch_requests(ranges):
+            result = execute_with_retry(sheet.values().batchUpdate(
+                spreadsheetId=spreadsheet_id,
+                body={'valueInputOption': 'USER_ENTERED', 'data': data}
+            ))
+            updated_cells += result.get('totalUpdatedCells') or 0
+
+        if clear_range:
+            execute_with_retry(sheet.values().clear(spreadsheetId=spreadsheet_id, range=clear_range))
 
-        logger.info(f"Data saved to Google Sheets. Updated cells: {result.get('updatedCells')}")
+        logger.info(f"Data saved to Google Sheets. Changed row ranges: {len(ranges)}, "
+                    f"updated cells: {updated_cells}, cleared: {clear_range or 'nothing'}")
         return True
 
     except HttpError as e:
@@ -106,4 +230,240 @@ def save_to_google_sheets(df: pd.DataFrame, spreadsheet_id: str, credentials_fil
         return False
     except Exception as e:
         logger.error(f"Error saving to Google Sheets: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def _partition_name(timestamp) -> str:
+    # Hive-style directory name
+    return 'run=' + safe_name(timestamp)
+
+def save_to_parquet(df: pd.DataFrame, root_dir: str | Path, compression: str = 'zstd',
+                    dictionary_columns: Sequence[str] = ('Size', 'Gender')) -> bool:
+    """Save DataFrame as Parquet, one partition directory per run Timestamp.
+
+    ``dictionary_columns`` are dictionary-encoded. Each file is written under a
+    hidden temporary name and renamed into place, so readers never see a
+    partial snapshot and earlier runs are kept as history.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as import_err:
+        logger.error(f"Parquet export needs pyarrow: {import_err}")
+        return False
+
+    try:
+        if df.empty:
+            logger.warning("Empty DataFrame provided for Parquet export")
+            return False
+
+        root = Path(root_dir)
+        groups = df.groupby('Timestamp', sort=False) if 'Timestamp' in df.columns else [('unknown', df)]
+        written = 0
+        for timestamp, run_df in groups:
+            table = pa.Table.from_pandas(run_df.reset_index(drop=True), preserve_index=False)
+            for name in dictionary_columns:
+                if name in table.column_names and not pa.types.is_dictionary(table.schema.field(name).type):
+                    index = table.schema.get_field_index(name)
+                    table = table.set_column(index, name, table.column(name).cast(pa.string()).dictionary_encode())
+
+            partition = root / _partition_name(timestamp)
+            partition.mkdir(parents=True, exist_ok=True)
+            target = partition / 'part-0.parquet'
+            tmp_path = partition / f'.part-0.parquet.{os.getpid()}.tmp'
+            try:
+                pq.write_table(table, tmp_path, compression=compression, use_dictionary=True)
+                os.replace(tmp_path, target)
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+            written += table.num_rows
+
+        logger.info(f"Successfully saved {written} rows as Parquet under {root.resolve()}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Unexpected error saving to Parquet: {e}")
+        return False
+
+def read_parquet_snapshots(root_dir: str | Path, columns: Sequence[str] | None = None,
+                           run: str | None = None) -> pd.DataFrame:
+    """Read Parquet snapshots (all runs, or the one whose Timestamp is ``run``) with memory mapping.
+
+    Only the requested ``columns`` are read from disk.
+    """
+    import pyarrow.parquet as pq
+
+    source = Path(root_dir)
+    if run is not None:
+        source = source / _partition_name(run)
+    table = pq.read_table(source, columns=list(columns) if columns else None, memory_map=True)
+    return table.to_pandas()
+
+class CsvBatchWriter:
+    """Append DataFrame batches to one CSV file as they arrive.
+
+    The file is only moved into place by :meth:`close`, once every batch is written.
+    """
+
+    name = 'CSV'
+
+    def __init__(self, filepath: str | Path, append: bool = False, compression: Optional[str] = None):
+        self.writer = AtomicCsvWriter(filepath, append=append, compression=compression)
+        self.path = self.writer.path
+        self.failed = False
+
+    @property
+    def rows(self) -> int:
+        return self.writer.rows
+
+    def write(self, df: pd.DataFrame) -> bool:
+        try:
+            self.writer.write(df)
+            return True
+        except Exception as e:
+            logger.error(f"Unexpected error saving to CSV: {e}")
+            self.failed = True
+            return False
+
+    def close(self) -> bool:
+        if self.failed or self.rows == 0:
+            self.writer.abort()
+            if not self.failed:
+                logger.warning("No rows were written to CSV")
+            return False
+        try:
+            self.writer.commit()
+        except Exception as e:
+            logger.error(f"Unexpected error saving to CSV: {e}")
+            self.writer.abort()
+            return False
+        logger.info(f"Successfully saved {self.rows} rows to {self.path.resolve()}")
+        return True
+
+class PostgresBatchWriter:
+    """Write DataFrame batches to a PostgreSQL table, committing each batch as it arrives.
+
+    The first batch replaces the table, later batches are appended. The
+    table is rewritten without a key, so the CDC ``snapshot_file`` is discarded.
+    """
+
+    name = 'PostgreSQL'
+
+    def __init__(self, db_url: str, table_name: str = 'products', snapshot_file: str | Path | None = None):
+        self.db_url = db_url
+        self.table_name = table_name
+        self.snapshot_file = snapshot_file
+        self.rows = 0
+
+    def write(self, df: pd.DataFrame) -> bool:
+        try:
+            with get_engine(self.db_url).begin() as connection:
+                df.to_sql(
+                    self.table_name,
+                    con=connection,
+                    if_exists='replace' if self.rows == 0 else 'append',
+                    index=False,
+                    method='multi'
+                )
+            if self.rows == 0 and self.snapshot_file:
+                discard_snapshot(self.snapshot_file)
+            self.rows += len(df)
+            return True
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            return False
+
+    def close(self) -> bool:
+        if self.rows == 0:
+            logger.warning("No rows were written to PostgreSQL")
+            return False
+        logger.info(f"Successfully saved {self.rows} rows to PostgreSQL table {self.table_name}")
+        return True
+
+class GoogleSheetsBatchWriter:
+    """Write DataFrame batches to Google Sheets, row after row from the top of the sheet.
+
+    Batches overwrite the previous upload in place, so readers never see an
+    empty sheet; rows left over from a longer previous upload are cleared on
+    :meth:`close`.
+    """
+
+    name = 'Google Sheets'
+
+    def __init__(self, spreadsheet_id: str, credentials_file: str = 'google-sheets-api.json'):
+        self.spreadsheet_id = spreadsheet_id
+        self.credentials_file = credentials_file
+        self.rows = 0
+        self._sheet = None
+
+    def write(self, df: pd.DataFrame) -> bool:
+        try:
+            from googleapiclient.errors import HttpError
+            from utils.sheets import MAX_ROWS_PER_RANGE, batch_requests, execute_with_retry
+        except ImportError as import_err:
+            logger.error(f"Google API client error: {import_err}")
+            return False
+
+        try:
+            if self._sheet is None:
+                if not os.path.exists(self.credentials_file):
+                    logger.error(f"Credentials file not found: {self.credentials_file}")
+                    return False
+                self._sheet = _sheets_service(self.credentials_file).spreadsheets()
+
+            values = df.values.tolist()
+            if self.rows == 0:
+                values.insert(0, df.columns.tolist())
+                first_row = 1
+            else:
+                first_row = self.rows + 2  # below the header and the rows written so far
+            ranges = [{'range': f'A{first_row + start}', 'values': values[start:start + MAX_ROWS_PER_RANGE]}
+                      for start in range(0, len(values), MAX_ROWS_PER_RANGE)]
+            for data in batch_requests(ranges):
+                execute_with_retry(self._sheet.values().batchUpdate(
+                    spreadsheetId=self.spreadsheet_id,
+                    body={'valueInputOption': 'USER_ENTERED', 'data': data}
+                ))
+            self.rows += len(df)
+            return True
+        except HttpError as e:
+            logger.error(f"Google Sheets API error: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"Error saving to Google Sheets: {e}")
+            return False
+
+    def close(self) -> bool:
+        if self.rows == 0:
+            logger.warning("No rows were written to Google Sheets")
+            return False
+        clear_range = f'A{self.rows + 2}:Z'
+        try:
+            from utils.sheets import execute_with_retry
+            execute_with_retry(self._sheet.values().clear(spreadsheetId=self.spreadsheet_id, range=clear_range))
+        except Exception as e:
+            logger.error(f"Could not clear leftover Google Sheets rows {clear_range}: {e}")
+            return False
+        logger.info(f"Data saved to Google Sheets. Wrote {self.rows} rows in batches, cleared {clear_range}")
+        return True
+
+def write_batches(batches, writers) -> dict:
+    """Feed every batch to every writer as it arrives and return each writer's success.
+
+    A writer that fails is skipped for the remaining batches; the others carry on.
+    """
+    ok = {writer.name: True for writer in writers}
+    for batch in batches:
+        for writer in writers:
+            if ok[writer.name] and not writer.write(batch):
+                logger.error(f"{writer.name} writer failed; skipping it for the remaining batches")
+                ok[writer.name] = False
+
+    for writer in writers:
+        try:
+            closed = writer.close()
+        except Exception as e:
+            logger.error(f"Error closing {writer.name} writer: {e}")
+            closed = False
+        ok[writer.name] = ok[writer.name] and closed
+    return ok
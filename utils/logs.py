@@ -0,0 +1,172 @@
+import atexit
+import copy
+import json
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOG_FILE = 'etl_pipeline.log'
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Records tagged with the same ``aggregate`` key are written at most this many
+# times per window; the rest are only counted
+REPEAT_LIMIT = 5
+REPEAT_WINDOW = 60.0
+
+# LogRecord attributes that are not ``extra`` fields
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_listener = None
+_queue_handler = None
+_repeat_filter = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, ``extra`` fields and any traceback."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_FIELDS)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RepeatFilter(logging.Filter):
+    """Let through at most ``limit`` records per ``aggregate`` key in each ``window`` seconds; count the rest.
+
+    Tag a message that can repeat once per product with
+    ``extra={'aggregate': key}``. The first record let through in a new window
+    carries the number dropped in the previous one as ``suppressed``, and
+    :meth:`flush` returns whatever is still pending. Untagged records always pass.
+    """
+
+    def __init__(self, limit=REPEAT_LIMIT, window=REPEAT_WINDOW):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.suppressed = Counter()
+        self._windows = {}  # key -> [window start, records seen, records dropped]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, 'aggregate', None)
+        if key is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None or now - state[0] >= self.window:
+                if state is not None and state[2]:
+                    record.suppressed = state[2]
+                self._windows[key] = [now, 1, 0]
+                return True
+            state[1] += 1
+            if state[1] <= self.limit:
+                return True
+            state[2] += 1
+            self.suppressed[key] += 1
+            return False
+
+    def flush(self):
+        """Counts dropped since each key's last written record, by key; resets the windows."""
+        with self._lock:
+            pending = {key: state[2] for key, state in self._windows.items() if state[2]}
+            self._windows.clear()
+        return pending
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Only merge the message here; formatting happens on the listener thread.
+        # The traceback is kept apart so the JSON formatter can give it its own field.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        if getattr(record, 'suppressed', 0):
+            record.msg += f" ({record.suppressed} similar messages suppressed)"
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(level=logging.INFO, log_file=LOG_FILE, json_format=False, repeat_limit=REPEAT_LIMIT,
+                      repeat_window=REPEAT_WINDOW):
+    """Route all logging through a queue to a background thread that writes stderr and ``log_file``.
+
+    Logging calls only put the record on the queue, so slow disks or
+    terminals never stall the crawl. With ``json_format`` both outputs get one
+    JSON object per record. Messages tagged with an ``aggregate`` key are
+    rate-limited (see :class:`RepeatFilter`). Call :func:`stop_logging` (also
+    run at exit) to drain the queue.
+    """
+    global _listener, _queue_handler, _repeat_filter
+    stop_logging()
+
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _repeat_filter = RepeatFilter(repeat_limit, repeat_window)
+    _queue_handler = _QueueHandler(log_queue)
+    _queue_handler.addFilter(_repeat_filter)
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_queue_handler)
+    return _listener
+
+def stop_logging():
+    """Report suppressed message counts, write out everything queued and close the log handlers."""
+    global _listener, _queue_handler, _repeat_filter
+    if _listener is None:
+        return
+    pending = _repeat_filter.flush()
+    if pending:
+        logger.warning("Suppressed repeated log messages: "
+                       + ", ".join(f"{key}: {count}" for key, count in pending.items()))
+
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = _queue_handler = _repeat_filter = None
+
+def _after_fork_in_child():
+    # The listener thread does not exist in a forked child (e.g. a parse pool
+    # worker), so the child writes to the inherited handlers directly
+    global _listener, _queue_handler, _repeat_filter
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    _repeat_filter._lock = threading.Lock()
+    for handler in _listener.handlers:
+        handler.addFilter(_repeat_filter)
+        root.addHandler(handler)
+    _listener = _queue_handler = _repeat_filter = None
+
+atexit.register(stop_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,167 @@
+import json
+import math
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import logging
+
+from utils.files import write_atomic
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 90, 99)
+
+def peak_rss_bytes():
+    """High-water mark of this process's resident memory, or None where it is not available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux and the BSDs KiB
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class RunMetrics:
+    """Timings, memory, row counts and latency samples of one pipeline run.
+
+    Stages are timed with :meth:`stage`; per-page latencies are added with
+    :meth:`observe` (thread-safe) and reported as percentiles. With
+    ``trace_memory=True`` each stage also records its tracemalloc peak, which
+    is exact but slows allocation-heavy code down noticeably.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.started = datetime.now()
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.counters = defaultdict(int)
+        self.status = None
+        self._samples = defaultdict(list)
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int | None = None):
+        """Time the enclosed block; set ``rows_out`` on the yielded dict to record the stage output."""
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None}
+        rss_before = peak_rss_bytes()
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_seconds'] = round(time.perf_counter() - wall, 4)
+            record['cpu_seconds'] = round(time.process_time() - cpu, 4)
+            rss_after = peak_rss_bytes()
+            record['peak_rss_bytes'] = rss_after
+            record['rss_growth_bytes'] = rss_after - rss_before if rss_after is not None else None
+            if self.trace_memory:
+                record['traced_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+                if tracing:
+                    tracemalloc.stop()
+            with self._lock:
+                self.stages.append(record)
+            logger.info(f"Stage {name} took {record['wall_seconds']:.2f}s wall, {record['cpu_seconds']:.2f}s CPU"
+                        + (f", {record['rows_in']} -> {record['rows_out']} rows" if rows_in is not None else ""))
+
+    def add_stage(self, name: str, wall_seconds: float, **fields):
+        """Record a stage timed elsewhere, e.g. a sink that ran on another thread."""
+        with self._lock:
+            self.stages.append({'stage': name, 'wall_seconds': round(wall_seconds, 4), **fields})
+
+    def observe(self, name: str, seconds: float):
+        """Add one latency sample (e.g. the fetch of a single page) to the ``name`` series."""
+        with self._lock:
+            self._samples[name].append(seconds)
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] += value
+
+    def latencies(self) -> dict:
+        """Sample count, percentiles and maximum of every latency series."""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+        summary = {}
+        for name, values in samples.items():
+            summary[name] = {'count': len(values), 'total_seconds': round(sum(values), 4)}
+            for pct in PERCENTILES:
+                summary[name][f'p{pct}'] = round(percentile(values, pct), 4)
+            summary[name]['max'] = round(values[-1], 4)
+        return summary
+
+    def report(self) -> dict:
+        return {
+            'started': self.started.isoformat(),
+            'wall_seconds': round(time.perf_counter() - self._start, 4),
+            'status': self.status,
+            'peak_rss_bytes': peak_rss_bytes(),
+            'stages': list(self.stages),
+            'counters': dict(self.counters),
+            'latencies': self.latencies(),
+        }
+
+    def write_json(self, path: str | Path) -> Path:
+        """Write the run report as JSON and return its path."""
+        path = Path(path)
+        write_atomic(path, json.dumps(self.report(), indent=2, default=str) + '\n')
+        return path
+
+    def write_prometheus(self, path: str | Path) -> Path:
+        """Write the run report in the Prometheus text format, for node_exporter's textfile collector."""
+        report = self.report()
+        lines = []
+
+        def metric(name, help_text, samples):
+            samples = [(labels, value) for labels, value in samples if value is not None]
+            if not samples:
+                return
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+
+        metric('etl_run_timestamp_seconds', 'Start time of the last run.', [({}, self.started.timestamp())])
+        metric('etl_run_success', 'Whether the last run succeeded.',
+               [({}, None if report['status'] is None else int(report['status'] == 'success'))])
+        metric('etl_run_wall_seconds', 'Wall time of the last run.', [({}, report['wall_seconds'])])
+        metric('etl_run_peak_rss_bytes', 'Peak resident memory of the last run.', [({}, report['peak_rss_bytes'])])
+        for field, help_text in (('wall_seconds', 'Wall time per stage.'), ('cpu_seconds', 'CPU time per stage.'),
+                                 ('rows_in', 'Rows entering each stage.'), ('rows_out', 'Rows leaving each stage.'),
+                                 ('peak_rss_bytes', 'Peak resident memory after each stage.')):
+            metric(f'etl_stage_{field}', help_text, [({'stage': stage['stage']}, stage.get(field))
+                                                     for stage in report['stages']])
+        metric('etl_run_counter', 'Counters of the last run.',
+               [({'name': name}, value) for name, value in sorted(report['counters'].items())])
+        metric('etl_latency_seconds', 'Latency percentiles of the last run.',
+               [({'series': name, 'quantile': str(pct / 100)}, summary[f'p{pct}'])
+                for name, summary in sorted(report['latencies'].items()) for pct in PERCENTILES])
+
+        path = Path(path)
+        # Scrapers of the textfile collector must never read a half-written file
+        write_atomic(path, '\n'.join(lines) + '\n')
+        return path
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
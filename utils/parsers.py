@@ -0,0 +1,300 @@
+from functools import lru_cache
+from urllib.parse import urljoin
+import logging
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # pragma: no cover - optional fast path
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:  # pragma: no cover - older selectolax releases
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
+
+logger = logging.getLogger(__name__)
+
+# Column order of the compact rows returned by parse_page_rows
+PRODUCT_FIELDS = ('Title', 'Price', 'Rating', 'Colors', 'Size', 'Gender')
+
+# Markers looked up in the <p> lines of a product card, in output order
+FIELD_MARKERS = (
+    ('Rating', 'Rating:'),
+    ('Colors', 'Colors'),
+    ('Size', 'Size:'),
+    ('Gender', 'Gender:'),
+)
+
+# A malformed page can fail on every card: these errors are rate-limited by utils.logs
+PARSE_ERROR_LOG = {'aggregate': 'product_parse_error'}
+
+STRAINED_CLASSES = frozenset({'product-details', 'next'})
+
+def _strained_class(value):
+    # The class attribute may still be a raw space-separated string while parsing
+    if not value:
+        return False
+    tokens = value.split() if isinstance(value, str) else value
+    return not STRAINED_CLASSES.isdisjoint(tokens)
+
+@lru_cache(maxsize=None)
+def _catalogue_strainer():
+    # Only the product cards and the next-page link are needed from a catalogue page
+    from bs4 import SoupStrainer
+    return SoupStrainer(class_=_strained_class)
+
+def product_row_from_parts(title, price_text, lines):
+    """Build the ``PRODUCT_FIELDS`` tuple from a card's title, price text and the texts of its <p> lines.
+
+    ``lines`` holds, in document order, the text of every <p> whose content is
+    a single string (``None`` for the others), which mirrors how
+    ``find('p', string=...)`` selects lines. All markers are matched in one pass.
+    """
+    found = {}
+    for line in lines:
+        if line is None:
+            continue
+        for field, marker in FIELD_MARKERS:
+            if field not in found and marker in line:
+                found[field] = line
+        if len(found) == len(FIELD_MARKERS):
+            break
+
+    rating = found.get('Rating')
+    colors = found.get('Colors')
+    size = found.get('Size')
+    gender = found.get('Gender')
+    return (
+        title,
+        price_text.strip().replace('$', '') if price_text is not None else None,
+        rating.strip().split('⭐')[-1].strip().split('/')[0].strip() if rating is not None else None,
+        colors.strip().split()[0] if colors is not None else None,
+        size.replace('Size:', '').strip() if size is not None else None,
+        gender.replace('Gender:', '').strip() if gender is not None else None,
+    )
+
+def product_from_parts(title, price_text, lines):
+    """Like :func:`product_row_from_parts`, as a product dict."""
+    return dict(zip(PRODUCT_FIELDS, product_row_from_parts(title, price_text, lines)))
+
+def _bs4_card(product_div, make):
+    if not product_div:
+        raise ValueError("Empty product_div provided")
+
+    title_element = product_div.find('h3', class_='product-title')
+    if not title_element:
+        raise ValueError("Title element not found")
+
+    price_text = None
+    price_container = product_div.find('div', class_='price-container')
+    if price_container:
+        price_span = price_container.find('span', class_='price')
+        if price_span:
+            price_text = price_span.text
+
+    lines = (p.text if p.string is not None else None for p in product_div.find_all('p'))
+    return make(title_element.text.strip(), price_text, lines)
+
+def parse_product_details(product_div):
+    """Extract product details from a product div element with error handling."""
+    try:
+        return _bs4_card(product_div, product_from_parts)
+    except Exception as e:
+        logger.error(f"Error parsing product details: {e}", extra=PARSE_ERROR_LOG)
+        return None
+
+def _parse_bs4(html_content, base_url, features, strainer, make):
+    # BeautifulSoup is only the fallback backend, so it is imported on first use
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, features, parse_only=_catalogue_strainer() if strainer else None)
+
+    products = []
+    for div in soup.find_all('div', class_='product-details'):
+        try:
+            products.append(_bs4_card(div, make))
+        except Exception as e:
+            logger.error(f"Error parsing product details: {e}", extra=PARSE_ERROR_LOG)
+
+    next_url = None
+    next_link = soup.find('li', class_='page-item next')
+    if next_link and next_link.find('a'):
+        next_url = urljoin(base_url, next_link.find('a')['href'])
+
+    return products, next_url
+
+if lxml is not None:
+    def _has_class(name):
+        return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+    _LXML_CARDS = etree.XPath(f"//div[{_has_class('product-details')}]")
+    _LXML_TITLE = etree.XPath(f".//h3[{_has_class('product-title')}]")
+    _LXML_PRICE = etree.XPath(f"(.//div[{_has_class('price-container')}])[1]//span[{_has_class('price')}]")
+    _LXML_LINES = etree.XPath(".//p")
+    _LXML_NEXT = etree.XPath("(//li[normalize-space(@class)='page-item next'])[1]//a")
+
+def _lxml_string(element):
+    """Text of an element whose content is a single string, like bs4's ``Tag.string``."""
+    while True:
+        if len(element) == 0:
+            return element.text
+        if len(element) > 1 or element.text or element[0].tail:
+            return None
+        element = element[0]
+
+def _parse_lxml(html_content, base_url, make):
+    root = lxml.html.fromstring(html_content)
+
+    products = []
+    for card in _LXML_CARDS(root):
+        try:
+            titles = _LXML_TITLE(card)
+            if not titles:
+                raise ValueError("Title element not found")
+            prices = _LXML_PRICE(card)
+            price_text = prices[0].text_content() if prices else None
+            lines = (p.text_content() if _lxml_string(p) is not None else None for p in _LXML_LINES(card))
+            products.append(make(titles[0].text_content().strip(), price_text, lines))
+        except Exception as e:
+            logger.error(f"Error parsing product details: {e}", extra=PARSE_ERROR_LOG)
+
+    next_url = None
+    links = _LXML_NEXT(root)
+    if links:
+        next_url = urljoin(base_url, links[0].attrib['href'])
+
+    return products, next_url
+
+def _selectolax_string(node):
+    """Text of a node whose content is a single string, like bs4's ``Tag.string``."""
+    while True:
+        children = list(node.iter(include_text=True))
+        if not children:
+            return None
+        if len(children) > 1:
+            return None
+        node = children[0]
+        if node.tag == '-text':
+            return node.text(deep=False)
+        if node.tag.startswith('-'):
+            return None
+
+def _parse_selectolax(html_content, base_url, make):
+    tree = SelectolaxParser(html_content)
+
+    products = []
+    for card in tree.css('div.product-details'):
+        try:
+            title = card.css_first('h3.product-title')
+            if title is None:
+                raise ValueError("Title element not found")
+            price_text = None
+            price_container = card.css_first('div.price-container')
+            if price_container is not None:
+                price_span = price_container.css_first('span.price')
+                if price_span is not None:
+                    price_text = price_span.text()
+            lines = (p.text() if _selectolax_string(p) is not None else None for p in card.css('p'))
+            products.append(make(title.text().strip(), price_text, lines))
+        except Exception as e:
+            logger.error(f"Error parsing product details: {e}", extra=PARSE_ERROR_LOG)
+
+    next_url = None
+    next_link = tree.css_first('li[class="page-item next"] a')
+    if next_link is not None:
+        next_url = urljoin(base_url, next_link.attributes['href'])
+
+    return products, next_url
+
+def available_backends():
+    """Parser backends usable in this environment, fastest first."""
+    backends = []
+    if SelectolaxParser is not None:
+        backends.append('selectolax')
+    if lxml is not None:
+        backends.extend(['lxml', 'bs4-lxml'])
+    backends.append('html.parser')
+    return backends
+
+def parse_catalogue_page(html_content, base_url, backend='auto', strainer=True, as_rows=False):
+    """Parse one catalogue page into its products and the absolute URL of the next page.
+
+    ``backend`` is one of :func:`available_backends` or ``'auto'`` for the
+    fastest installed one. ``strainer`` makes the BeautifulSoup backends build
+    only the product cards and the next-page link instead of the whole tree.
+    With ``as_rows`` the products are ``PRODUCT_FIELDS`` tuples instead of dicts.
+    """
+    if backend == 'auto':
+        backend = available_backends()[0]
+    make = product_row_from_parts if as_rows else product_from_parts
+
+    if backend == 'selectolax':
+        if SelectolaxParser is None:
+            raise ValueError("selectolax is not installed")
+        return _parse_selectolax(html_content, base_url, make)
+    if backend == 'lxml':
+        if lxml is None:
+            raise ValueError("lxml is not installed")
+        return _parse_lxml(html_content, base_url, make)
+    if backend == 'bs4-lxml':
+        return _parse_bs4(html_content, base_url, 'lxml', strainer, make)
+    if backend == 'html.parser':
+        return _parse_bs4(html_content, base_url, 'html.parser', strainer, make)
+    raise ValueError(f"Unknown parser backend: {backend}")
+
+def parse_page_rows(html_content, base_url, backend='auto'):
+    """Parse a page into compact ``PRODUCT_FIELDS`` tuples; cheap to send back from a worker process."""
+    return parse_catalogue_page(html_content, base_url, backend=backend, as_rows=True)
+
+def rows_to_products(rows):
+    """Turn rows from :func:`parse_page_rows` back into product dicts."""
+    return [dict(zip(PRODUCT_FIELDS, row)) for row in rows]
+
+def products_to_rows(products):
+    """Turn product dicts into ``PRODUCT_FIELDS`` tuples (extra keys such as Timestamp are dropped)."""
+    return [tuple(product.get(field) for field in PRODUCT_FIELDS) for product in products]
+
+
+class ProductColumns:
+    """Column-wise buffers of scraped products, turned into a DataFrame or Arrow table without per-row dicts.
+
+    Rows are ``PRODUCT_FIELDS`` tuples; the run timestamp is kept once
+    instead of on every product.
+    """
+
+    __slots__ = ('columns', 'timestamp')
+
+    def __init__(self, timestamp=None):
+        self.columns = tuple([] for _ in PRODUCT_FIELDS)
+        self.timestamp = timestamp
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def extend(self, rows):
+        """Append ``PRODUCT_FIELDS`` rows."""
+        for column, values in zip(self.columns, zip(*rows)):
+            column.extend(values)
+
+    def to_frame(self):
+        """DataFrame with the same columns as ``pd.DataFrame(products)`` of tagged product dicts."""
+        import pandas as pd
+
+        data = dict(zip(PRODUCT_FIELDS, self.columns))
+        if self.timestamp is not None:
+            data['Timestamp'] = [self.timestamp] * len(self)
+        return pd.DataFrame(data, columns=list(data))
+
+    def to_arrow(self):
+        """Arrow table of string columns; Size, Gender and Timestamp are dictionary-encoded."""
+        import pyarrow as pa
+
+        arrays = {field: pa.array(column, type=pa.string()) for field, column in zip(PRODUCT_FIELDS, self.columns)}
+        for field in ('Size', 'Gender'):
+            arrays[field] = arrays[field].dictionary_encode()
+        if self.timestamp is not None:
+            arrays['Timestamp'] = pa.repeat(pa.scalar(self.timestamp, pa.string()), len(self)).dictionary_encode()
+        return pa.table(arrays)
@@ -0,0 +1,141 @@
+import threading
+import time
+from urllib.parse import urlsplit
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class HostRateLimiter:
+    """Thread-safe limiter that spaces out requests to the same host."""
+
+    def __init__(self, requests_per_second=1.0):
+        self.requests_per_second = requests_per_second
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self):
+        if not self.requests_per_second or self.requests_per_second <= 0:
+            return 0.0
+        return 1.0 / self.requests_per_second
+
+    def acquire(self, url):
+        """Block until a request to the host of `url` is allowed. Returns seconds waited."""
+        interval = self.interval
+        if interval <= 0:
+            return 0.0
+
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + interval
+
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class AdaptiveRateLimiter(HostRateLimiter):
+    """Per-host limiter whose rate follows how the server responds (additive increase, multiplicative decrease).
+
+    Each request to a healthy host raises its rate by ``increase`` requests
+    per second. Throttling (429/503), other server errors and connection
+    failures multiply it by ``decrease``, and responses slower than
+    ``latency_target`` seconds back off more gently. The rate always stays
+    between ``min_rps`` and ``max_rps``. A ``Retry-After`` pauses the host for
+    at least that long. Feed it responses through :meth:`observe`.
+    """
+
+    def __init__(self, requests_per_second=1.0, min_rps=0.2, max_rps=10.0, increase=0.2, decrease=0.5,
+                 latency_target=2.0, report_interval=30.0):
+        if not 0 < min_rps <= max_rps:
+            raise ValueError("Need 0 < min_rps <= max_rps")
+        super().__init__(min(max_rps, max(min_rps, requests_per_second)))
+        self.min_rps = min_rps
+        self.max_rps = max_rps
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.report_interval = report_interval
+        self._rates = {}
+        self._completed = {}
+        self._first_request = {}
+        self._last_report = time.monotonic()
+
+    def rate(self, host):
+        with self._lock:
+            return self._rates.get(host, self.requests_per_second)
+
+    def acquire(self, url):
+        """Block until a request to the host of `url` is allowed. Returns seconds waited."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            interval = 1.0 / self._rates.get(host, self.requests_per_second)
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + interval
+            self._first_request.setdefault(host, slot)
+
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def observe(self, url, status, seconds, retry_after=None):
+        """Adjust the host's rate after one attempt; ``status`` is None when no response arrived."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            old = self._rates.get(host, self.requests_per_second)
+            if status is None or status == 429 or status >= 500:
+                rate = old * self.decrease
+            elif seconds > self.latency_target:
+                rate = old * (1 + self.decrease) / 2
+            else:
+                rate = old + self.increase
+            rate = min(self.max_rps, max(self.min_rps, rate))
+            self._rates[host] = rate
+            self._completed[host] = self._completed.get(host, 0) + 1
+            if retry_after:
+                self._next_slot[host] = max(self._next_slot.get(host, now), now + retry_after)
+            report = self.report_interval is not None and now - self._last_report >= self.report_interval
+            if report:
+                self._last_report = now
+
+        if rate < old:
+            logger.info(f"Slowing down {host} after {'HTTP ' + str(status) if status else 'a failed request'}"
+                        f" ({seconds:.2f}s): delay {1 / rate:.2f}s"
+                        + (f", pausing {retry_after:.1f}s as asked" if retry_after else ""))
+        if report:
+            self.log_summary()
+
+    def summary(self):
+        """Current delay, target rate and achieved requests per second of every host."""
+        with self._lock:
+            now = time.monotonic()
+            result = {}
+            for host, completed in self._completed.items():
+                rate = self._rates.get(host, self.requests_per_second)
+                elapsed = now - self._first_request.get(host, now)
+                result[host] = {
+                    'delay': round(1 / rate, 3),
+                    'target_rps': round(rate, 3),
+                    'achieved_rps': round(completed / elapsed, 3) if elapsed > 0 else None,
+                    'requests': completed,
+                }
+            return result
+
+    def reset_summary(self):
+        """Start counting :meth:`summary` afresh (e.g. per run); the learned rates are kept."""
+        with self._lock:
+            self._completed.clear()
+            self._first_request.clear()
+            self._last_report = time.monotonic()
+
+    def log_summary(self):
+        for host, state in self.summary().items():
+            logger.info(f"Rate for {host}: delay {state['delay']:.2f}s (target {state['target_rps']:.2f} req/s), "
+                        f"achieved {state['achieved_rps']} req/s over {state['requests']} requests")
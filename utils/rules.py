@@ -0,0 +1,182 @@
+import re
+from functools import lru_cache
+import logging
+
+import numpy as np
+import pandas as pd
+
+from utils.exchange_rates import ExchangeRates
+
+logger = logging.getLogger(__name__)
+
+# Rows matching a rule are rejected. A rule matches listed placeholder ``values``,
+# values matching ``pattern``, and/or nulls (``null``); ``column: None`` means any column.
+DEFAULT_RULES = (
+    {'name': 'placeholder_title', 'column': 'Title', 'values': ['Unknown Product']},
+    {'name': 'invalid_rating', 'column': 'Rating', 'values': ['Invalid Rating', 'Not Rated']},
+    {'name': 'price_unavailable', 'column': 'Price', 'values': ['Price Unavailable']},
+    {'name': 'missing_value', 'column': None, 'null': True},
+)
+
+# Numeric columns; ``pattern`` extracts the number from text such as '4.5 / 5'.
+# Prices are converted to rupiah, whatever currency they are quoted in.
+NUMBER_RULES = (
+    {'name': 'unparseable_price', 'column': 'Price', 'currency': True},
+    {'name': 'unparseable_rating', 'column': 'Rating', 'pattern': r'(\d+\.?\d*)'},
+    {'name': 'unparseable_colors', 'column': 'Colors', 'pattern': r'(\d+)', 'integer': True},
+)
+
+# '$1,299.00', '€ 12.50', '12.50 EUR', '100'
+PRICE_PATTERN = re.compile(r'^\s*(?P<symbol>[^\d\s.,+-]+)?\s*'
+                           r'(?P<amount>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)\s*'
+                           r'(?P<code>[A-Za-z]{3})?\s*$')
+CURRENCY_SYMBOLS = {'$': 'USD', 'US$': 'USD', '€': 'EUR', '£': 'GBP', '¥': 'JPY', 'Rp': 'IDR', 'Rp.': 'IDR'}
+
+# The catalogue quotes bare numbers in US dollars
+DEFAULT_CURRENCY = 'USD'
+
+REJECTED_BY_COLUMN = 'Rejected By'
+
+def parse_number(series: pd.Series, pattern, integer: bool = False) -> pd.Series:
+    """Parse numbers vectorized, using the regex only for values that are not plain numbers."""
+    numbers = pd.to_numeric(series, errors='coerce')
+    needs_regex = numbers.isna() | (numbers < 0)
+    if integer:
+        needs_regex |= numbers % 1 != 0
+    if needs_regex.any():
+        extracted = series[needs_regex].astype(str).str.extract(pattern, expand=False)
+        numbers = numbers.astype('float64')
+        numbers[needs_regex] = pd.to_numeric(extracted, errors='coerce')
+    return numbers
+
+
+class ValidationReport:
+    """Per-rule rejection counts of a cleaning run and, with ``keep_rejected``, the rejected rows."""
+
+    def __init__(self, keep_rejected: bool = False):
+        self.keep_rejected = keep_rejected
+        self.counts = {}
+        self._rejected = []
+
+    def count(self, name: str, rows: int):
+        self.counts[name] = self.counts.get(name, 0) + rows
+
+    def reject(self, rows: pd.DataFrame, reasons):
+        """Keep ``rows`` for quarantine, labelled with the rule that rejected each of them."""
+        if self.keep_rejected and len(rows):
+            self._rejected.append(rows.assign(**{REJECTED_BY_COLUMN: reasons}))
+
+    @property
+    def rejected(self) -> pd.DataFrame:
+        if not self._rejected:
+            return pd.DataFrame(columns=[REJECTED_BY_COLUMN])
+        return pd.concat(self._rejected, ignore_index=True)
+
+    def summary(self) -> str:
+        return ', '.join(f"{name}: {count}" for name, count in self.counts.items() if count) or 'nothing rejected'
+
+
+class RuleSet:
+    """Validation and number-parsing rules, compiled once and evaluated as vectorized masks.
+
+    :meth:`evaluate` checks every rule against the frame in one pass and
+    returns the combined validity mask; :meth:`convert` parses the numeric
+    columns of the valid rows. Both record per-rule counts (and rejected
+    rows) in an optional :class:`ValidationReport`. A rejected row is
+    attributed to the first rule it breaks.
+    """
+
+    def __init__(self, rules=DEFAULT_RULES, numbers=NUMBER_RULES, rates: ExchangeRates | None = None,
+                 default_currency: str = DEFAULT_CURRENCY):
+        self.rules = [self._compile_rule(rule) for rule in rules]
+        self.numbers = [dict(rule, pattern=re.compile(rule['pattern']) if rule.get('pattern') else None)
+                        for rule in numbers]
+        self.rates = rates or ExchangeRates()
+        self.default_currency = default_currency
+
+    @staticmethod
+    def _compile_rule(rule):
+        compiled = dict(rule)
+        compiled['values'] = list(rule.get('values') or ())
+        compiled['pattern'] = re.compile(rule['pattern']) if rule.get('pattern') else None
+        compiled['null'] = bool(rule.get('null'))
+        return compiled
+
+    def _rule_mask(self, df, rule):
+        columns = [rule['column']] if rule['column'] is not None else list(df.columns)
+        mask = np.zeros(len(df), dtype=bool)
+        for column in columns:
+            if column not in df.columns:
+                continue
+            series = df[column]
+            if rule['null']:
+                mask |= series.isna().to_numpy()
+            if rule['values']:
+                mask |= series.isin(rule['values']).to_numpy()
+            if rule['pattern'] is not None:
+                matches = series.astype(str).str.contains(rule['pattern'], na=False)
+                mask |= matches.to_numpy() & series.notna().to_numpy()
+        return mask
+
+    def evaluate(self, df: pd.DataFrame, report: ValidationReport | None = None) -> pd.Series:
+        """Boolean Series aligned with ``df``: True for the rows that break no rule."""
+        masks = [self._rule_mask(df, rule) for rule in self.rules]
+        rejected = np.logical_or.reduce(masks) if masks else np.zeros(len(df), dtype=bool)
+        if report is not None:
+            for rule, mask in zip(self.rules, masks):
+                report.count(rule['name'], int(mask.sum()))
+            if report.keep_rejected and rejected.any():
+                reasons = np.select(masks, [rule['name'] for rule in self.rules], default='')
+                report.reject(df[rejected], reasons[rejected])
+        return pd.Series(~rejected, index=df.index)
+
+    def price_in_idr(self, series: pd.Series) -> pd.Series:
+        """Parse prices such as '100.00', '$1,299.00' or '12.50 EUR' and convert them to rupiah."""
+        default_rate = self.rates.rate(self.default_currency)
+        numbers = pd.to_numeric(series, errors='coerce') * default_rate
+        needs_regex = numbers.isna() & series.notna()
+        if needs_regex.any():
+            parts = series[needs_regex].astype(str).str.extract(PRICE_PATTERN)
+            # An unknown symbol or currency code leaves the price unparsed
+            currency = parts['code'].str.upper().where(parts['code'].notna(), parts['symbol'].map(CURRENCY_SYMBOLS))
+            currency = currency.mask(parts['symbol'].isna() & parts['code'].isna(), self.default_currency)
+            rates = pd.to_numeric(currency.map(self.rates.rates()), errors='coerce')
+            amounts = pd.to_numeric(parts['amount'].str.replace(',', '', regex=False), errors='coerce')
+            numbers = numbers.astype('float64')
+            numbers[needs_regex] = amounts * rates
+        return numbers
+
+    def convert(self, df: pd.DataFrame, fast: bool = False, report: ValidationReport | None = None) -> dict:
+        """Parse the numeric columns of ``df``; unparseable values become NaN and are counted.
+
+        With ``fast`` plain numbers skip the regex and the result keeps a float
+        dtype; otherwise every value goes through the regex, as ``clean_data`` always did.
+        """
+        parsed = {}
+        failed = np.zeros(len(df), dtype=bool)
+        reasons = np.full(len(df), '', dtype=object)
+        for rule in self.numbers:
+            column = rule['column']
+            if column not in df.columns:
+                continue
+            series = df[column]
+            if rule.get('currency'):
+                values = self.price_in_idr(series)
+            elif fast:
+                values = parse_number(series, rule['pattern'], integer=bool(rule.get('integer')))
+            else:
+                values = pd.to_numeric(series.astype(str).str.extract(rule['pattern'], expand=False), errors='coerce')
+            parsed[column] = values
+            mask = values.isna().to_numpy()
+            reasons[mask & ~failed] = rule['name']
+            failed |= mask
+            if report is not None:
+                report.count(rule['name'], int(mask.sum()))
+        if report is not None and failed.any():
+            report.reject(df[failed], reasons[failed])
+        return parsed
+
+@lru_cache(maxsize=None)
+def default_rules() -> RuleSet:
+    """The built-in rule set, compiled once per process."""
+    return RuleSet()
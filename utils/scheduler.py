@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+import logging
+
+from utils.files import write_atomic
+from utils.metrics import PERCENTILES, percentile
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Runs kept in memory and in the history file
+HISTORY_SIZE = 200
+
+
+def interval_schedule(seconds):
+    """Schedule a run every ``seconds``, counted from the previous scheduled start."""
+    if seconds <= 0:
+        raise ValueError("Interval must be positive")
+    return lambda after: after + seconds
+
+def cron_schedule(expression):
+    """Schedule runs by a five-field cron expression in local time, e.g. ``'*/30 * * * *'``."""
+    from croniter import croniter
+    if not croniter.is_valid(expression):
+        raise ValueError(f"Invalid cron expression: {expression}")
+    return lambda after: croniter(expression, datetime.fromtimestamp(after)).get_next(float)
+
+
+class RunLock:
+    """Non-blocking exclusive lock on a file, so two processes never run the pipeline at once.
+
+    The OS releases the lock if the process dies. Without ``fcntl`` only
+    runs within this process are excluded.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = None
+
+    def acquire(self) -> bool:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(self.path, 'a+')
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return False
+        f.seek(0)
+        f.truncate()
+        f.write(f"{datetime.now().isoformat()} pid {os.getpid()}\n")
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Scheduler:
+    """Run ``job`` repeatedly in this process, on the times ``schedule(after)`` returns.
+
+    ``job`` returns an exit status like ``main.main``. Runs never overlap:
+    each runs in the scheduler's thread, a run that overruns its next start
+    time skips the missed slots instead of queueing them, and with a
+    ``lock_file`` a run is skipped while another process holds the lock.
+    Every run is recorded in :attr:`history` (and ``history_file``) with its
+    start lag, duration and status.
+    """
+
+    def __init__(self, job, schedule, lock_file=None, history_file=None, history_size=HISTORY_SIZE,
+                 run_immediately=True):
+        self.job = job
+        self.schedule = schedule
+        self.lock = RunLock(lock_file) if lock_file else None
+        self.history_file = Path(history_file) if history_file else None
+        self.history = deque(maxlen=history_size)
+        self.run_immediately = run_immediately
+        self._running = threading.Lock()
+        self._stop = threading.Event()
+
+        if self.history_file is not None and self.history_file.exists():
+            try:
+                self.history.extend(json.loads(self.history_file.read_text(encoding='utf-8'))['runs'])
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable scheduler history {self.history_file}: {e}")
+
+    def stop(self):
+        """Stop after the current run, if any; safe to call from a signal handler."""
+        self._stop.set()
+
+    def run_once(self, scheduled=None):
+        """Run the job now unless a run is already in progress; returns its history record."""
+        if not self._running.acquire(blocking=False):
+            logger.warning("Previous run still in progress; skipping this one")
+            return None
+        try:
+            started = time.time()
+            record = {
+                'scheduled': datetime.fromtimestamp(scheduled or started).isoformat(),
+                'started': datetime.fromtimestamp(started).isoformat(),
+                'lag_seconds': round(started - (scheduled or started), 3),
+            }
+            if self.lock is not None and not self.lock.acquire():
+                logger.warning(f"Another process holds {self.lock.path}; skipping this run")
+                record.update(seconds=0.0, exit_status=None, skipped=True)
+            else:
+                start = time.perf_counter()
+                try:
+                    exit_status = self.job()
+                except Exception as e:
+                    logger.error(f"Scheduled run failed: {e}")
+                    exit_status = 1
+                finally:
+                    if self.lock is not None:
+                        self.lock.release()
+                record.update(seconds=round(time.perf_counter() - start, 3), exit_status=exit_status)
+                logger.info(f"Run finished with status {exit_status} in {record['seconds']:.1f}s; "
+                            f"{self.summary()}")
+
+            self.history.append(record)
+            self._write_history()
+            return record
+        finally:
+            self._running.release()
+
+    def run_forever(self, max_runs=None):
+        """Run on schedule until :meth:`stop` is called (or ``max_runs`` runs were made)."""
+        runs = 0
+        next_at = time.time() if self.run_immediately else self.schedule(time.time())
+        while not self._stop.is_set() and (max_runs is None or runs < max_runs):
+            delay = next_at - time.time()
+            if delay > 0:
+                logger.info(f"Next run at {datetime.fromtimestamp(next_at):%Y-%m-%d %H:%M:%S}")
+                if self._stop.wait(delay):
+                    break
+            self.run_once(scheduled=next_at)
+            runs += 1
+
+            following, missed = self.schedule(next_at), 0
+            while following <= time.time():
+                following, missed = self.schedule(following), missed + 1
+            if missed:
+                logger.warning(f"Run overran its schedule; skipped {missed} start time(s)")
+            next_at = following
+
+    def summary(self) -> str:
+        """Run count, failures and duration percentiles over :attr:`history`, as one log line."""
+        completed = [run for run in self.history if not run.get('skipped')]
+        durations = sorted(run['seconds'] for run in completed)
+        if not durations:
+            return 'no completed runs'
+        parts = [f"{len(durations)} runs", f"{sum(1 for run in completed if run['exit_status'] != 0)} failed"]
+        parts.extend(f"p{pct} {percentile(durations, pct):.1f}s" for pct in PERCENTILES)
+        return ', '.join(parts)
+
+    def _write_history(self):
+        if self.history_file is None:
+            return
+        try:
+            write_atomic(self.history_file, json.dumps({'runs': list(self.history)}, indent=2) + '\n')
+        except Exception as e:
+            logger.warning(f"Could not write scheduler history: {e}")
@@ -0,0 +1,113 @@
+import random
+import time
+import logging
+
+from googleapiclient.errors import HttpError
+
+logger = logging.getLogger(__name__)
+
+# Quota (429) and transient backend errors are worth retrying
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 1.0
+BACKOFF_MAX = 64.0
+
+# Keep each values.batchUpdate request well under the API payload limits
+MAX_CELLS_PER_REQUEST = 40_000
+MAX_ROWS_PER_RANGE = 1_000
+
+def execute_with_retry(request, max_retries=MAX_RETRIES):
+    """Execute a Sheets API request, retrying quota and server errors with exponential backoff."""
+    attempt = 0
+    while True:
+        try:
+            return request.execute()
+        except HttpError as e:
+            status = getattr(e.resp, 'status', None)
+            if status not in RETRY_STATUSES or attempt >= max_retries:
+                raise
+            delay = None
+            retry_after = e.resp.get('retry-after') if hasattr(e.resp, 'get') else None
+            if retry_after:
+                try:
+                    delay = min(BACKOFF_MAX, float(retry_after))
+                except ValueError:
+                    delay = None
+            if delay is None:
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_FACTOR * (2 ** attempt)))
+            logger.warning(f"Google Sheets API returned {status}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+def column_letter(number):
+    """Spreadsheet column letter for a 1-based column number (1 -> A, 27 -> AA)."""
+    letters = ''
+    while number > 0:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+def _cell_key(value):
+    # USER_ENTERED numbers come back from Sheets as int/float and empty cells are dropped
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+def _row_key(row, ignore=frozenset()):
+    key = [_cell_key(value) for index, value in enumerate(row) if index not in ignore]
+    while key and key[-1] == '':
+        key.pop()
+    return key
+
+def plan_updates(existing, values, ignore_columns=()):
+    """Work out the value ranges that turn ``existing`` sheet rows into ``values``.
+
+    Returns ``(ranges, clear_range)``: contiguous runs of changed rows as
+    ``{'range': ..., 'values': ...}`` dicts of at most ``MAX_ROWS_PER_RANGE``
+    rows, and the A1 range of surplus rows to clear (or None). Cells in the
+    0-based ``ignore_columns`` do not make a row count as changed.
+    """
+    ignore = frozenset(ignore_columns)
+    width = max([len(row) for row in values] + [len(row) for row in existing] + [1])
+    ranges = []
+    run_start = None
+
+    def close_run(end):
+        for start in range(run_start, end, MAX_ROWS_PER_RANGE):
+            stop = min(end, start + MAX_ROWS_PER_RANGE)
+            rows = [list(row) + [''] * (width - len(row)) for row in values[start:stop]]
+            ranges.append({'range': f'A{start + 1}', 'values': rows})
+
+    for index, row in enumerate(values):
+        old = existing[index] if index < len(existing) else []
+        if _row_key(row, ignore) != _row_key(old, ignore):
+            if run_start is None:
+                run_start = index
+        elif run_start is not None:
+            close_run(index)
+            run_start = None
+    if run_start is not None:
+        close_run(len(values))
+
+    clear_range = None
+    if len(existing) > len(values):
+        clear_range = f'A{len(values) + 1}:{column_letter(width)}{len(existing)}'
+    return ranges, clear_range
+
+def batch_requests(ranges, max_cells=MAX_CELLS_PER_REQUEST):
+    """Group value ranges into batchUpdate payloads of at most ``max_cells`` cells each."""
+    batch, cells = [], 0
+    for value_range in ranges:
+        size = sum(len(row) for row in value_range['values'])
+        if batch and cells + size > max_cells:
+            yield batch
+            batch, cells = [], 0
+        batch.append(value_range)
+        cells += size
+    if batch:
+        yield batch
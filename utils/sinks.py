@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Threads of sinks that timed out but have not returned yet
+_overdue = set()
+_overdue_lock = threading.Lock()
+
+
+class Sink:
+    """A load destination: a callable returning True on success, plus its policy."""
+
+    def __init__(self, name, func, *args, required=True, timeout=None, **kwargs):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.required = required
+        self.timeout = timeout
+
+    def __call__(self):
+        return self.func(*self.args, **self.kwargs)
+
+
+class SinkResult:
+    """Outcome of one sink: success flag, latency and error text if it failed."""
+
+    def __init__(self, name, ok, seconds, required, error=None):
+        self.name = name
+        self.ok = ok
+        self.seconds = seconds
+        self.required = required
+        self.error = error
+
+    def __repr__(self):
+        return f"SinkResult({self.name!r}, ok={self.ok}, seconds={self.seconds:.3f}, error={self.error!r})"
+
+
+def _timed(sink):
+    start = time.perf_counter()
+    try:
+        ok = bool(sink())
+        error = None if ok else "sink reported failure"
+    except Exception as e:
+        ok, error = False, f"{type(e).__name__}: {e}"
+    return ok, error, time.perf_counter() - start
+
+def _start(sink):
+    future = Future()
+
+    def run():
+        future.set_result(_timed(sink))
+        with _overdue_lock:
+            _overdue.discard(thread)
+
+    # A daemon thread, so a sink that hangs past its timeout never blocks interpreter exit
+    thread = threading.Thread(target=run, name=f'sink-{sink.name}', daemon=True)
+    thread.start()
+    return future, thread
+
+def run_sinks(sinks):
+    """Run all sinks concurrently and return one SinkResult per sink, in the given order.
+
+    A sink that exceeds its ``timeout`` (seconds from the start of the load
+    phase) is reported as failed. Python cannot stop its thread, so the
+    sink's client has to enforce a timeout of its own; until the thread
+    returns, :func:`wait_for_sinks` waits for it.
+    """
+    start = time.perf_counter()
+    started = [_start(sink) for sink in sinks]
+
+    results = []
+    for sink, (future, thread) in zip(sinks, started):
+        remaining = None
+        if sink.timeout is not None:
+            remaining = max(0.0, start + sink.timeout - time.perf_counter())
+        try:
+            ok, error, seconds = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            ok, error, seconds = False, f"timed out after {sink.timeout}s", time.perf_counter() - start
+            with _overdue_lock:
+                if not future.done():
+                    _overdue.add(thread)
+        results.append(SinkResult(sink.name, ok, seconds, sink.required, error))
+
+        level = logging.INFO if ok else (logging.ERROR if sink.required else logging.WARNING)
+        logger.log(level, f"Sink {sink.name} {'succeeded' if ok else 'failed'} in {seconds:.2f}s"
+                          + (f": {error}" if error else ""))
+
+    if results:
+        slowest = max(results, key=lambda result: result.seconds)
+        logger.info(f"Load phase took {time.perf_counter() - start:.2f}s; slowest sink: "
+                    f"{slowest.name} ({slowest.seconds:.2f}s)")
+    return results
+
+def wait_for_sinks(timeout=None):
+    """Wait until every sink that timed out has returned; returns False if some are still running.
+
+    Call it before the next run may touch the same tables or sheets.
+    """
+    with _overdue_lock:
+        threads = list(_overdue)
+    if not threads:
+        return True
+    logger.warning(f"Waiting for {len(threads)} timed-out sink(s) to finish: "
+                   + ", ".join(thread.name for thread in threads))
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for thread in threads:
+        thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+    with _overdue_lock:
+        return not _overdue
+
+def exit_code(results):
+    """0 when every required sink succeeded, 1 otherwise; optional sink failures are only logged."""
+    return 1 if any(result.required and not result.ok for result in results) else 0
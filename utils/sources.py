@@ -0,0 +1,138 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import logging
+
+from utils.extract import DEFAULT_PARSER_BACKEND, scrape_product_frame
+from utils.http_client import HttpClient
+from utils.ratelimit import AdaptiveRateLimiter, HostRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Column that tags every product with the name of the source it was scraped from
+SOURCE_COLUMN = 'Source'
+
+# The same title can be listed by several sources, so products are keyed by both
+SOURCE_KEY_COLUMNS = (SOURCE_COLUMN, 'Title')
+
+# Lowest rate an adaptive source backs off to
+MIN_REQUESTS_PER_SECOND = 0.2
+
+
+class Source:
+    """One catalogue to crawl, with its own concurrency and rate budget.
+
+    ``workers`` pages of the source are fetched at once (over a connection
+    pool of that size), no faster than ``requests_per_second``. With
+    ``max_requests_per_second`` the rate adapts to the server between
+    ``MIN_REQUESTS_PER_SECOND`` and that budget instead of staying fixed.
+    """
+
+    def __init__(self, name, base_url, max_pages=50, workers=1, requests_per_second=1.0,
+                 max_requests_per_second=None, parser_backend=DEFAULT_PARSER_BACKEND):
+        if not name or not base_url:
+            raise ValueError("A source needs a name and a base_url")
+        if workers < 1:
+            raise ValueError(f"Source {name}: workers must be at least 1")
+        self.name = name
+        self.base_url = base_url
+        self.max_pages = max_pages
+        self.workers = workers
+        self.requests_per_second = requests_per_second
+        self.max_requests_per_second = max_requests_per_second
+        self.parser_backend = parser_backend
+
+    def __repr__(self):
+        return f"Source({self.name!r}, {self.base_url!r})"
+
+    def client(self):
+        return HttpClient(pool_maxsize=self.workers)
+
+    def rate_limiter(self):
+        if self.max_requests_per_second:
+            return AdaptiveRateLimiter(self.requests_per_second,
+                                       min_rps=min(MIN_REQUESTS_PER_SECOND, self.max_requests_per_second),
+                                       max_rps=self.max_requests_per_second)
+        return HostRateLimiter(self.requests_per_second)
+
+    def crawl_options(self):
+        """Keyword arguments for the scrape functions that come from the source itself."""
+        return {'max_pages': self.max_pages, 'workers': self.workers,
+                'requests_per_second': self.requests_per_second, 'parser_backend': self.parser_backend}
+
+
+def load_sources(path):
+    """Read sources from a JSON file: a list of :class:`Source` settings, or ``{"sources": [...]}``.
+
+    Each entry needs a ``name`` and a ``base_url``; the other keys are the
+    optional arguments of :class:`Source`.
+    """
+    config = json.loads(Path(path).read_text(encoding='utf-8'))
+    entries = config.get('sources') if isinstance(config, dict) else config
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"No sources configured in {path}")
+
+    sources = []
+    for entry in entries:
+        try:
+            sources.append(Source(**entry))
+        except TypeError as e:
+            raise ValueError(f"Invalid source {entry.get('name', entry)!r} in {path}: {e}") from e
+    names = [source.name for source in sources]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate source names in {path}: {', '.join(duplicates)}")
+    return sources
+
+def scrape_sources(sources, source_options=None, metrics=None, timestamp=None, max_concurrent=None):
+    """Crawl all ``sources`` at once and return their products in one DataFrame, tagged by ``Source``.
+
+    Each source runs in its own thread with its own workers, client and rate
+    limiter, so the crawl takes about as long as the slowest source.
+    ``source_options(source)`` returns extra keyword arguments for that
+    source's scrape (e.g. a warm client, rate limiter, cache or checkpoint);
+    by default every call gets a new client and rate limiter. All sources
+    share one run ``timestamp``. A source that fails is logged and left out,
+    and the rows of the others are returned; each is timed as an
+    ``extract:<name>`` stage in ``metrics``.
+    """
+    import pandas as pd
+
+    timestamp = timestamp or datetime.now().isoformat()
+    owned_clients = []
+
+    def options(source):
+        if source_options is not None:
+            return source_options(source)
+        client = source.client()
+        owned_clients.append(client)
+        return {'client': client, 'rate_limiter': source.rate_limiter()}
+
+    def crawl(source):
+        start = time.perf_counter()
+        try:
+            kwargs = {**source.crawl_options(), 'timestamp': timestamp, **options(source)}
+            frame = scrape_product_frame(source.base_url, metrics=metrics, **kwargs)
+        except Exception as e:
+            logger.error(f"Source {source.name} failed: {e}")
+            frame = None
+        seconds = time.perf_counter() - start
+        rows = 0 if frame is None else len(frame)
+        logger.info(f"Source {source.name}: {rows} products in {seconds:.2f}s")
+        if metrics is not None:
+            metrics.add_stage(f'extract:{source.name}', seconds, rows_out=rows, ok=frame is not None)
+        return frame.assign(**{SOURCE_COLUMN: source.name}) if frame is not None else None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_concurrent or len(sources),
+                                thread_name_prefix='source') as executor:
+            frames = [frame for frame in executor.map(crawl, sources) if frame is not None]
+    finally:
+        for client in owned_clients:
+            client.close()
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
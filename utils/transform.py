@@ -1,13 +1,27 @@
 import pandas as pd
 import logging
 import numpy as np
+from utils.rules import RuleSet, ValidationReport, default_rules
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def clean_data(df: pd.DataFrame) -> pd.DataFrame:
-    """Clean and transform the scraped product data."""
+# Column dtypes written by clean_data_fast
+COMPACT_DTYPES = {
+    'Price': 'float32',
+    'Rating': 'float32',
+    'Colors': 'uint8',
+    'Size': 'category',
+    'Gender': 'category',
+}
+
+def clean_data(df: pd.DataFrame, rules: RuleSet | None = None, report: ValidationReport | None = None) -> pd.DataFrame:
+    """Clean and transform the scraped product data.
+
+    Rows are validated and numbers parsed with ``rules`` (the built-in
+    ``utils.rules`` set by default). Per-rule rejection counts, and the
+    rejected rows if it keeps them, are collected in ``report``.
+    """
+    rules = rules or default_rules()
     try:
         if df.empty:
             logger.warning("Received empty DataFrame")
@@ -24,45 +38,19 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
             logger.error(f"Failed to remove duplicates: {e}")
             raise
 
-        # Step 2: Filter invalid data
+        # Step 2: Filter invalid and null entries (all rules in one pass)
         try:
             initial_count = len(df_clean)
-            dirty_patterns = {
-                "Title": ["Unknown Product"],
-                "Rating": ["Invalid Rating", "Not Rated"],
-                "Price": ["Price Unavailable", None, np.nan],
-            }
-
-            for col, patterns in dirty_patterns.items():
-                if col in df_clean.columns:
-                    df_clean = df_clean[~df_clean[col].isin(patterns)]
-
-            logger.info(f"Removed {initial_count - len(df_clean)} rows with invalid entries")
+            df_clean = df_clean[rules.evaluate(df_clean, report)]
+            logger.info(f"Removed {initial_count - len(df_clean)} rows with invalid or null entries")
         except Exception as e:
             logger.error(f"Failed filtering invalid entries: {e}")
             raise
 
-        # Step 3: Remove nulls
-        try:
-            initial_count = len(df_clean)
-            df_clean = df_clean.dropna()
-            logger.info(f"Removed {initial_count - len(df_clean)} rows with null values")
-        except Exception as e:
-            logger.error(f"Failed to drop nulls: {e}")
-            raise
-
-        # Step 4: Type conversions
+        # Step 3: Type conversions (prices are converted to IDR)
         try:
-            if 'Price' in df_clean.columns:
-                df_clean['Price'] = pd.to_numeric(df_clean['Price'], errors='coerce') * 16000  # Convert USD to IDR
-
-            if 'Rating' in df_clean.columns:
-                df_clean['Rating'] = df_clean['Rating'].astype(str).str.extract(r'(\d+\.?\d*)', expand=False)
-                df_clean['Rating'] = pd.to_numeric(df_clean['Rating'], errors='coerce')
-
-            if 'Colors' in df_clean.columns:
-                df_clean['Colors'] = df_clean['Colors'].astype(str).str.extract(r'(\d+)', expand=False)
-                df_clean['Colors'] = pd.to_numeric(df_clean['Colors'], errors='coerce')
+            for col, values in rules.convert(df_clean, report=report).items():
+                df_clean[col] = values
 
             for col in ['Size', 'Gender']:
                 if col in df_clean.columns:
@@ -72,15 +60,102 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
             logger.error(f"Error during data type conversion: {e}")
             raise
 
-        # Step 5: Final null check
+        # Step 4: Final null check
         if df_clean.isnull().values.any():
             logger.warning("Data still contains nulls after processing. Dropping remaining nulls.")
             df_clean = df_clean.dropna()
 
         df_clean.reset_index(drop=True, inplace=True)
+        if report is not None:
+            logger.info(f"Rejected rows per rule: {report.summary()}")
         logger.info(f"Data cleaning completed. Final row count: {len(df_clean)}")
         return df_clean
 
     except Exception as e:
         logger.error(f"Unexpected error in clean_data: {e}")
         raise
+
+def clean_data_fast(df: pd.DataFrame, rules: RuleSet | None = None,
+                    report: ValidationReport | None = None) -> pd.DataFrame:
+    """Vectorized single-pass variant of clean_data that returns compact dtypes.
+
+    Keeps the same rows and values as ``clean_data``, but builds one combined
+    validity mask instead of filtering step by step, parses numbers without a
+    regex where possible and stores Price/Rating as float32, Colors as uint8
+    and Size/Gender as categories. Takes the same ``rules`` and ``report``
+    as ``clean_data``; duplicates are not counted as rejections.
+    """
+    rules = rules or default_rules()
+    try:
+        if df.empty:
+            logger.warning("Received empty DataFrame")
+            return df
+
+        # Rejections are counted before de-duplication, so clean_data's counts
+        # (which only see the first copy of a row) can be lower
+        valid = rules.evaluate(df, report)
+        invalid_count = int((~valid).sum())
+
+        # Copies of a row are all valid or all invalid, so de-duplicating only the
+        # valid rows keeps exactly the rows drop_duplicates-then-filter would
+        duplicated = df[valid].duplicated()
+        valid[duplicated.index[duplicated.values]] = False
+
+        unique_valid = df[valid]
+        columns = {col: unique_valid[col] for col in df.columns}
+        columns.update(rules.convert(unique_valid, fast=True, report=report))
+
+        parsed = pd.Series(True, index=columns[df.columns[0]].index)
+        for col in ('Price', 'Rating', 'Colors'):
+            if col in columns:
+                parsed &= columns[col].notna()
+
+        df_clean = pd.DataFrame({col: values[parsed] for col, values in columns.items()})
+        for col, dtype in COMPACT_DTYPES.items():
+            if col not in df_clean.columns:
+                continue
+            if dtype == 'uint8' and len(df_clean) and df_clean[col].max() > np.iinfo(np.uint8).max:
+                df_clean[col] = pd.to_numeric(df_clean[col], downcast='unsigned')
+            elif dtype == 'category':
+                values = df_clean[col]
+                if pd.api.types.infer_dtype(values, skipna=True) != 'string':
+                    values = values.astype(str)
+                df_clean[col] = values.astype('category')
+            else:
+                df_clean[col] = df_clean[col].astype(dtype)
+
+        df_clean.reset_index(drop=True, inplace=True)
+        logger.info(f"Removed {int(duplicated.sum())} duplicate rows, {invalid_count} rows with invalid or null "
+                    f"entries and {int((~parsed).sum())} rows with unparseable numbers")
+        logger.info(f"Data cleaning completed. Final row count: {len(df_clean)}")
+        return df_clean
+
+    except Exception as e:
+        logger.error(f"Unexpected error in clean_data_fast: {e}")
+        raise
+
+def clean_batches(batches, cleaner=clean_data):
+    """Clean an iterable of product batches, yielding one cleaned DataFrame per non-empty batch.
+
+    Each batch may be a DataFrame or a list of product dicts. Rows already seen
+    in an earlier batch are dropped first, so the concatenated output matches
+    what ``cleaner`` (``clean_data`` or ``clean_data_fast``) returns for all rows at once.
+    """
+    seen = set()
+    for batch in batches:
+        df = batch if isinstance(batch, pd.DataFrame) else pd.DataFrame(batch)
+        if df.empty:
+            continue
+
+        try:
+            row_hashes = pd.util.hash_pandas_object(df, index=False)
+            is_new = ~row_hashes.duplicated() & ~row_hashes.isin(seen)
+            seen.update(row_hashes[is_new].tolist())
+            df = df[is_new.values]
+        except Exception as e:
+            logger.error(f"Failed to remove duplicates across batches: {e}")
+            raise
+
+        cleaned = cleaner(df)
+        if not cleaned.empty:
+            yield cleaned